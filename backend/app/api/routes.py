@@ -1,126 +1,432 @@
+import json
 import uuid
+import asyncio
+import zipfile
 import logging
-from typing import Dict
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse
+from functools import partial
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.models.schemas import (
-    ChatRequest, ChatResponse, ResumeUploadResponse,
-    SessionState, Message, MessageRole
+    ChatRequest, ChatResponse, ResumeUploadResponse, RewriteRequest, ATSScoreRequest,
+    RankRequest, RankIndexRequest, RankingPage, MultiImproveRequest,
+    SessionState, StructuredResume, ResumeAnalysis, ReanalysisResponse, UploadJob, JobAccepted, Message, MessageRole
 )
-from app.services.resume_parser import parse_resume
+from app.services.resume_parser import parse_resume_async, read_upload, resume_preview, PREVIEW_CHARS, ParserBusyError
 from app.services.resume_agent import resume_agent
+from app.services.session_store import session_store
+from app.services.conversation_context import conversation_context
+from app.services.analysis_cache import analysis_cache
+from app.services.resilience import LLMUnavailableError
+from app.services.admission import admission, AdmissionRejected, client_ip, estimate_request_tokens
+from app.services.batch import expand_uploads, analyze_batch
+from app.services.uploads import analyze_upload, reanalyze_upload
+from app.services.jobs import upload_jobs, FINISHED
+from app.services.ats_scoring import ats_scorer
+from app.services.ranking import resume_ranker
+from app.services.corrections import record_correction, detect_correction
+from app.services.suggestions import suggest_followups
+from app.services.speculation import speculative_chat
+from app.services.sectionizer import sectionize, find_section, focused_resume_text
+from app.core.config import (
+    BATCH_CONCURRENCY, CHAT_SECTION_FOCUS, RANKING_PAGE_SIZE, RANKING_RATIONALE_TOP, RANKING_RATIONALE_MAX_TOKENS,
+    MULTI_IMPROVE_MAX_TARGETS, UPLOAD_ASYNC, BATCH_MAX_FILES, BATCH_MAX_ARCHIVE_BYTES
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# In-memory session storage (use Redis in production)
-sessions: Dict[str, SessionState] = {}
-
 
-def get_session(session_id: str) -> SessionState:
+async def get_session(session_id: str) -> SessionState:
     """Get or create session."""
-    if session_id not in sessions:
-        sessions[session_id] = SessionState(session_id=session_id)
-    return sessions[session_id]
+    session = await session_store.get(session_id)
+    if session is None:
+        session = SessionState(session_id=session_id)
+        await session_store.save(session)
+    return session
+
+
+async def require_session(session_id: str) -> SessionState:
+    """Get an existing session or raise 404."""
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+def resume_structure(session: SessionState) -> StructuredResume:
+    """Section index for the session's resume, built on first use for older sessions."""
+    if session.resume_structure is None and session.resume_text:
+        session.resume_structure = sectionize(session.resume_text)
+    return session.resume_structure or StructuredResume()
+
+
+def chat_resume_text(session: SessionState, message: str) -> Optional[str]:
+    """Resume context for a chat turn: only the targeted sections when section focus is on."""
+    if CHAT_SECTION_FOCUS and session.resume_text:
+        focused = focused_resume_text(resume_structure(session), message)
+        if focused:
+            return focused
+    return session.resume_text
+
+
+async def admit(request: Request, session_id: Optional[str], *texts: Optional[str]) -> None:
+    """Rate-limit the caller and reserve the estimated tokens of one LLM call (429 when over limit)."""
+    await admission.admit(client_ip(request), session_id, estimate_request_tokens(*texts))
+
+
+def chat_admission_texts(session: SessionState, message: str) -> List[Optional[str]]:
+    """Texts a chat turn sends: pinned context, unsummarized history and the new message."""
+    texts = [session.resume_text, session.conversation_summary, message]
+    texts.extend(c.text for c in session.user_corrections)
+    texts.extend(m.content for m in session.conversation_history[session.summarized_through:])
+    return texts
+
+
+async def admit_chat(request: Request, session: SessionState, message: str) -> Optional[str]:
+    """Admit a chat turn; returns the speculated reply if `message` was pre-run (its tokens are already reserved).
+
+    Any other speculation for the session is cancelled.
+    """
+    await admission.check_rate(client_ip(request), session.session_id)
+    speculated = await speculative_chat.take(session.session_id, speculative_chat.state(session), message)
+    if speculated is None:
+        await admission.reserve(client_ip(request), estimate_request_tokens(*chat_admission_texts(session, message)))
+    return speculated
+
+
+def speculate(session: SessionState, suggestions: List[str]) -> None:
+    """Pre-run the likeliest suggestions with the inputs the session's next chat turn would send."""
+    # A turn that folds the history first would not match what was pre-run
+    if conversation_context.fold_due(session):
+        return
+    history = list(session.conversation_history.render(session.summarized_through))
+    corrections = list(session.user_corrections)
+    runs = []
+    for message in suggestions:
+        if detect_correction(message):
+            continue
+        call = partial(
+            resume_agent.chat, message, history, chat_resume_text(session, message), corrections,
+            session.conversation_summary, operation="chat_speculative"
+        )
+        runs.append((message, estimate_request_tokens(*chat_admission_texts(session, message)), call))
+    speculative_chat.start(session.session_id, speculative_chat.state(session), runs)
+
+
+async def replay(text: str) -> AsyncIterator[str]:
+    """A finished reply as a one-chunk stream."""
+    yield text
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
-@router.post("/upload", response_model=ResumeUploadResponse)
-async def upload_resume(file: UploadFile = File(...)):
-    """Upload and analyze a resume."""
+async def stream_tokens(
+    request: Request,
+    chunks: AsyncIterator[str],
+    on_complete,
+    start_data: Optional[dict] = None
+) -> AsyncIterator[str]:
+    """Relay LLM text chunks as SSE and hand the assembled text to on_complete.
+
+    A dict returned by on_complete is added to the "done" event. If the
+    client disconnects, the upstream LLM stream is closed and on_complete is
+    not called.
+    """
+    parts = []
     try:
-        # Read file content
-        content = await file.read()
+        if start_data is not None:
+            yield sse_event("start", start_data)
+        async for text in chunks:
+            if await request.is_disconnected():
+                logger.info("Client disconnected, cancelling LLM stream")
+                return
+            parts.append(text)
+            yield sse_event("token", {"text": text})
+        full_text = "".join(parts)
+        extra = await on_complete(full_text)
+        yield sse_event("done", {"length": len(full_text), **(extra or {})})
+    except LLMUnavailableError as e:
+        logger.error(f"Streaming error: {e}")
+        yield sse_event("error", {"detail": "The AI service is busy, please retry shortly", "retry_after": e.retry_after})
+    except Exception as e:
+        logger.error(f"Streaming error: {e}")
+        yield sse_event("error", {"detail": "Failed to get response"})
+    finally:
+        # Closes the underlying Anthropic stream (and its HTTP connection)
+        await chunks.aclose()
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-        # Parse resume
-        resume_text = parse_resume(content, file.filename or "resume.txt")
 
-        # Create new session
-        session_id = str(uuid.uuid4())
-        session = get_session(session_id)
-        session.resume_text = resume_text
+def prefers_async(request: Request) -> bool:
+    """Job mode: `Prefer: respond-async` (RFC 7240), or UPLOAD_ASYNC for every upload."""
+    return UPLOAD_ASYNC or "respond-async" in request.headers.get("prefer", "").lower()
 
-        # Get initial analysis
-        initial_analysis = resume_agent.analyze_resume(resume_text)
 
-        # Store analysis in conversation
-        session.conversation_history.append(
-            Message(role=MessageRole.ASSISTANT, content=initial_analysis)
-        )
+async def read_uploads(files: List[UploadFile]) -> List[Tuple[str, bytes]]:
+    """(filename, content) of a multi-file upload; an oversized resume becomes an empty item, failed per item."""
+    if len(files) > BATCH_MAX_FILES:
+        raise ValueError(f"Batch has {len(files)} files (limit {BATCH_MAX_FILES})")
+    uploads = []
+    for f in files:
+        filename = f.filename or "resume.txt"
+        if filename.lower().endswith(".zip"):
+            # Archive members are counted and size-checked by expand_uploads
+            uploads.append((filename, await read_upload(f, BATCH_MAX_ARCHIVE_BYTES)))
+            continue
+        try:
+            uploads.append((filename, await read_upload(f)))
+        except ValueError:
+            uploads.append((filename, b""))
+    return uploads
 
-        return ResumeUploadResponse(
-            session_id=session_id,
-            message="Resume uploaded and analyzed successfully",
-            resume_text=resume_text[:500] + "..." if len(resume_text) > 500 else resume_text,
-            initial_analysis=initial_analysis
-        )
+
+def job_view(job: UploadJob) -> dict:
+    # The session id is handed out in `result` once the session exists; before
+    # that, /api/chat would create an empty session under it
+    return job.model_dump(mode="json", exclude={"client", "session_id"})
+
+
+@router.post("/upload", response_model=ResumeUploadResponse, responses={202: {"model": JobAccepted}})
+async def upload_resume(request: Request, file: UploadFile = File(...)):
+    """Upload and analyze a resume.
+
+    In job mode the upload is queued and answered with 202 and a job to poll
+    (GET /api/jobs/{id}) or watch (/api/jobs/{id}/ws). An Idempotency-Key
+    header (or, without one, the same file) maps retries to the original job.
+    """
+    try:
+        await admission.check_rate(client_ip(request))
+
+        # Read file content (stops at MAX_UPLOAD_BYTES)
+        content = await read_upload(file)
+        filename = file.filename or "resume.txt"
+
+        if prefers_async(request):
+            job, _ = await upload_jobs.submit(filename, content, client_ip(request), request.headers.get("idempotency-key"))
+            status_url = f"/api/jobs/{job.job_id}"
+            accepted = JobAccepted(
+                job_id=job.job_id,
+                status=job.status,
+                status_url=status_url,
+                websocket_url=f"{status_url}/ws"
+            )
+            return JSONResponse(
+                status_code=202,
+                content=accepted.model_dump(mode="json"),
+                headers={"Location": status_url, "Preference-Applied": "respond-async"}
+            )
+
+        # Parse, analyze and create the session
+        return await analyze_upload(content, filename, client_ip(request))
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except (LLMUnavailableError, AdmissionRejected, ParserBusyError):
+        raise
     except Exception as e:
         logger.error(f"Upload error: {e}")
         raise HTTPException(status_code=500, detail="Failed to process resume")
 
 
-def detect_correction(message: str) -> bool:
-    """Detect if user message contains a correction."""
-    correction_indicators = [
-        "i did not", "i didn't", "that's wrong", "that's incorrect", "not correct",
-        "actually,", "correction:", "wrong", "incorrect", "i never", "not true",
-        "that's not right", "i don't have", "i haven't", "my actual", "the correct",
-        "should be", "is actually", "isn't right", "was not", "wasn't",
-        "i do not", "not accurate", "mistake", "error", "fix that"
-    ]
-    message_lower = message.lower()
-    return any(indicator in message_lower for indicator in correction_indicators)
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of an upload job; `result` holds the upload response once it is done."""
+    job = await upload_jobs.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    headers = {} if job.status in FINISHED else {"Retry-After": "1"}
+    return JSONResponse(content=job_view(job), headers=headers)
+
+
+@router.websocket("/jobs/{job_id}/ws")
+async def watch_job(websocket: WebSocket, job_id: str):
+    """Push the job on every status change, then close once it has finished."""
+    await websocket.accept()
+
+    async def push() -> None:
+        found = False
+        async for job in upload_jobs.watch(job_id):
+            found = True
+            await websocket.send_json(job_view(job))
+        if not found:
+            await websocket.send_json({"detail": "Job not found"})
+        await websocket.close()
+
+    async def until_disconnect() -> None:
+        # Clients send nothing; a queued job may not change for a long time, so
+        # without this a departed client would only be noticed on the next push
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    pushing, listening = asyncio.create_task(push()), asyncio.create_task(until_disconnect())
+    await asyncio.wait({pushing, listening}, return_when=asyncio.FIRST_COMPLETED)
+    for task in (pushing, listening):
+        task.cancel()
+    pushed, _ = await asyncio.gather(pushing, listening, return_exceptions=True)
+    if (listening.done() and not listening.cancelled()) or isinstance(pushed, WebSocketDisconnect):
+        logger.info(f"Job watcher for {job_id} disconnected")
+    elif isinstance(pushed, Exception):
+        raise pushed
+
+
+@router.post("/preview")
+async def preview_resume(file: UploadFile = File(...)):
+    """Extract just enough of a resume to show a preview, without analysis."""
+    try:
+        content = await read_upload(file)
+        # Lazy extraction: stops reading pages/blocks once the preview is filled
+        text = await parse_resume_async(content, file.filename or "resume.txt", max_chars=PREVIEW_CHARS + 1)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"resume_text": resume_preview(text)}
+
+
+@router.post("/upload/stream")
+async def upload_resume_stream(request: Request, file: UploadFile = File(...)):
+    """Upload a resume and stream its analysis as server-sent events."""
+    await admission.check_rate(client_ip(request))
+    try:
+        content = await read_upload(file)
+        resume_text = await parse_resume_async(content, file.filename or "resume.txt")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await admission.reserve(client_ip(request), estimate_request_tokens(resume_text))
+
+    session_id = str(uuid.uuid4())
+    session = SessionState(
+        session_id=session_id,
+        resume_text=resume_text,
+        resume_structure=sectionize(resume_text)
+    )
+    await session_store.save(session)
+
+    async def on_complete(initial_analysis: str):
+        session.conversation_history.append(
+            Message(role=MessageRole.ASSISTANT, content=initial_analysis)
+        )
+        await session_store.save(session)
+
+    return sse_response(stream_tokens(
+        request,
+        resume_agent.analyze_resume_stream(resume_text),
+        on_complete,
+        start_data={
+            "session_id": session_id,
+            "resume_text": resume_preview(resume_text)
+        }
+    ))
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Continue conversation with the resume agent."""
     try:
-        session = get_session(request.session_id)
+        session = await get_session(request.session_id)
+        # A clicked suggestion may already have been answered in the background
+        speculated = await admit_chat(http_request, session, request.message)
+
+        # File corrections in the ledger; they are re-sent with every turn
+        record_correction(session, request.message)
 
-        # Detect if this is a correction and store it
-        if detect_correction(request.message):
-            session.user_corrections.append(request.message)
-            logger.info(f"User correction detected: {request.message[:100]}...")
+        # Recent turns verbatim; older ones are folded into the session summary
+        history = await conversation_context.recent_history(session)
 
         # Add user message to history
         session.conversation_history.append(
             Message(role=MessageRole.USER, content=request.message)
         )
 
-        # Get agent response with corrections context
-        response = resume_agent.chat(
-            request.message,
-            session.conversation_history[:-1],  # Exclude the message we just added
-            session.resume_text,
-            session.user_corrections  # Pass user corrections for fact-checking
-        )
+        response = speculated
+        if response is None:
+            # Get agent response with corrections context
+            response = await resume_agent.chat(
+                request.message,
+                history,
+                chat_resume_text(session, request.message),
+                session.user_corrections,  # Pass user corrections for fact-checking
+                session.conversation_summary
+            )
 
         # Add assistant response to history
         session.conversation_history.append(
             Message(role=MessageRole.ASSISTANT, content=response)
         )
+        await session_store.save(session)
+
+        # Next actions, built locally; the likeliest is pre-run while the user reads
+        suggestions = suggest_followups(session)
+        speculate(session, suggestions)
 
         return ChatResponse(
             response=response,
-            session_id=request.session_id
+            session_id=request.session_id,
+            suggestions=suggestions
         )
 
+    except (LLMUnavailableError, AdmissionRejected):
+        raise
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail="Failed to get response")
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: Request, chat_request: ChatRequest):
+    """Continue conversation, streaming the reply as server-sent events."""
+    session = await get_session(chat_request.session_id)
+    speculated = await admit_chat(request, session, chat_request.message)
+
+    record_correction(session, chat_request.message)
+
+    history = await conversation_context.recent_history(session)
+
+    if speculated is not None:
+        chunks = replay(speculated)
+    else:
+        chunks = resume_agent.chat_stream(
+            chat_request.message,
+            history,
+            chat_resume_text(session, chat_request.message),
+            session.user_corrections,
+            session.conversation_summary
+        )
+
+    async def on_complete(response: str):
+        # Record the turn only once the reply is complete, so an abandoned
+        # stream leaves the history consistent
+        session.conversation_history.append(
+            Message(role=MessageRole.USER, content=chat_request.message)
+        )
+        session.conversation_history.append(
+            Message(role=MessageRole.ASSISTANT, content=response)
+        )
+        await session_store.save(session)
+
+        suggestions = suggest_followups(session)
+        speculate(session, suggestions)
+        return {"suggestions": suggestions}
+
+    return sse_response(stream_tokens(
+        request, chunks, on_complete, start_data={"session_id": chat_request.session_id}
+    ))
+
+
 @router.get("/session/{session_id}")
 async def get_session_info(session_id: str):
     """Get session information."""
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session = sessions[session_id]
+    session = await require_session(session_id)
     return {
         "session_id": session_id,
         "has_resume": session.resume_text is not None,
@@ -129,17 +435,46 @@ async def get_session_info(session_id: str):
     }
 
 
+@router.get("/session/{session_id}/analysis", response_model=ResumeAnalysis)
+async def get_session_analysis(session_id: str):
+    """Structured initial analysis of the session's resume."""
+    session = await require_session(session_id)
+    if session.resume_analysis is None:
+        raise HTTPException(status_code=404, detail="No structured analysis for this session")
+    return session.resume_analysis
+
+
+@router.post("/session/{session_id}/reupload", response_model=ReanalysisResponse)
+async def reupload_resume(session_id: str, request: Request, file: UploadFile = File(...)):
+    """Replace the session's resume with a revised version, keeping the conversation.
+
+    Only the changed sections are reviewed (against the previous scores) when
+    the edit is small; corrections about entries no longer in the resume are dropped.
+    """
+    session = await require_session(session_id)
+    try:
+        await admission.check_rate(client_ip(request))
+        content = await read_upload(file)
+        return await reanalyze_upload(session, content, file.filename or "resume.txt", client_ip(request))
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (LLMUnavailableError, AdmissionRejected, ParserBusyError):
+        raise
+    except Exception as e:
+        logger.error(f"Re-upload error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to process resume")
+
+
 @router.post("/improve")
-async def suggest_improvements(session_id: str, target_role: str, target_company: str = None):
+async def suggest_improvements(request: Request, session_id: str, target_role: str, target_company: str = None):
     """Get targeted improvement suggestions."""
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session = sessions[session_id]
+    session = await require_session(session_id)
     if not session.resume_text:
         raise HTTPException(status_code=400, detail="No resume uploaded for this session")
+    await admit(request, session_id, session.resume_text)
 
-    suggestions = resume_agent.suggest_improvements(
+    suggestions = await resume_agent.suggest_improvements(
         session.resume_text,
         target_role,
         target_company
@@ -148,9 +483,300 @@ async def suggest_improvements(session_id: str, target_role: str, target_company
     return {"suggestions": suggestions}
 
 
+@router.post("/improve/stream")
+async def suggest_improvements_stream(request: Request, session_id: str, target_role: str, target_company: str = None):
+    """Stream targeted improvement suggestions as server-sent events."""
+    session = await require_session(session_id)
+    if not session.resume_text:
+        raise HTTPException(status_code=400, detail="No resume uploaded for this session")
+    await admit(request, session_id, session.resume_text)
+
+    company_context = f" at {target_company}" if target_company else ""
+
+    async def on_complete(suggestions: str):
+        session.conversation_history.append(
+            Message(role=MessageRole.USER, content=f"Suggest improvements for a {target_role} position{company_context}.")
+        )
+        session.conversation_history.append(
+            Message(role=MessageRole.ASSISTANT, content=suggestions)
+        )
+        await session_store.save(session)
+
+    return sse_response(stream_tokens(
+        request,
+        resume_agent.suggest_improvements_stream(session.resume_text, target_role, target_company),
+        on_complete,
+        start_data={"session_id": session_id}
+    ))
+
+
+def improvement_targets(request: MultiImproveRequest) -> List[Tuple[str, Optional[str]]]:
+    """Distinct (role, company) pairs of a multi-role request."""
+    targets = list(dict.fromkeys(
+        (t.role.strip(), (t.company or "").strip() or None) for t in request.targets if t.role.strip()
+    ))
+    if not targets:
+        raise HTTPException(status_code=400, detail="At least one target role is required")
+    if len(targets) > MULTI_IMPROVE_MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"At most {MULTI_IMPROVE_MAX_TARGETS} target roles per request")
+    return targets
+
+
+def target_label(role: str, company: Optional[str]) -> str:
+    return f"{role} at {company}" if company else role
+
+
+def target_error(error: Exception) -> dict:
+    if isinstance(error, LLMUnavailableError):
+        return {"detail": "The AI service is busy, please retry shortly", "retry_after": error.retry_after}
+    return {"detail": "Failed to get suggestions"}
+
+
+async def record_multi_improvements(session: SessionState, targets: List[Tuple[str, Optional[str]]], results: dict) -> None:
+    """Add the completed suggestions of a multi-role request to the session history."""
+    if not results:
+        return
+    labels = [target_label(role, company) for role, company in targets]
+    session.conversation_history.append(
+        Message(role=MessageRole.USER, content=f"Suggest improvements for these positions: {'; '.join(labels)}.")
+    )
+    session.conversation_history.append(Message(
+        role=MessageRole.ASSISTANT,
+        content="\n\n".join(f"## {labels[index]}\n\n{text}" for index, text in sorted(results.items()))
+    ))
+    await session_store.save(session)
+
+
+@router.post("/improve/multi")
+async def suggest_improvements_multi(request: MultiImproveRequest, http_request: Request):
+    """Improvement suggestions for several target roles at once, run concurrently."""
+    session = await require_session(request.session_id)
+    if not session.resume_text:
+        raise HTTPException(status_code=400, detail="No resume uploaded for this session")
+    targets = improvement_targets(request)
+    await admission.admit(
+        client_ip(http_request), request.session_id, estimate_request_tokens(session.resume_text) * len(targets)
+    )
+
+    gaps = ats_scorer.gap_table(session.resume_text, [role for role, _ in targets])
+    results, errors = {}, {}
+    async for index, text, error in resume_agent.suggest_improvements_multi(session.resume_text, targets, gaps):
+        if error is not None:
+            logger.error(f"Multi-role improvement error ({targets[index][0]}): {error}")
+            errors[index] = target_error(error)
+        else:
+            results[index] = text
+    await record_multi_improvements(session, targets, results)
+
+    return {
+        "gaps": gaps,
+        "results": [
+            {"role": role, "company": company, "suggestions": results.get(i), "error": errors.get(i)}
+            for i, (role, company) in enumerate(targets)
+        ]
+    }
+
+
+@router.post("/improve/multi/stream")
+async def suggest_improvements_multi_stream(request: Request, multi_request: MultiImproveRequest):
+    """Multi-role improvement suggestions as server-sent events, one `result` event per role as it completes."""
+    session = await require_session(multi_request.session_id)
+    if not session.resume_text:
+        raise HTTPException(status_code=400, detail="No resume uploaded for this session")
+    targets = improvement_targets(multi_request)
+    await admission.admit(
+        client_ip(request), multi_request.session_id, estimate_request_tokens(session.resume_text) * len(targets)
+    )
+
+    gaps = ats_scorer.gap_table(session.resume_text, [role for role, _ in targets])
+
+    async def events() -> AsyncIterator[str]:
+        results = {}
+        outcomes = resume_agent.suggest_improvements_multi(session.resume_text, targets, gaps)
+        try:
+            yield sse_event("start", {"session_id": multi_request.session_id, "gaps": gaps.model_dump()})
+            async for index, text, error in outcomes:
+                role, company = targets[index]
+                if error is not None:
+                    logger.error(f"Multi-role improvement error ({role}): {error}")
+                    yield sse_event("error", {"index": index, "role": role, "company": company, **target_error(error)})
+                    continue
+                results[index] = text
+                yield sse_event("result", {"index": index, "role": role, "company": company, "suggestions": text})
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, cancelling remaining improvements")
+                    return
+            yield sse_event("done", {"completed": len(results), "failed": len(targets) - len(results)})
+        finally:
+            # Cancels calls still running after a disconnect
+            await outcomes.aclose()
+            await record_multi_improvements(session, targets, results)
+
+    return sse_response(events())
+
+
+@router.post("/ats-score")
+async def ats_score(request: ATSScoreRequest):
+    """Deterministic ATS keyword score against a role or a pasted job description."""
+    session = await require_session(request.session_id)
+    if not session.resume_text:
+        raise HTTPException(status_code=400, detail="No resume uploaded for this session")
+
+    try:
+        return ats_scorer.score(
+            session.resume_text,
+            target_role=request.target_role,
+            job_description=request.job_description,
+            structure=resume_structure(session)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/rewrite")
+async def rewrite_section(request: RewriteRequest, http_request: Request):
+    """Rewrite one resume section (or one entry of it), sending only that text to the LLM."""
+    session = await require_session(request.session_id)
+    if not session.resume_text:
+        raise HTTPException(status_code=400, detail="No resume uploaded for this session")
+
+    section = find_section(resume_structure(session), request.section)
+    if section is None:
+        raise HTTPException(status_code=404, detail=f"Section '{request.section}' not found in resume")
+    text = section.content
+    if request.entry_index is not None:
+        if not 0 <= request.entry_index < len(section.entries):
+            raise HTTPException(status_code=404, detail=f"Entry {request.entry_index} not found in {section.title}")
+        text = section.entries[request.entry_index].content
+    await admit(http_request, request.session_id, text, request.context)
+
+    try:
+        rewrite = await resume_agent.rewrite_section(text, section.title.lower(), request.context)
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Rewrite error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to rewrite section")
+
+    session.conversation_history.append(
+        Message(role=MessageRole.USER, content=f"Rewrite my {section.title.lower()} section.")
+    )
+    session.conversation_history.append(
+        Message(role=MessageRole.ASSISTANT, content=rewrite)
+    )
+    await session_store.save(session)
+
+    return {"section": section.kind, "title": section.title, "original": text, "rewrite": rewrite}
+
+
+@router.get("/session/{session_id}/sections")
+async def get_sections(session_id: str):
+    """Section index of the session's resume, with offsets into the resume text."""
+    session = await require_session(session_id)
+    return resume_structure(session)
+
+
 @router.delete("/session/{session_id}")
 async def delete_session(session_id: str):
     """Delete a session."""
-    if session_id in sessions:
-        del sessions[session_id]
+    speculative_chat.cancel(session_id)
+    await session_store.delete(session_id)
     return {"message": "Session deleted"}
+
+
+@router.post("/batch/analyze")
+async def batch_analyze(request: Request, files: List[UploadFile] = File(...), concurrency: int = BATCH_CONCURRENCY):
+    """Analyze many resumes (or zips of resumes), streaming one NDJSON line per result."""
+    # Items are paced by the client's BATCH_TOKENS_PER_MINUTE budget and then the global one
+    await admission.check_rate(client_ip(request))
+    try:
+        items = await asyncio.to_thread(expand_uploads, await read_uploads(files))
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def lines():
+        async for result in analyze_batch(items, concurrency=min(concurrency, BATCH_CONCURRENCY), client=client_ip(request)):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/rank/index")
+async def index_resumes_for_ranking(request: Request, files: List[UploadFile] = File(...)):
+    """Add resumes (or zips of resumes) to the ranking index."""
+    await admission.check_rate(client_ip(request))
+    try:
+        items = await asyncio.to_thread(expand_uploads, await read_uploads(files))
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await resume_ranker.index_files(items)
+    return {**result, "total": len(resume_ranker.index.documents)}
+
+
+@router.post("/rank/index/sessions")
+async def index_sessions_for_ranking(request: RankIndexRequest):
+    """Add the resumes of existing sessions to the ranking index."""
+    indexed = []
+    for session_id in request.session_ids:
+        session = await session_store.get(session_id)
+        if session is not None and session.resume_text:
+            resume_ranker.index.add(session_id, f"session {session_id}", session.resume_text)
+            indexed.append({"doc_id": session_id, "name": f"session {session_id}"})
+    return {"indexed": indexed, "total": len(resume_ranker.index.documents)}
+
+
+@router.delete("/rank/index/{doc_id}")
+async def remove_from_ranking_index(doc_id: str):
+    """Remove a resume from the ranking index."""
+    resume_ranker.index.remove(doc_id)
+    return {"message": "Removed from index", "total": len(resume_ranker.index.documents)}
+
+
+async def admit_rationales(request: Request, job_description: str, count: int) -> None:
+    """Admission for up to `count` rationale calls (a resume is about as long as the job description)."""
+    await admission.check_rate(client_ip(request))
+    if count > 0:
+        per_call = estimate_request_tokens(job_description, job_description, output_tokens=RANKING_RATIONALE_MAX_TOKENS)
+        await admission.reserve(client_ip(request), per_call * count)
+
+
+@router.post("/rank", response_model=RankingPage)
+async def rank_resumes(request: RankRequest, http_request: Request):
+    """Rank every indexed resume against a job description; the top candidates get an LLM rationale."""
+    try:
+        ranking = resume_ranker.rank(request.job_description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rationale_top = RANKING_RATIONALE_TOP if request.rationale_top is None else request.rationale_top
+    await admit_rationales(http_request, request.job_description, rationale_top)
+    await resume_ranker.explain_top(ranking, rationale_top)
+    return resume_ranker.page(ranking, 1, request.page_size or RANKING_PAGE_SIZE)
+
+
+@router.get("/rank/{ranking_id}", response_model=RankingPage)
+async def get_ranking_page(request: Request, ranking_id: str, page: int = 1, page_size: int = RANKING_PAGE_SIZE, rationale_top: int = RANKING_RATIONALE_TOP):
+    """A page of an earlier ranking, including resumes indexed since it was created."""
+    ranking = resume_ranker.get(ranking_id)
+    if ranking is None:
+        raise HTTPException(status_code=404, detail="Ranking not found")
+    if page < 1 or page_size < 1:
+        raise HTTPException(status_code=400, detail="page and page_size must be positive")
+
+    pending = sum(1 for doc_id, _ in ranking.top(rationale_top) if doc_id not in ranking.rationales)
+    await admit_rationales(request, ranking.query.job_description, pending)
+    await resume_ranker.explain_top(ranking, rationale_top)
+    return resume_ranker.page(ranking, page, page_size)
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Analysis cache hit/miss counters."""
+    return analysis_cache.snapshot()
+
+
+@router.get("/speculation/stats")
+async def speculation_stats():
+    """Speculative follow-up counters and hit rate."""
+    return speculative_chat.snapshot()
@@ -0,0 +1,126 @@
+"""
+Command-line tools.
+
+    python -m app.cli batch-analyze resumes/ more.zip one.pdf -o results.ndjson
+    python -m app.cli rank job.txt resumes/ --top 20 --rationale 5
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from typing import List, Tuple
+
+from app.core.config import BATCH_CONCURRENCY, BATCH_TOKENS_PER_MINUTE, RANKING_RATIONALE_TOP
+
+
+def collect_files(paths: List[str]) -> List[Tuple[str, bytes]]:
+    """Read files, walking directories for resumes and zip archives."""
+    from app.services.batch import RESUME_EXTENSIONS
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(RESUME_EXTENSIONS + ('.zip',)):
+                        files.append(os.path.join(root, name))
+        else:
+            files.append(path)
+
+    contents = []
+    for path in files:
+        with open(path, "rb") as f:
+            contents.append((path, f.read()))
+    return contents
+
+
+async def batch_analyze(args) -> int:
+    from app.services.batch import expand_uploads, analyze_batch
+    from app.services.resume_parser import start_parser_pool, shutdown_parser_pool
+
+    items = expand_uploads(collect_files(args.paths))
+    out = open(args.output, "w") if args.output else sys.stdout
+    failed = 0
+    await start_parser_pool()
+    try:
+        async for result in analyze_batch(
+            items,
+            concurrency=args.concurrency,
+            tokens_per_minute=args.tokens_per_minute,
+            create_sessions=False
+        ):
+            failed += result["status"] == "error"
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            progress = result["progress"]
+            print(
+                f"[{progress['completed']}/{progress['total']}] {result['status']:<5} {result['filename']}",
+                file=sys.stderr
+            )
+    finally:
+        shutdown_parser_pool()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+async def rank(args) -> int:
+    from app.services.batch import expand_uploads
+    from app.services.ranking import resume_ranker
+    from app.services.resume_parser import start_parser_pool, shutdown_parser_pool
+
+    with open(args.job_description) as f:
+        job_description = f.read()
+
+    await start_parser_pool()
+    try:
+        if args.paths:
+            result = await resume_ranker.index_files(expand_uploads(collect_files(args.paths)))
+            for error in result["errors"]:
+                print(f"skipped {error['name']}: {error['error']}", file=sys.stderr)
+        ranking = resume_ranker.rank(job_description)
+        await resume_ranker.explain_top(ranking, args.rationale)
+        page = resume_ranker.page(ranking, 1, args.top)
+    finally:
+        shutdown_parser_pool()
+        resume_ranker.index.close()
+
+    for result in page.results:
+        if args.json:
+            print(result.model_dump_json())
+            continue
+        print(f"{result.rank:>4}. {result.score:5.1f}  {result.name}")
+        print(f"        missing: {', '.join(result.missing) or '-'}")
+        if result.rationale:
+            print(f"        {result.rationale}")
+    print(f"{page.total} resumes ranked", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch-analyze", help="Analyze many resumes, writing NDJSON results")
+    batch.add_argument("paths", nargs="+", help="Resume files, zip archives or directories")
+    batch.add_argument("-o", "--output", help="Write NDJSON here instead of stdout")
+    batch.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    batch.add_argument("--tokens-per-minute", type=int, default=BATCH_TOKENS_PER_MINUTE)
+    batch.set_defaults(handler=batch_analyze)
+
+    ranker = commands.add_parser("rank", help="Rank resumes against a job description")
+    ranker.add_argument("job_description", help="Text file containing the job description")
+    ranker.add_argument("paths", nargs="*", help="Resume files, zip archives or directories to index first")
+    ranker.add_argument("--top", type=int, default=20, help="How many candidates to print")
+    ranker.add_argument("--rationale", type=int, default=RANKING_RATIONALE_TOP, help="LLM rationales for the top N")
+    ranker.add_argument("--json", action="store_true", help="Print one JSON object per candidate")
+    ranker.set_defaults(handler=rank)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ load_dotenv()
 
 # API Keys
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL") or None
 
 # Google Sheets
 GOOGLE_SHEETS_CREDENTIALS = os.getenv("GOOGLE_SHEETS_CREDENTIALS", "")
@@ -18,3 +19,162 @@ DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 # LLM Settings
 LLM_MODEL = "claude-sonnet-4-20250514"
 MAX_TOKENS = 4096
+
+# Tiered routing: light turns go to a smaller, faster model with a tighter
+# max_tokens. MODEL_ROUTING maps an operation (ResumeAgent method) to "light",
+# "heavy" (LLM_MODEL) or "auto" (light for short messages without a
+# rewrite/review intent); unlisted operations are heavy. Prices (USD per
+# million input,output tokens) feed the per-tier cost metric
+LLM_LIGHT_MODEL = os.getenv("LLM_LIGHT_MODEL", "claude-3-5-haiku-20241022")
+LIGHT_MAX_TOKENS = int(os.getenv("LIGHT_MAX_TOKENS", "1024"))
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "chat=auto,summarize_conversation=light,explain_fit=light")
+LIGHT_TURN_MAX_CHARS = int(os.getenv("LIGHT_TURN_MAX_CHARS", "200"))
+LLM_PRICE_PER_MTOK = os.getenv("LLM_PRICE_PER_MTOK", "3,15")
+LLM_LIGHT_PRICE_PER_MTOK = os.getenv("LLM_LIGHT_PRICE_PER_MTOK", "0.8,4")
+
+# LLM HTTP connection pool (shared by all async requests in a worker)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "500"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "100"))
+# Idle pooled connections are kept this long (httpx defaults to 5s)
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+
+# Startup: warm-up (parser imports and pool, LLM client and a pooled connection)
+# runs in the background and /health reports 503 until it is done. With
+# STARTUP_PROFILE, import times per module and warm-up phases are logged
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+# LLM call resilience: per-call deadline (including retries), jittered
+# exponential retry on 429/529/5xx, circuit breaker and in-flight cap
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "90"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+CIRCUIT_FAILURE_RATIO = float(os.getenv("CIRCUIT_FAILURE_RATIO", "0.5"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Prompt caching: mark the system prompt and per-session resume preamble as
+# cacheable prefixes so repeated calls are billed and processed as cache reads
+PROMPT_CACHING = os.getenv("PROMPT_CACHING", "true").lower() == "true"
+
+# Send only the resume sections a chat turn is about ("rewrite my summary").
+# Off by default with prompt caching, where the full resume is a cheap cache
+# read and swapping it per turn would invalidate the cached history prefix
+CHAT_SECTION_FOCUS = os.getenv("CHAT_SECTION_FOCUS", str(not PROMPT_CACHING)).lower() == "true"
+
+# Session storage: "memory" (per-process LRU + TTL) or "redis" (shared by all workers)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "86400"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+
+# Admission control in front of the LLM: per-session and per-IP request token
+# buckets, a global estimated (input + output) tokens-per-minute budget and a
+# bounded fair queue; over-limit requests get 429 with Retry-After. Limiter
+# state lives in LIMITER_BACKEND ("memory" or "redis", shared by all workers)
+LIMITER_BACKEND = os.getenv("LIMITER_BACKEND", SESSION_BACKEND).lower()
+SESSION_REQUESTS_PER_MINUTE = float(os.getenv("SESSION_REQUESTS_PER_MINUTE", "20"))
+SESSION_REQUESTS_BURST = float(os.getenv("SESSION_REQUESTS_BURST", "5"))
+IP_REQUESTS_PER_MINUTE = float(os.getenv("IP_REQUESTS_PER_MINUTE", "60"))
+IP_REQUESTS_BURST = float(os.getenv("IP_REQUESTS_BURST", "15"))
+ADMISSION_TOKENS_PER_MINUTE = int(os.getenv("ADMISSION_TOKENS_PER_MINUTE", "400000"))
+ADMISSION_QUEUE_MAX = int(os.getenv("ADMISSION_QUEUE_MAX", "200"))
+ADMISSION_QUEUE_PER_CLIENT = int(os.getenv("ADMISSION_QUEUE_PER_CLIENT", "4"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "20"))
+# Take the client IP from X-Forwarded-For (only behind a proxy that sets it)
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+# Upload jobs: with `Prefer: respond-async` (or UPLOAD_ASYNC=true) /api/upload
+# answers 202 with a job id and parsing + analysis run on JOB_WORKERS
+# in-process workers. With JOB_BACKEND=redis the queue is shared by all
+# processes, so workers can also run separately (python -m app.services.jobs,
+# with JOB_WORKERS=0 on the API). A repeated submission (same Idempotency-Key,
+# or the same file from the same client) within JOB_IDEMPOTENCY_TTL_SECONDS
+# returns the original job
+JOB_BACKEND = os.getenv("JOB_BACKEND", SESSION_BACKEND).lower()
+UPLOAD_ASYNC = os.getenv("UPLOAD_ASYNC", "false").lower() == "true"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "500"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_IDEMPOTENCY_TTL_SECONDS = int(os.getenv("JOB_IDEMPOTENCY_TTL_SECONDS", "600"))
+JOB_MAX_ENTRIES = int(os.getenv("JOB_MAX_ENTRIES", "10000"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+
+# Analysis cache: identical resumes (and resume/role/company tuples) reuse the
+# stored LLM output. Set ANALYSIS_CACHE_PATH to a sqlite file to keep entries
+# across restarts.
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "")
+ANALYSIS_CACHE_DISK_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_DISK_MAX_ENTRIES", "50000"))
+
+# Structured analysis: the initial review is requested as tool-use JSON,
+# validated into ResumeAnalysis, stored on the session and rendered locally
+STRUCTURED_ANALYSIS = os.getenv("STRUCTURED_ANALYSIS", "true").lower() == "true"
+
+# Re-upload to an existing session: the new resume is diffed against the old
+# one and, when the session has a structured analysis and at most
+# REANALYSIS_MAX_CHANGE of the text changed, only the changed lines and the
+# previous scores are sent for a delta review (a full analysis otherwise)
+REANALYSIS_MAX_CHANGE = float(os.getenv("REANALYSIS_MAX_CHANGE", "0.5"))
+REANALYSIS_MAX_TOKENS = int(os.getenv("REANALYSIS_MAX_TOKENS", "1500"))
+
+# Resume parsing: PDF/DOCX extraction runs in a pool of warm worker processes
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSER_MAX_PENDING = int(os.getenv("PARSER_MAX_PENDING", "32"))
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "20"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "20"))
+
+# Batch analysis: bounded LLM concurrency plus an estimated-tokens-per-minute budget
+# (per client IP across all of its batches, within the global admission budget)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_TOKENS_PER_MINUTE = int(os.getenv("BATCH_TOKENS_PER_MINUTE", "200000"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "1000"))
+# Zip uploads: size of the archive itself and of everything it expands to
+BATCH_MAX_ARCHIVE_BYTES = int(os.getenv("BATCH_MAX_ARCHIVE_BYTES", str(100 * 1024 * 1024)))
+BATCH_MAX_UNCOMPRESSED_BYTES = int(os.getenv("BATCH_MAX_UNCOMPRESSED_BYTES", str(500 * 1024 * 1024)))
+
+# Conversation context: recent turns are replayed verbatim, older turns are
+# folded into a running summary once enough of them accumulate
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "24000"))
+CONTEXT_RECENT_MESSAGES = int(os.getenv("CONTEXT_RECENT_MESSAGES", "8"))
+SUMMARY_REFRESH_MESSAGES = int(os.getenv("SUMMARY_REFRESH_MESSAGES", "6"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "800"))
+# Folded messages at least this long are kept zlib-compressed in memory
+HISTORY_COMPRESS_MIN_CHARS = int(os.getenv("HISTORY_COMPRESS_MIN_CHARS", "512"))
+
+# Follow-up suggestions: up to SUGGESTIONS_MAX next actions are built locally
+# from the sectionized resume and the analysis and returned with each chat
+# reply. The first SPECULATION_TOP are pre-run in the background, so clicking
+# one is served from the finished reply. Speculation only runs when its
+# estimated tokens fit SPECULATION_TOKENS_PER_MINUTE and the global admission
+# budget has room without queueing, and a session's speculation is cancelled
+# as soon as it sends anything else. 0 disables speculation
+SUGGESTIONS_MAX = int(os.getenv("SUGGESTIONS_MAX", "3"))
+SPECULATION_TOP = int(os.getenv("SPECULATION_TOP", "1"))
+SPECULATION_TOKENS_PER_MINUTE = int(os.getenv("SPECULATION_TOKENS_PER_MINUTE", "60000"))
+SPECULATION_MAX_CONCURRENT = int(os.getenv("SPECULATION_MAX_CONCURRENT", "8"))
+SPECULATION_TTL_SECONDS = int(os.getenv("SPECULATION_TTL_SECONDS", "600"))
+
+# Multi-role improvements: target roles per request, run concurrently
+MULTI_IMPROVE_MAX_TARGETS = int(os.getenv("MULTI_IMPROVE_MAX_TARGETS", "5"))
+
+# Correction ledger: one entry per corrected fact, capped so the chat preamble stays small
+CORRECTIONS_MAX_ENTRIES = int(os.getenv("CORRECTIONS_MAX_ENTRIES", "20"))
+CORRECTION_MAX_CHARS = int(os.getenv("CORRECTION_MAX_CHARS", "300"))
+
+# Resume ranking: an inverted index over indexed resumes scores every resume
+# against a job description locally; only the top candidates get an LLM rationale
+RANKING_INDEX_PATH = os.getenv("RANKING_INDEX_PATH", "")
+RANKING_RATIONALE_TOP = int(os.getenv("RANKING_RATIONALE_TOP", "5"))
+RANKING_RATIONALE_MAX_TOKENS = int(os.getenv("RANKING_RATIONALE_MAX_TOKENS", "300"))
+RANKING_PAGE_SIZE = int(os.getenv("RANKING_PAGE_SIZE", "20"))
+RANKING_MAX_RANKINGS = int(os.getenv("RANKING_MAX_RANKINGS", "100"))
+
+# Observability: OpenTelemetry spans are exported when an OTLP endpoint is set
+# (requires the optional opentelemetry-sdk and OTLP exporter packages)
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
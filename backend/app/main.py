@@ -1,9 +1,29 @@
+import time
+
+# Measured from here in STARTUP_PROFILE mode
+_import_started = time.perf_counter()
+
+import math
+import asyncio
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.config import APP_NAME, APP_VERSION, DEBUG
+from app.core.config import APP_NAME, APP_VERSION, DEBUG, STARTUP_WARMUP, STARTUP_PROFILE
 from app.api.routes import router
+from app.services.llm_service import close_clients
+from app.services.session_store import session_store
+from app.services.analysis_cache import analysis_cache
+from app.services.ranking import resume_ranker
+from app.services.resume_parser import shutdown_parser_pool, ParserBusyError
+from app.services.startup import warm_up, import_profile, format_import_profile
+from app.services.resilience import LLMUnavailableError
+from app.services.admission import admission, AdmissionRejected
+from app.services.jobs import upload_jobs
+from app.services.speculation import speculative_chat
+from app.services.metrics import MetricsMiddleware, render_metrics, METRICS_CONTENT_TYPE
 
 # Configure logging
 logging.basicConfig(
@@ -11,13 +31,52 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
+_imported = time.perf_counter()
+
+
+async def _warm_up(app: FastAPI) -> None:
+    timings = await warm_up()
+    app.state.ready = True
+    if STARTUP_PROFILE:
+        phases = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items())
+        logger.info(
+            f"Startup profile: app import {(_imported - _import_started) * 1000:.0f}ms, "
+            f"ready {(time.perf_counter() - _import_started) * 1000:.0f}ms after import started ({phases})"
+        )
+        rows = await asyncio.to_thread(import_profile)
+        logger.info("Slowest imports (cold, measured in a child process):\n" + format_import_profile(rows))
+    else:
+        logger.info(f"Warm-up finished in {sum(timings.values()):.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Without warm-up everything is created on first use and the app is ready at once
+    app.state.ready = not STARTUP_WARMUP
+    warmup = asyncio.create_task(_warm_up(app)) if STARTUP_WARMUP else None
+    upload_jobs.start()
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await upload_jobs.close()
+    await speculative_chat.close()
+    shutdown_parser_pool()
+    await close_clients()
+    await session_store.close()
+    analysis_cache.close()
+    resume_ranker.index.close()
+    await admission.close()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=APP_NAME,
     version=APP_VERSION,
-    description="AI-powered Resume Review Agent with 20 years of hiring expertise"
+    description="AI-powered Resume Review Agent with 20 years of hiring expertise",
+    lifespan=lifespan
 )
+# Not ready until the lifespan has run (servers or test clients without one)
+app.state.ready = False
 
 # CORS middleware - allow frontend domains
 allowed_origins = [
@@ -38,6 +97,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency includes CORS handling and the full streamed body
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    # Upstream overload or open circuit: tell clients when to come back
+    # instead of returning a generic 500
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The AI service is busy, please retry shortly"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
+@app.exception_handler(ParserBusyError)
+async def parser_busy_handler(request: Request, exc: ParserBusyError):
+    # Overload, not a bad file: the same upload succeeds once a slot frees up
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
 # Include routes
 app.include_router(router, prefix="/api")
 
@@ -49,19 +141,46 @@ async def root():
         "version": APP_VERSION,
         "status": "running",
         "endpoints": {
-            "upload": "POST /api/upload - Upload resume for analysis",
+            "upload": "POST /api/upload - Upload resume for analysis (202 + job with `Prefer: respond-async`)",
+            "upload_stream": "POST /api/upload/stream - Upload resume, stream analysis (SSE)",
+            "job": "GET /api/jobs/{id} - Upload job status and result (WebSocket: /api/jobs/{id}/ws)",
             "chat": "POST /api/chat - Chat with the resume agent",
+            "chat_stream": "POST /api/chat/stream - Chat, streaming the reply (SSE)",
             "improve": "POST /api/improve - Get targeted improvements",
-            "session": "GET /api/session/{id} - Get session info"
+            "improve_stream": "POST /api/improve/stream - Stream targeted improvements (SSE)",
+            "improve_multi": "POST /api/improve/multi - Improvements for several target roles, run concurrently",
+            "improve_multi_stream": "POST /api/improve/multi/stream - Multi-role improvements, one SSE event per role",
+            "ats_score": "POST /api/ats-score - Local ATS keyword score for a role or job description",
+            "rewrite": "POST /api/rewrite - Rewrite one resume section or entry",
+            "session": "GET /api/session/{id} - Get session info",
+            "sections": "GET /api/session/{id}/sections - Resume section index with offsets",
+            "analysis": "GET /api/session/{id}/analysis - Structured initial analysis (scores, strengths, section feedback)",
+            "reupload": "POST /api/session/{id}/reupload - Re-upload a revised resume; reviews only what changed",
+            "batch_analyze": "POST /api/batch/analyze - Analyze many resumes or a zip (NDJSON)",
+            "rank_index": "POST /api/rank/index - Add resumes (or a zip) to the ranking index",
+            "rank": "POST /api/rank - Rank indexed resumes against a job description",
+            "rank_page": "GET /api/rank/{id}?page= - Page through a ranking (includes newly indexed resumes)",
+            "cache_stats": "GET /api/cache/stats - Analysis cache hit/miss counters",
+            "speculation_stats": "GET /api/speculation/stats - Speculative follow-up hit rate",
+            "metrics": "GET /metrics - Prometheus metrics"
         }
     }
 
 
 @app.get("/health")
 async def health():
+    """Readiness: 503 until the startup warm-up has finished."""
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"}, headers={"Retry-After": "1"})
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(await render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+import zlib
+from array import array
+from pydantic import BaseModel, Field, field_validator
+from pydantic_core import core_schema
+from typing import Optional, List, Dict, Any, Iterator, Union
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 class MessageRole(str, Enum):
@@ -16,6 +19,139 @@ class Message(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+_ROLES = tuple(MessageRole)
+_ROLE_CODES = {role: code for code, role in enumerate(_ROLES)}
+
+
+class HistoryEntry:
+    """Read-only view of one message stored in a ConversationHistory."""
+
+    __slots__ = ("_history", "_index")
+
+    def __init__(self, history: "ConversationHistory", index: int):
+        self._history = history
+        self._index = index
+
+    @property
+    def role(self) -> MessageRole:
+        return _ROLES[self._history._roles[self._index]]
+
+    @property
+    def content(self) -> str:
+        return self._history.content(self._index)
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self._history._timestamps[self._index], timezone.utc).replace(tzinfo=None)
+
+    def to_message(self) -> Message:
+        return Message(role=self.role, content=self.content, timestamp=self.timestamp)
+
+
+class ConversationHistory:
+    """Array-backed message list: one role byte and one float timestamp per message.
+
+    Replaces a list of Message models (each with its own field dict, fields-set
+    and datetime). Indexing yields HistoryEntry views, so code reading
+    `.role` / `.content` is unchanged. Messages already folded into the summary
+    can be zlib-compressed with `compress_before`, and `render` keeps the
+    Messages API dicts of the live window so a turn only renders new messages.
+    Serializes as a list of Message.
+    """
+
+    def __init__(self, messages=()):
+        self._roles = bytearray()
+        self._timestamps = array("d")
+        self._contents: List[Union[str, bytes]] = []  # bytes: zlib-compressed UTF-8
+        self._compressed_through = 0
+        self._rendered: List[Dict[str, Any]] = []
+        self._rendered_start = 0
+        for message in messages:
+            self.append(message)
+
+    def append(self, message: Union[Message, HistoryEntry]) -> None:
+        timestamp = message.timestamp.replace(tzinfo=timezone.utc).timestamp()
+        self._roles.append(_ROLE_CODES[MessageRole(message.role)])
+        self._timestamps.append(timestamp)
+        self._contents.append(message.content)
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+    def content(self, index: int) -> str:
+        content = self._contents[index]
+        return zlib.decompress(content).decode() if isinstance(content, bytes) else content
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [HistoryEntry(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return HistoryEntry(self, index)
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return (HistoryEntry(self, i) for i in range(len(self)))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ConversationHistory, list)):
+            return len(self) == len(other) and all(
+                a.role == b.role and a.content == b.content for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    def to_messages(self) -> List[Message]:
+        return [entry.to_message() for entry in self]
+
+    def compress_before(self, end: int, min_chars: int = 512) -> int:
+        """zlib-compress messages before `end` that are at least `min_chars` long; returns bytes saved."""
+        saved = 0
+        for i in range(self._compressed_through, min(end, len(self))):
+            content = self._contents[i]
+            if isinstance(content, str) and len(content) >= min_chars:
+                packed = zlib.compress(content.encode())
+                if len(packed) < len(content):
+                    self._contents[i] = packed
+                    saved += len(content) - len(packed)
+        self._compressed_through = max(self._compressed_through, min(end, len(self)))
+        return saved
+
+    def render(self, start: int = 0) -> List[Dict[str, Any]]:
+        """Messages API dicts for messages from `start` on.
+
+        The list is kept between calls and extended with new messages only;
+        callers must not mutate it.
+        """
+        end = self._rendered_start + len(self._rendered)
+        if start != self._rendered_start:
+            if self._rendered_start < start <= end:
+                del self._rendered[:start - self._rendered_start]
+            else:
+                self._rendered = []
+            self._rendered_start = start
+        for i in range(self._rendered_start + len(self._rendered), len(self)):
+            self._rendered.append({"role": _ROLES[self._roles[i]].value, "content": self.content(i)})
+        return self._rendered
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        messages_schema = handler.generate_schema(List[Message])
+        return core_schema.union_schema(
+            [
+                core_schema.is_instance_schema(cls),
+                core_schema.no_info_after_validator_function(cls, messages_schema),
+            ],
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda history: history.to_messages(), return_schema=messages_schema
+            )
+        )
+
+
 class ChatRequest(BaseModel):
     message: str
     session_id: str
@@ -27,13 +163,6 @@ class ChatResponse(BaseModel):
     suggestions: Optional[List[str]] = None
 
 
-class ResumeUploadResponse(BaseModel):
-    session_id: str
-    message: str
-    resume_text: str
-    initial_analysis: str
-
-
 class ResumeSection(BaseModel):
     name: str
     content: str
@@ -41,21 +170,235 @@ class ResumeSection(BaseModel):
     suggestions: List[str] = []
 
 
+class SectionReview(BaseModel):
+    """A section's score and suggestions as the analysis tools return them."""
+    name: str
+    score: Optional[int] = None
+    suggestions: List[str] = []
+
+
+class BulletRewrite(BaseModel):
+    before: str
+    after: str
+    why: str = ""
+
+
 class ResumeAnalysis(BaseModel):
-    overall_score: int
-    ats_score: int
+    overall_score: int  # 1-10
+    ats_score: int  # local keyword score, 0-100
     sections: List[ResumeSection]
     strengths: List[str]
     improvements: List[str]
     industry_fit: str
     target_companies: List[str]
+    summary: str = ""  # justification of the overall score
+    ats_notes: str = ""  # what drives the ATS score
+    bullet_rewrite: Optional[BulletRewrite] = None
+
+
+class DeltaReview(BaseModel):
+    """Tool input of a delta review of a revised resume."""
+    overall_score: int
+    summary: str
+    improvements: List[str] = []
+    sections: List[SectionReview] = []
+    bullet_rewrite: Optional[BulletRewrite] = None
+
+
+class ResumeUploadResponse(BaseModel):
+    session_id: str
+    message: str
+    resume_text: str
+    initial_analysis: str
+    analysis: Optional[ResumeAnalysis] = None  # structured form of initial_analysis, when available
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class UploadJob(BaseModel):
+    """A resume upload analyzed in the background; `result` is the upload response once done."""
+    job_id: str
+    session_id: str  # assigned at submission; only exposed (in `result`) once the session exists
+    filename: str
+    client: str = ""  # client IP, for admission control
+    status: JobStatus = JobStatus.QUEUED
+    result: Optional[ResumeUploadResponse] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None  # HTTP status the synchronous upload would have returned
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobStatus
+    status_url: str
+    websocket_url: str
+
+
+class ResumeEntry(BaseModel):
+    """One experience/education item; offsets index into SessionState.resume_text."""
+    heading: str
+    content: str
+    start: int
+    end: int
+
+
+class ParsedSection(BaseModel):
+    """A resume section located by the deterministic sectionizer."""
+    kind: str  # contact, summary, experience, education, skills, projects, certifications, other
+    title: str
+    content: str
+    start: int
+    end: int
+    entries: List[ResumeEntry] = []
+
+
+class StructuredResume(BaseModel):
+    sections: List[ParsedSection] = []
+
+    def find(self, kind: str) -> Optional[ParsedSection]:
+        return next((section for section in self.sections if section.kind == kind), None)
+
+
+class SectionChange(BaseModel):
+    """How one section differs between the previous and the re-uploaded resume."""
+    name: str
+    kind: str
+    status: str  # changed, added, removed
+    entries: List[str] = []  # headings of the experience/education entries touched
+    diff: List[str] = []  # "- old line" / "+ new line"
+
+
+class ResumeDiff(BaseModel):
+    changes: List[SectionChange] = []
+    unchanged: List[str] = []  # names of sections that did not change
+    changed_chars: int = 0  # characters on changed lines, old and new
+    total_chars: int = 0  # characters in the new resume
+
+    @property
+    def changed_ratio(self) -> float:
+        return self.changed_chars / max(self.total_chars, 1)
+
+
+class RewriteRequest(BaseModel):
+    session_id: str
+    section: str  # section kind (e.g. "summary", "experience") or its title
+    entry_index: Optional[int] = None  # rewrite a single experience/education entry
+    context: str = ""
+
+
+class ATSSectionScore(BaseModel):
+    kind: str
+    title: str
+    score: int  # share of the target keyword weight matched in this section
+    matched: List[str] = []
+
+
+class ATSScore(BaseModel):
+    score: int  # 0-100 weighted keyword coverage
+    target: str  # taxonomy role or "job description"
+    matched: List[str] = []
+    missing: List[str] = []
+    sections: List[ATSSectionScore] = []
+
+
+class ATSScoreRequest(BaseModel):
+    session_id: str
+    target_role: Optional[str] = None
+    job_description: Optional[str] = None
+
+
+class KeywordGapRow(BaseModel):
+    keyword: str
+    present: bool
+    roles: List[str] = []  # taxonomy roles that ask for the keyword
+
+
+class KeywordGapTable(BaseModel):
+    scores: Dict[str, int] = {}  # taxonomy role -> ATS score
+    rows: List[KeywordGapRow] = []  # missing keywords first, most requested first
+    unknown_roles: List[str] = []  # targets outside the keyword taxonomy
+
+
+class ImprovementTarget(BaseModel):
+    role: str
+    company: Optional[str] = None
+
+
+class MultiImproveRequest(BaseModel):
+    session_id: str
+    targets: List[ImprovementTarget]
+
+
+class RankRequest(BaseModel):
+    job_description: str
+    page_size: Optional[int] = None
+    rationale_top: Optional[int] = None  # LLM rationales for this many top candidates
+
+
+class RankIndexRequest(BaseModel):
+    session_ids: List[str]
+
+
+class RankedResume(BaseModel):
+    rank: int
+    doc_id: str
+    name: str
+    score: float  # 0-100 fit against the job description
+    matched: List[str] = []
+    missing: List[str] = []
+    rationale: Optional[str] = None
+
+
+class RankingPage(BaseModel):
+    ranking_id: str
+    total: int
+    page: int
+    page_size: int
+    results: List[RankedResume]
+
+
+class Correction(BaseModel):
+    """A user-stated fact that overrides the resume; one per (field, entity)."""
+    field: str  # company, title, school, degree, date, location, metric, skill, other
+    entity: str = ""  # resume entry the correction is about, if identified
+    text: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ReanalysisResponse(BaseModel):
+    session_id: str
+    message: str
+    mode: str  # incremental (delta review), full (re-analysis) or unchanged (no LLM call)
+    resume_text: str
+    review: str
+    analysis: Optional[ResumeAnalysis] = None
+    changes: List[SectionChange] = []
+    corrections_kept: int = 0
+    corrections_dropped: List[Correction] = []  # about entries no longer in the resume
 
 
 class SessionState(BaseModel):
     session_id: str
     resume_text: Optional[str] = None
     resume_analysis: Optional[ResumeAnalysis] = None
-    conversation_history: List[Message] = []
+    resume_structure: Optional[StructuredResume] = None
+    conversation_history: ConversationHistory = Field(default_factory=ConversationHistory)
     user_info: Dict[str, Any] = {}
-    user_corrections: List[str] = []  # Track user corrections to prevent hallucinations
+    user_corrections: List[Correction] = []  # Correction ledger, re-sent with every chat turn
+    conversation_summary: Optional[str] = None  # Running summary of turns folded out of the context
+    summarized_through: int = 0  # conversation_history[:summarized_through] is covered by the summary
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @field_validator("user_corrections", mode="before")
+    @classmethod
+    def _upgrade_corrections(cls, value):
+        # Sessions stored before the ledger kept raw correction messages
+        return [{"field": "other", "text": item} if isinstance(item, str) else item for item in value or []]
@@ -0,0 +1,329 @@
+"""
+Admission control in front of the LLM-backed endpoints.
+
+Each request first passes per-IP and per-session request token buckets, then
+reserves its estimated input + output tokens from a global tokens-per-minute
+budget. When the budget is exhausted, requests wait in a bounded queue that
+serves clients round-robin, so one busy client cannot starve the others. A
+full queue, or a wait longer than ADMISSION_MAX_WAIT_SECONDS, is rejected
+with AdmissionRejected (HTTP 429 with Retry-After) instead of queueing forever.
+
+Bucket state lives in a LimiterBackend: in-process, or a Redis-protocol server
+so that every uvicorn worker draws from the same limits.
+"""
+
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.config import (
+    LIMITER_BACKEND, REDIS_URL, MAX_TOKENS, TRUST_FORWARDED_FOR,
+    SESSION_REQUESTS_PER_MINUTE, SESSION_REQUESTS_BURST, IP_REQUESTS_PER_MINUTE, IP_REQUESTS_BURST,
+    ADMISSION_TOKENS_PER_MINUTE, ADMISSION_QUEUE_MAX, ADMISSION_QUEUE_PER_CLIENT, ADMISSION_MAX_WAIT_SECONDS
+)
+from app.services.llm_service import estimate_tokens
+from app.services.resume_agent import EXPERT_SYSTEM_PROMPT
+from app.services.metrics import ADMISSION_REQUESTS, ADMISSION_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# Budget reserved per call for the reply; real replies are usually shorter
+EXPECTED_OUTPUT_TOKENS = MAX_TOKENS // 2
+SYSTEM_PROMPT_TOKENS = estimate_tokens(EXPERT_SYSTEM_PROMPT)
+
+GLOBAL_TOKENS_KEY = "tokens:global"
+
+
+class AdmissionRejected(Exception):
+    """A request is over a rate limit or the admission queue is full; retry later."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_request_tokens(*texts: Optional[str], output_tokens: int = EXPECTED_OUTPUT_TOKENS) -> int:
+    """Estimated input + output tokens of one LLM call carrying the system prompt and `texts`."""
+    return SYSTEM_PROMPT_TOKENS + sum(estimate_tokens(t) for t in texts if t) + output_tokens
+
+
+def client_ip(request) -> str:
+    """Client address used for per-IP limits."""
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # The right-most entry is the one our proxy appended; earlier ones are client-supplied
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class LimiterBackend(ABC):
+    """Storage for token buckets shared by the admission controller."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, capacity: float, amount: float = 1.0) -> float:
+        """Take `amount` tokens from bucket `key` and return 0, or take nothing and
+        return the seconds until `amount` tokens will be available.
+
+        The bucket refills at `rate` tokens per second up to `capacity` and
+        starts full.
+        """
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class InMemoryLimiterBackend(LimiterBackend):
+    """Process-local buckets; limits are per worker."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated, time at which the bucket is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    async def take(self, key: str, rate: float, capacity: float, amount: float = 1.0) -> float:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * rate)
+        wait = 0.0
+        if tokens >= amount:
+            tokens -= amount
+        else:
+            wait = (amount - tokens) / rate
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        if len(self._buckets) > self.max_keys:
+            self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        # A full bucket is indistinguishable from a missing one
+        for key in [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+
+# Atomic refill-and-take; server time keeps all workers on one clock.
+# Returns the wait as a string (Lua numbers become integers in replies)
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= amount then
+    tokens = tokens - amount
+else
+    wait = (amount - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisLimiterBackend(LimiterBackend):
+    """Redis-protocol buckets (hashes updated by a Lua script), shared by all workers."""
+
+    key_prefix = "limit:"
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisLimiterBackend":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url))
+
+    async def take(self, key: str, rate: float, capacity: float, amount: float = 1.0) -> float:
+        wait = await self._script(keys=[f"{self.key_prefix}{key}"], args=[rate, capacity, amount])
+        return float(wait)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class _Waiter:
+    __slots__ = ("amount", "future")
+
+    def __init__(self, amount: float, future: asyncio.Future):
+        self.amount = amount
+        self.future = future
+
+
+class AdmissionController:
+    """Request-rate limits per IP and session plus a fair, bounded queue for the token budget.
+
+    A limit of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        backend: LimiterBackend,
+        session_per_minute: float = SESSION_REQUESTS_PER_MINUTE,
+        session_burst: float = SESSION_REQUESTS_BURST,
+        ip_per_minute: float = IP_REQUESTS_PER_MINUTE,
+        ip_burst: float = IP_REQUESTS_BURST,
+        tokens_per_minute: float = ADMISSION_TOKENS_PER_MINUTE,
+        queue_max: int = ADMISSION_QUEUE_MAX,
+        queue_per_client: int = ADMISSION_QUEUE_PER_CLIENT,
+        max_wait: float = ADMISSION_MAX_WAIT_SECONDS
+    ):
+        self.backend = backend
+        self.session_rate, self.session_burst = session_per_minute / 60.0, session_burst
+        self.ip_rate, self.ip_burst = ip_per_minute / 60.0, ip_burst
+        self.token_rate, self.token_capacity = tokens_per_minute / 60.0, tokens_per_minute
+        self.queue_max = queue_max
+        self.queue_per_client = queue_per_client
+        self.max_wait = max_wait
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        self._queued_tokens = 0.0
+        self._drain_task: Optional[asyncio.Task] = None
+
+    async def _take(self, key: str, rate: float, capacity: float, amount: float = 1.0) -> float:
+        try:
+            return await self.backend.take(key, rate, capacity, amount)
+        except Exception as e:
+            # Fail open: a limiter outage should not take the API down with it
+            logger.error(f"Limiter backend error: {e}")
+            return 0.0
+
+    async def check_rate(self, ip: str, session_id: Optional[str] = None) -> None:
+        """Count one request against the IP and session buckets."""
+        limits = [(f"ip:{ip}", self.ip_rate, self.ip_burst)]
+        if session_id:
+            limits.append((f"session:{session_id}", self.session_rate, self.session_burst))
+        for key, rate, burst in limits:
+            if rate <= 0:
+                continue
+            wait = await self._take(key, rate, burst)
+            if wait > 0:
+                ADMISSION_REQUESTS.labels("rate_limited").inc()
+                raise AdmissionRejected(f"Too many requests for this {key.split(':', 1)[0]}", retry_after=wait)
+
+    async def reserve(self, client: str, tokens: float) -> None:
+        """Reserve `tokens` from the global budget, waiting in the fair queue if needed."""
+        if self.token_rate <= 0:
+            ADMISSION_REQUESTS.labels("admitted").inc()
+            return
+        # A request bigger than the bucket would wait forever; let it drain it
+        amount = min(tokens, self.token_capacity)
+
+        if not self._queues:
+            wait = await self._take(GLOBAL_TOKENS_KEY, self.token_rate, self.token_capacity, amount)
+            if wait == 0:
+                ADMISSION_REQUESTS.labels("admitted").inc()
+                return
+        else:
+            # Everyone queued ahead drains first
+            wait = (self._queued_tokens + amount) / self.token_rate
+
+        queue = self._queues.get(client)
+        if self._queued >= self.queue_max or (queue and len(queue) >= self.queue_per_client) or wait > self.max_wait:
+            ADMISSION_REQUESTS.labels("queue_full").inc()
+            raise AdmissionRejected("Server is at capacity, please retry shortly", retry_after=wait)
+
+        waiter = _Waiter(amount, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(client, deque()).append(waiter)
+        self._queued += 1
+        self._queued_tokens += amount
+        ADMISSION_QUEUE_DEPTH.inc()
+        ADMISSION_REQUESTS.labels("queued").inc()
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+
+        try:
+            await asyncio.wait_for(waiter.future, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            ADMISSION_REQUESTS.labels("queue_timeout").inc()
+            raise AdmissionRejected("Server is at capacity, please retry shortly", retry_after=self._queued_tokens / self.token_rate)
+        ADMISSION_REQUESTS.labels("admitted").inc()
+
+    async def try_reserve(self, tokens: float) -> bool:
+        """Reserve `tokens` only if the budget has them now and nobody is queued; never waits.
+
+        For optional work (speculation) that must not delay real requests.
+        """
+        if self.token_rate <= 0:
+            return True
+        if self._queues:
+            return False
+        return await self._take(GLOBAL_TOKENS_KEY, self.token_rate, self.token_capacity, min(tokens, self.token_capacity)) == 0
+
+    async def reserve_background(self, client: str, tokens: float, per_minute: float) -> None:
+        """Reserve `tokens` for background work (batch analysis), waiting rather than being rejected.
+
+        Draws first from the client's `batch:` bucket of `per_minute` tokens,
+        shared by all of its batches (and workers, with the Redis backend), then
+        from the global budget only while no interactive request is queued for it.
+        """
+        buckets = []
+        if per_minute > 0:
+            buckets.append((f"batch:{client}", per_minute / 60.0, per_minute))
+        if self.token_rate > 0:
+            buckets.append((GLOBAL_TOKENS_KEY, self.token_rate, self.token_capacity))
+        for key, rate, capacity in buckets:
+            while True:
+                if key == GLOBAL_TOKENS_KEY and self._queues:
+                    # Interactive requests waiting in the fair queue go first
+                    wait = self._queued_tokens / self.token_rate
+                else:
+                    wait = await self._take(key, rate, capacity, min(tokens, capacity))
+                if wait == 0:
+                    break
+                # Capped so budget freed by other workers is noticed promptly
+                await asyncio.sleep(min(wait, 1.0))
+        ADMISSION_REQUESTS.labels("admitted").inc()
+
+    async def _drain(self) -> None:
+        """Serve queued waiters one client at a time, round-robin."""
+        while self._queues:
+            client, waiters = next(iter(self._queues.items()))
+            waiter = waiters[0]
+            # Timed-out or disconnected waiters are already done and just leave the queue
+            if not waiter.future.done():
+                wait = await self._take(GLOBAL_TOKENS_KEY, self.token_rate, self.token_capacity, waiter.amount)
+                if wait > 0:
+                    # Capped so budget freed by other workers is noticed promptly
+                    await asyncio.sleep(min(wait, 1.0))
+                    continue
+                if not waiter.future.done():
+                    waiter.future.set_result(None)
+            waiters.popleft()
+            self._queued -= 1
+            self._queued_tokens -= waiter.amount
+            ADMISSION_QUEUE_DEPTH.dec()
+            if waiters:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+
+    async def admit(self, ip: str, session_id: Optional[str], tokens: float) -> None:
+        """Rate-limit one request and reserve its estimated tokens."""
+        await self.check_rate(ip, session_id)
+        await self.reserve(ip, tokens)
+
+    async def close(self) -> None:
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+        await self.backend.close()
+
+
+def create_limiter_backend() -> LimiterBackend:
+    """Build the backend selected by LIMITER_BACKEND."""
+    if LIMITER_BACKEND == "redis":
+        logger.info("Using Redis limiter backend")
+        return RedisLimiterBackend.from_url(REDIS_URL)
+    return InMemoryLimiterBackend()
+
+
+# Singleton instance
+admission = AdmissionController(create_limiter_backend())
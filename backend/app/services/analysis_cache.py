@@ -0,0 +1,143 @@
+"""
+Content-addressed cache of LLM analyses.
+
+Entries are keyed by a hash of the normalized resume text, the model, the
+prompt version and any request parameters (target role, company), so a
+re-uploaded resume or a repeated improvement request is answered without an
+LLM call. A bounded in-memory LRU sits in front of an optional sqlite tier
+that survives restarts.
+"""
+
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import (
+    LLM_MODEL, ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_DISK_MAX_ENTRIES
+)
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a key."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(kind: str, resume_text: str, prompt_version: str, *params: Optional[str], model: str = LLM_MODEL) -> str:
+    """Hash of everything that determines the LLM output."""
+    digest = hashlib.sha256()
+    for part in (kind, model, prompt_version, normalize_text(resume_text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    for param in params:
+        digest.update(normalize_text(param or "").lower().encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SqliteTier:
+    """Disk tier; least-recently-read rows are dropped past max_entries."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                "SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AnalysisCache:
+    """Two-tier (memory LRU, optional sqlite) cache with hit/miss counters."""
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES, disk: Optional[SqliteTier] = None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+        if self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, value)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters plus current size, for monitoring."""
+        return {**self.stats, "entries": len(self._entries)}
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+def create_analysis_cache() -> AnalysisCache:
+    disk = None
+    if ANALYSIS_CACHE_PATH:
+        logger.info(f"Analysis cache persisted to {ANALYSIS_CACHE_PATH}")
+        disk = SqliteTier(ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_DISK_MAX_ENTRIES)
+    return AnalysisCache(disk=disk)
+
+
+# Singleton instance
+analysis_cache = create_analysis_cache()
@@ -0,0 +1,329 @@
+"""
+Deterministic ATS keyword scoring.
+
+Resumes are matched against a role keyword taxonomy or the keywords found in
+a pasted job description using one precompiled Aho-Corasick automaton over the
+whole vocabulary, so a score takes a single pass over the text (milliseconds)
+and is reproducible. The LLM is given the result to explain rather than being
+asked to invent a score.
+"""
+
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.models.schemas import StructuredResume, ATSScore, ATSSectionScore, KeywordGapTable, KeywordGapRow
+from app.services.sectionizer import sectionize
+
+# Canonical keyword -> alternative spellings. Every keyword used in
+# ROLE_KEYWORDS must appear here; plurals of alphabetic terms are added
+# automatically
+KEYWORD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    # Languages
+    "python": (), "sql": (), "java": (), "scala": (), "golang": (), "rust": (), "c++": ("cpp",),
+    "c#": (), "javascript": ("js",), "typescript": (), "bash": ("shell scripting",), "r programming": ("rstudio",),
+    # Data and ML
+    "machine learning": ("ml",), "deep learning": (), "statistics": ("statistical",),
+    "a/b testing": ("a/b test", "ab testing", "a/b/n", "split testing"), "experimentation": ("experiment",),
+    "causal inference": ("difference-in-differences", "synthetic control", "quasi-experimental"),
+    "regression": (), "forecasting": ("time series",), "natural language processing": ("nlp",),
+    "large language models": ("llm", "llms", "generative ai", "genai"), "computer vision": (),
+    "pytorch": (), "tensorflow": (), "scikit-learn": ("sklearn",), "pandas": (), "numpy": (),
+    "feature engineering": (), "model deployment": ("mlops", "model serving"), "recommendation systems": ("recommender", "recommendation models"),
+    "data visualization": ("dashboard",), "tableau": (), "power bi": (), "looker": (),
+    "excel": (),
+    # Data engineering
+    "etl": ("elt", "data pipeline", "data pipelines"), "spark": ("pyspark", "apache spark"), "airflow": (),
+    "kafka": (), "dbt": (), "bigquery": (), "snowflake": (), "redshift": (), "databricks": (),
+    "data modeling": ("data modelling", "dimensional modeling"), "data warehouse": ("data warehousing",),
+    "streaming": ("real-time",),
+    # Software engineering and infrastructure
+    "rest api": ("rest apis", "restful"), "microservices": (), "system design": ("distributed systems",),
+    "react": ("react.js", "reactjs"), "node.js": ("nodejs",), "html": (), "css": (),
+    "aws": ("amazon web services",), "gcp": ("google cloud",), "azure": (),
+    "docker": (), "kubernetes": ("k8s",), "terraform": ("infrastructure as code",), "ci/cd": ("continuous integration", "continuous delivery"),
+    "linux": (), "git": (), "monitoring": ("observability",), "testing": ("unit tests", "test automation"),
+    "postgresql": ("postgres",), "mongodb": (), "redis": (),
+    # Product and leadership
+    "product strategy": ("product roadmap", "roadmap"), "stakeholder management": ("stakeholders", "cross-functional"),
+    "agile": ("scrum",), "user research": (), "metrics": ("kpis", "kpi"), "leadership": ("led", "mentored"),
+    "communication": ("presented",),
+}
+
+# Role -> (core keywords, preferred keywords); core keywords weigh double
+ROLE_KEYWORDS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "data scientist": (
+        ("python", "sql", "machine learning", "statistics", "a/b testing", "experimentation", "regression"),
+        ("causal inference", "forecasting", "scikit-learn", "pandas", "data visualization", "deep learning",
+         "large language models", "spark", "communication"),
+    ),
+    "machine learning engineer": (
+        ("python", "machine learning", "deep learning", "model deployment", "pytorch", "system design"),
+        ("tensorflow", "large language models", "natural language processing", "docker", "kubernetes",
+         "aws", "spark", "feature engineering", "recommendation systems"),
+    ),
+    "data engineer": (
+        ("python", "sql", "etl", "spark", "airflow", "data modeling", "data warehouse"),
+        ("kafka", "dbt", "bigquery", "snowflake", "databricks", "streaming", "aws", "gcp", "docker", "scala"),
+    ),
+    "data analyst": (
+        ("sql", "excel", "data visualization", "statistics", "metrics"),
+        ("python", "tableau", "power bi", "looker", "a/b testing", "stakeholder management", "communication"),
+    ),
+    "software engineer": (
+        ("system design", "rest api", "testing", "git", "ci/cd"),
+        ("python", "java", "golang", "typescript", "microservices", "aws", "docker", "kubernetes",
+         "postgresql", "linux"),
+    ),
+    "frontend engineer": (
+        ("javascript", "typescript", "react", "html", "css"),
+        ("node.js", "testing", "rest api", "ci/cd", "git"),
+    ),
+    "devops engineer": (
+        ("kubernetes", "docker", "terraform", "ci/cd", "linux", "monitoring"),
+        ("aws", "gcp", "azure", "bash", "python", "golang"),
+    ),
+    "product manager": (
+        ("product strategy", "stakeholder management", "metrics", "user research", "agile"),
+        ("a/b testing", "sql", "experimentation", "communication", "leadership"),
+    ),
+}
+
+ROLE_ALIASES = {
+    "ml engineer": "machine learning engineer",
+    "mle": "machine learning engineer",
+    "ai engineer": "machine learning engineer",
+    "swe": "software engineer",
+    "backend engineer": "software engineer",
+    "software developer": "software engineer",
+    "full stack engineer": "software engineer",
+    "front end engineer": "frontend engineer",
+    "front-end engineer": "frontend engineer",
+    "sre": "devops engineer",
+    "site reliability engineer": "devops engineer",
+    "platform engineer": "devops engineer",
+    "analytics engineer": "data engineer",
+    "business analyst": "data analyst",
+    "product analyst": "data analyst",
+    "applied scientist": "data scientist",
+    "research scientist": "data scientist",
+}
+
+CORE_WEIGHT = 2.0
+PREFERRED_WEIGHT = 1.0
+
+# ASCII-only lowercasing keeps offsets aligned with the original text
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping surface forms to canonical keywords."""
+
+    def __init__(self, terms: Dict[str, str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, str]]] = [[]]
+
+        for surface, canonical in terms.items():
+            state = 0
+            for ch in surface:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append((len(surface), canonical))
+
+        # Breadth-first failure links; each state inherits its fallback's outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start offset, canonical keyword) for whole-word matches in `text`."""
+        lowered = text.translate(_ASCII_LOWER)
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, canonical in output[state]:
+                start = i - length + 1
+                before = lowered[start - 1] if start > 0 else " "
+                after = lowered[i + 1] if i + 1 < len(lowered) else " "
+                if not before.isalnum() and not after.isalnum():
+                    yield start, canonical
+
+
+def _surface_forms() -> Dict[str, str]:
+    terms = {}
+    for canonical, aliases in KEYWORD_ALIASES.items():
+        for surface in (canonical,) + aliases:
+            terms[surface] = canonical
+            if surface.isalpha() and len(surface) > 3 and not surface.endswith("s"):
+                terms[surface + "s"] = canonical
+    return terms
+
+
+def resolve_role(target_role: str) -> Optional[str]:
+    """Map a free-text role ("Senior Data Scientist") onto the taxonomy."""
+    role = " ".join(target_role.translate(_ASCII_LOWER).split())
+    candidates = list(ROLE_KEYWORDS) + list(ROLE_ALIASES)
+    # Longest name contained in the role wins ("machine learning engineer" over "engineer" roles)
+    for name in sorted(candidates, key=len, reverse=True):
+        if f" {name} " in f" {role} ":
+            return ROLE_ALIASES.get(name, name)
+    return None
+
+
+class ATSScorer:
+    """Keyword coverage scoring against a role taxonomy or a job description."""
+
+    def __init__(self):
+        self.automaton = KeywordAutomaton(_surface_forms())
+
+    def matches(self, text: str) -> Dict[str, List[int]]:
+        """Canonical keyword -> start offsets of its matches in `text`."""
+        found: Dict[str, List[int]] = {}
+        for start, keyword in self.automaton.search(text):
+            found.setdefault(keyword, []).append(start)
+        return found
+
+    def role_weights(self, role: str) -> Dict[str, float]:
+        core, preferred = ROLE_KEYWORDS[role]
+        weights = {keyword: PREFERRED_WEIGHT for keyword in preferred}
+        weights.update({keyword: CORE_WEIGHT for keyword in core})
+        return weights
+
+    def job_description_weights(self, job_description: str) -> Dict[str, float]:
+        """Keywords a job description asks for, weighted by how often it repeats them."""
+        counts = Counter(keyword for _, keyword in self.automaton.search(job_description))
+        return {keyword: float(min(count, 3)) for keyword, count in counts.items()}
+
+    def score(
+        self,
+        resume_text: str,
+        target_role: Optional[str] = None,
+        job_description: Optional[str] = None,
+        structure: Optional[StructuredResume] = None
+    ) -> ATSScore:
+        """Score a resume; with neither a role nor a job description, the best-fitting role is used."""
+        found = self.matches(resume_text)
+
+        if job_description:
+            target = "job description"
+            weights = self.job_description_weights(job_description)
+            if not weights:
+                raise ValueError("No recognised skills or keywords found in the job description")
+        elif target_role:
+            role = resolve_role(target_role)
+            if role is None:
+                raise ValueError(f"Unknown role '{target_role}'; paste a job description instead")
+            target, weights = role, self.role_weights(role)
+        else:
+            target = max(ROLE_KEYWORDS, key=lambda role: self._coverage(found, self.role_weights(role)))
+            weights = self.role_weights(target)
+
+        structure = structure or sectionize(resume_text)
+        total = sum(weights.values())
+        ranked = sorted(weights, key=lambda keyword: (-weights[keyword], keyword))
+
+        sections = []
+        for section in structure.sections:
+            if section.kind == "contact":
+                continue
+            matched = [
+                keyword for keyword in ranked
+                if any(section.start <= offset < section.end for offset in found.get(keyword, ()))
+            ]
+            sections.append(ATSSectionScore(
+                kind=section.kind,
+                title=section.title,
+                score=round(100 * sum(weights[k] for k in matched) / total),
+                matched=matched
+            ))
+
+        return ATSScore(
+            score=round(100 * self._coverage(found, weights)),
+            target=target,
+            matched=[keyword for keyword in ranked if keyword in found],
+            missing=[keyword for keyword in ranked if keyword not in found],
+            sections=sections
+        )
+
+    def gap_table(self, resume_text: str, target_roles: List[str]) -> KeywordGapTable:
+        """Keyword gaps for several target roles at once; the resume is scanned a single time."""
+        found = self.matches(resume_text)
+        scores: Dict[str, int] = {}
+        unknown: List[str] = []
+        asked_by: Dict[str, List[str]] = {}
+        demand: Dict[str, float] = {}
+        for target in target_roles:
+            role = resolve_role(target)
+            if role is None:
+                unknown.append(target)
+                continue
+            if role in scores:
+                continue
+            weights = self.role_weights(role)
+            scores[role] = round(100 * self._coverage(found, weights))
+            for keyword, weight in weights.items():
+                asked_by.setdefault(keyword, []).append(role)
+                demand[keyword] = demand.get(keyword, 0.0) + weight
+
+        ordered = sorted(asked_by, key=lambda keyword: (keyword in found, -demand[keyword], keyword))
+        return KeywordGapTable(
+            scores=scores,
+            rows=[KeywordGapRow(keyword=k, present=k in found, roles=asked_by[k]) for k in ordered],
+            unknown_roles=unknown
+        )
+
+    @staticmethod
+    def _coverage(found: Dict[str, List[int]], weights: Dict[str, float]) -> float:
+        total = sum(weights.values())
+        return sum(weight for keyword, weight in weights.items() if keyword in found) / total if total else 0.0
+
+
+def format_ats_report(result: ATSScore) -> str:
+    """Render a score for inclusion in a prompt."""
+    lines = [
+        f"## LOCAL ATS KEYWORD SCORE (computed deterministically for: {result.target})",
+        f"Score: {result.score}/100",
+        f"Matched keywords: {', '.join(result.matched) or 'none'}",
+        f"Missing keywords (most important first): {', '.join(result.missing) or 'none'}",
+    ]
+    breakdown = [f"{s.title}: {s.score}/100 ({', '.join(s.matched) or 'no keywords'})" for s in result.sections]
+    if breakdown:
+        lines.append("By section: " + "; ".join(breakdown))
+    lines.append("Explain this score and use it as the ATS compatibility figure; do not invent a different one.")
+    return "\n".join(lines)
+
+
+def format_gap_table(table: KeywordGapTable) -> str:
+    """Render a keyword-gap table for inclusion in a prompt."""
+    lines = ["## KEYWORD GAP TABLE (computed deterministically; shared by all target roles)"]
+    if table.scores:
+        lines.append("ATS scores: " + "; ".join(f"{role} {score}/100" for role, score in table.scores.items()))
+        missing = [row for row in table.rows if not row.present]
+        if missing:
+            lines.append("| Missing keyword | Asked for by |")
+            lines.append("|---|---|")
+            lines.extend(f"| {row.keyword} | {', '.join(row.roles)} |" for row in missing)
+        present = [row.keyword for row in table.rows if row.present]
+        lines.append(f"Already on the resume: {', '.join(present) or 'none'}")
+    if table.unknown_roles:
+        lines.append(f"No keyword list for: {', '.join(table.unknown_roles)} (judge keywords for these yourself)")
+    lines.append("Use these scores and gaps; do not invent different ones.")
+    return "\n".join(lines)
+
+
+# Singleton instance
+ats_scorer = ATSScorer()
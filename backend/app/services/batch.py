@@ -0,0 +1,162 @@
+"""
+Batch resume analysis for recruiter-scale ingestion.
+
+Files (or zip archives of files) are parsed in parallel on the parser pool and
+analyzed concurrently under a concurrency cap and an estimated
+tokens-per-minute budget. Batches submitted through the API draw that budget
+per client (shared by all of the client's batches) and then from the global
+admission budget; offline runs (the CLI) get a private budget. Results are
+yielded as each item finishes; a failing item is reported without stopping the
+rest of the batch.
+"""
+
+import io
+import time
+import uuid
+import asyncio
+import logging
+import zipfile
+from typing import AsyncIterator, Dict, Any, Iterable, List, Optional, Tuple
+
+from app.core.config import (
+    BATCH_CONCURRENCY, BATCH_TOKENS_PER_MINUTE, BATCH_MAX_FILES, BATCH_MAX_UNCOMPRESSED_BYTES, MAX_UPLOAD_BYTES
+)
+from app.models.schemas import SessionState
+from app.services.sectionizer import sectionize
+from app.services.structured_analysis import analysis_message
+from app.services.llm_service import estimate_tokens
+from app.services.rate_limit import AsyncTokenBucket
+from app.services.admission import admission, EXPECTED_OUTPUT_TOKENS
+from app.services.resume_agent import resume_agent, EXPERT_SYSTEM_PROMPT
+from app.services.resume_parser import parse_resume_async
+from app.services.session_store import session_store
+
+logger = logging.getLogger(__name__)
+
+RESUME_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+def expand_uploads(files: Iterable[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """Flatten uploads into (filename, content) pairs, unpacking zip archives.
+
+    Archive members are counted against BATCH_MAX_FILES, and their sizes
+    against BATCH_MAX_UNCOMPRESSED_BYTES, before anything is decompressed.
+    Blocking: run it off the event loop for uploads.
+    """
+    files = list(files)
+    archives = []
+    count = 0
+    for filename, content in files:
+        if not filename.lower().endswith('.zip'):
+            count += 1
+            continue
+        archive = zipfile.ZipFile(io.BytesIO(content))
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+            and info.filename.lower().endswith(RESUME_EXTENSIONS)
+        ]
+        archives.append((archive, members))
+        count += len(members)
+    try:
+        if count > BATCH_MAX_FILES:
+            raise ValueError(f"Batch has {count} files (limit {BATCH_MAX_FILES})")
+        # Members over MAX_UPLOAD_BYTES are never extracted. zipfile stops
+        # reading at the declared size, so this bounds the actual output too.
+        uncompressed = sum(
+            info.file_size for _, members in archives for info in members if info.file_size <= MAX_UPLOAD_BYTES
+        )
+        if uncompressed > BATCH_MAX_UNCOMPRESSED_BYTES:
+            raise ValueError(f"Archives expand to {uncompressed} bytes (limit {BATCH_MAX_UNCOMPRESSED_BYTES})")
+
+        items = []
+        unpacked = iter(archives)
+        for filename, content in files:
+            if not filename.lower().endswith('.zip'):
+                items.append((filename, content))
+                continue
+            archive, members = next(unpacked)
+            for info in members:
+                if info.file_size > MAX_UPLOAD_BYTES:
+                    # Reported as a per-item failure by analyze_batch
+                    items.append((info.filename, b""))
+                    continue
+                items.append((info.filename, archive.read(info)))
+    finally:
+        for archive, _ in archives:
+            archive.close()
+    return items
+
+
+async def analyze_batch(
+    items: List[Tuple[str, bytes]],
+    concurrency: int = BATCH_CONCURRENCY,
+    tokens_per_minute: int = BATCH_TOKENS_PER_MINUTE,
+    create_sessions: bool = True,
+    client: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """Analyze many resumes, yielding one result dict per item as it completes.
+
+    With `client` set, tokens are reserved through the admission controller
+    (the client's batch budget, then the global one); without it the batch
+    gets its own `tokens_per_minute` bucket.
+    """
+    llm_slots = asyncio.Semaphore(max(1, concurrency))
+    token_budget = AsyncTokenBucket.per_minute(tokens_per_minute) if client is None else None
+    system_tokens = estimate_tokens(EXPERT_SYSTEM_PROMPT)
+
+    async def reserve(tokens: int) -> None:
+        if token_budget is not None:
+            await token_budget.acquire(tokens)
+        else:
+            await admission.reserve_background(client, tokens, tokens_per_minute)
+
+    async def process(index: int, filename: str, content: bytes) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"index": index, "filename": filename}
+        try:
+            if not content:
+                raise ValueError("Empty or oversized file")
+            # Queues for the parser pool's shared pending slots
+            resume_text = await parse_resume_async(content, filename, wait=True)
+            if not resume_text.strip():
+                raise ValueError("No text could be extracted")
+
+            await reserve(system_tokens + estimate_tokens(resume_text) + EXPECTED_OUTPUT_TOKENS)
+            structure = sectionize(resume_text)
+            async with llm_slots:
+                analysis, structured = await resume_agent.initial_analysis(resume_text, structure)
+
+            if create_sessions:
+                session = SessionState(
+                    session_id=str(uuid.uuid4()),
+                    resume_text=resume_text,
+                    resume_analysis=structured,
+                    resume_structure=structure
+                )
+                session.conversation_history.append(analysis_message(analysis, structured))
+                await session_store.save(session)
+                result["session_id"] = session.session_id
+            result.update(status="ok", analysis=analysis)
+            if structured is not None:
+                result["structured"] = structured.model_dump(exclude={"sections": {"__all__": {"content"}}})
+        except Exception as e:
+            logger.error(f"Batch item {filename} failed: {e}")
+            result.update(status="error", error=str(e) if isinstance(e, ValueError) else "Failed to analyze resume")
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    tasks = [asyncio.create_task(process(i, name, content)) for i, (name, content) in enumerate(items)]
+    completed = 0
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            completed += 1
+            failed += result["status"] == "error"
+            result["progress"] = {"completed": completed, "failed": failed, "total": len(items)}
+            yield result
+    finally:
+        # Consumer went away (e.g. client disconnected): stop outstanding work
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,88 @@
+"""
+Bounded conversation context for chat turns.
+
+The pinned resume, the user corrections and the most recent messages are sent
+verbatim; everything older is folded into `SessionState.conversation_summary`.
+Folding happens in batches (every SUMMARY_REFRESH_MESSAGES messages, or sooner
+when the token budget is exceeded), so most turns reuse the stored summary and
+its prompt-cache entry instead of paying for a summarization call. Folded
+messages are kept (compressed) in the session history but no longer sent.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from app.core.config import CONTEXT_TOKEN_BUDGET, CONTEXT_RECENT_MESSAGES, SUMMARY_REFRESH_MESSAGES, HISTORY_COMPRESS_MIN_CHARS
+from app.models.schemas import SessionState, MessageRole
+from app.services.llm_service import estimate_tokens
+from app.services.resume_agent import resume_agent
+
+logger = logging.getLogger(__name__)
+
+
+def _history_tokens(messages) -> int:
+    return sum(estimate_tokens(msg.content) for msg in messages)
+
+
+class ConversationContext:
+    """Decides which history a chat turn replays and maintains the running summary."""
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        recent_messages: int = CONTEXT_RECENT_MESSAGES,
+        refresh_messages: int = SUMMARY_REFRESH_MESSAGES
+    ):
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.refresh_messages = refresh_messages
+
+    def pinned_tokens(self, session: SessionState) -> int:
+        """Tokens spent on context that is always sent: resume, corrections, summary."""
+        pinned = [session.resume_text or "", session.conversation_summary or ""]
+        pinned.extend(c.text for c in session.user_corrections)
+        return sum(estimate_tokens(text) for text in pinned)
+
+    def _fold_point(self, session: SessionState) -> int:
+        """Index where the verbatim window starts; it always starts on a user message."""
+        history = session.conversation_history
+        cut = max(session.summarized_through, len(history) - self.recent_messages)
+        while cut < len(history) and history[cut].role != MessageRole.USER:
+            cut += 1
+        return cut
+
+    def fold_due(self, session: SessionState) -> bool:
+        """Whether the next turn folds older messages into the summary."""
+        pending = self._fold_point(session) - session.summarized_through
+        unsummarized = session.conversation_history[session.summarized_through:]
+        over_budget = self.pinned_tokens(session) + _history_tokens(unsummarized) > self.token_budget
+        return pending > 0 and (pending >= self.refresh_messages or over_budget)
+
+    async def recent_history(self, session: SessionState) -> List[Dict[str, Any]]:
+        """History to replay for the next turn as Messages API dicts, folding older turns into the summary if due.
+
+        Updates `conversation_summary` and `summarized_through` on the session;
+        the caller is responsible for saving it.
+        """
+        history = session.conversation_history
+        cut = self._fold_point(session)
+        pending = cut - session.summarized_through
+
+        if self.fold_due(session):
+            try:
+                session.conversation_summary = await resume_agent.summarize_conversation(
+                    session.conversation_summary,
+                    history[session.summarized_through:cut]
+                )
+                session.summarized_through = cut
+                history.compress_before(cut, HISTORY_COMPRESS_MIN_CHARS)
+                logger.info(f"Folded {pending} messages into summary for session {session.session_id}")
+            except Exception as e:
+                # Keep chatting with the longer context rather than failing the turn
+                logger.error(f"Conversation summary failed: {e}")
+
+        return history.render(session.summarized_through)
+
+
+# Singleton instance
+conversation_context = ConversationContext()
@@ -0,0 +1,158 @@
+"""
+Correction detection and the per-session correction ledger.
+
+A single compiled, word-bounded alternation decides whether a chat message
+corrects a fact ("I didn't work at X", "my title should be Y"); generic words
+such as "error" or "wrong" on their own no longer count. Detected corrections
+are filed under (field, entity): a newer correction of the same fact replaces
+the older one (corrections naming no resume entry are never treated as the same
+fact), repeats are dropped and the ledger is capped, so the corrections block
+sent with every chat turn stays small.
+"""
+
+import re
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from app.core.config import CORRECTIONS_MAX_ENTRIES, CORRECTION_MAX_CHARS
+from app.models.schemas import SessionState, Correction, StructuredResume
+from app.services.analysis_cache import normalize_text
+from app.services.sectionizer import sectionize, entry_lead
+
+logger = logging.getLogger(__name__)
+
+_APOS = "['’]"
+
+# Matched against the lowercased message (faster than re.IGNORECASE)
+CORRECTION_PATTERN = re.compile(
+    r"\b(?:"
+    rf"that{_APOS}?s (?:not (?:right|correct|accurate|true)|wrong|incorrect|a mistake)"
+    r"|(?:this|that|it) (?:is|was) (?:not (?:right|correct|accurate|true)|wrong|incorrect)"
+    rf"|(?:this|that|it) (?:isn{_APOS}t|wasn{_APOS}t) (?:right|correct|accurate|true)"
+    rf"|i (?:did not|didn{_APOS}t|never|have never) (?:work|attend|stud|ha[dv]|hold|held|get|got|earn|lead|led|manag|use|buil|own)\w*"
+    rf"|i (?:do not|don{_APOS}t|haven{_APOS}t|have not) have"
+    rf"|i(?: was not| wasn{_APOS}t| am not|{_APOS}m not) (?:a |an |the )?\w+ (?:at|for|in)\b"
+    r"|you (?:got|have|made) (?:\w+ ){0,3}(?:wrong|a mistake|an error)"
+    r"|(?:my|the) (?:actual|correct|real) (?:\w+ )?(?:is|was|are|were)\b"
+    r"|(?:it|that|this|title|date|dates|name|company|degree|school|role|position|year|location) should (?:be|say|read)\b"
+    r"|(?:is|was|were) actually"
+    r"|actually,|correction:|not true\b|fix that\b|to clarify,"
+    r")"
+)
+
+# Checked in order; the first match decides the field
+FIELD_PATTERNS = [
+    ("school", re.compile(r"\b(?:school|university|college|institute|attended|graduated)\b", re.IGNORECASE)),
+    ("degree", re.compile(r"\b(?:degree|bachelor|master|ph\.?d|mba|b\.?s|m\.?s|major|minor|gpa)\b", re.IGNORECASE)),
+    ("title", re.compile(
+        r"\b(?:title|position|role|promoted|job was|i was (?:a|an|the)"
+        r"|engineer|analyst|manager|consultant|scientist|developer|director|lead)\b",
+        re.IGNORECASE
+    )),
+    ("date", re.compile(
+        r"\b(?:date|dates|year|years|since|until|(?:19|20)\d{2}|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b",
+        re.IGNORECASE
+    )),
+    ("company", re.compile(r"\b(?:company|employer|worked (?:at|for)|work (?:at|for)|firm|client)\b", re.IGNORECASE)),
+    ("location", re.compile(r"\b(?:located|location|based in|city|relocat\w*|remote)\b", re.IGNORECASE)),
+    ("metric", re.compile(
+        r"\d+\s*%|\$\s*\d|\bteam of \d+|\b\d+ people\b|\b(?:revenue|saved|increase[d]?|reduced|million|percent)\b",
+        re.IGNORECASE
+    )),
+    ("skill", re.compile(r"\b(?:skills?|know|used|experience (?:with|in)|proficient|certified|certification)\b", re.IGNORECASE)),
+]
+
+_ENTITY_TOKEN = re.compile(r"[A-Za-z][A-Za-z0-9&.+-]{2,}")
+
+
+@lru_cache(maxsize=1024)
+def _entity_patterns(entity: str) -> Tuple["re.Pattern[str]", ...]:
+    """Word-bounded patterns for the entity's first three tokens, for lowercased text ("data" does not match "database")."""
+    tokens = [t.lower().rstrip(".") for t in _ENTITY_TOKEN.findall(entity)[:3]]
+    return tuple(re.compile(rf"(?<![a-z0-9]){re.escape(t)}(?![a-z0-9])") for t in tokens)
+
+
+def _names_entity(lowered: str, entity: str) -> bool:
+    patterns = _entity_patterns(entity)
+    return bool(patterns) and all(p.search(lowered) for p in patterns)
+
+
+def detect_correction(message: str) -> bool:
+    """Whether a chat message corrects a fact."""
+    return CORRECTION_PATTERN.search(message.lower()) is not None
+
+
+def classify_field(message: str) -> str:
+    for field, pattern in FIELD_PATTERNS:
+        if pattern.search(message):
+            return field
+    return "other"
+
+
+def find_entity(message: str, structure: Optional[StructuredResume]) -> str:
+    """Heading of the experience/education entry the message names, if any."""
+    if structure is None:
+        return ""
+    lowered = message.lower()
+    for section in structure.sections:
+        for entry in section.entries:
+            # Match on the first segment of the entry's first line ("Dentsu Americas", "Data Engineer")
+            lead = entry_lead(entry)
+            if _names_entity(lowered, lead):
+                return lead
+    return ""
+
+
+def add_correction(ledger: List[Correction], correction: Correction, max_entries: int = CORRECTIONS_MAX_ENTRIES) -> List[Correction]:
+    """Ledger with `correction` added: supersedes the same (field, entity), drops duplicates, keeps the newest."""
+    normalized = normalize_text(correction.text).lower()
+    # Without an entity there is no fact key ("I never used Kubernetes" vs "... Spark"): only exact repeats are replaced
+    keyed = bool(correction.entity)
+    kept = [
+        c for c in ledger
+        if normalize_text(c.text).lower() != normalized
+        and not (keyed and c.field == correction.field and c.entity == correction.entity)
+    ]
+    kept.append(correction)
+    return kept[-max_entries:]
+
+
+def corrections_for_resume(ledger: List[Correction], resume_text: str) -> Tuple[List[Correction], List[Correction]]:
+    """Split the ledger for a revised resume: (still applies, about an entry the resume no longer has)."""
+    lowered = normalize_text(resume_text).lower()
+    kept, dropped = [], []
+    for correction in ledger:
+        (dropped if _entity_patterns(correction.entity) and not _names_entity(lowered, correction.entity) else kept).append(correction)
+    return kept, dropped
+
+
+def record_correction(session: SessionState, message: str) -> Optional[Correction]:
+    """File `message` in the session's ledger if it is a correction."""
+    if not detect_correction(message):
+        return None
+    structure = session.resume_structure
+    if structure is None and session.resume_text:
+        structure = sectionize(session.resume_text)
+    text = message.strip()
+    if len(text) > CORRECTION_MAX_CHARS:
+        text = text[:CORRECTION_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+    correction = Correction(
+        field=classify_field(message),
+        entity=find_entity(message, structure),
+        text=text,
+        timestamp=datetime.utcnow()
+    )
+    session.user_corrections = add_correction(session.user_corrections, correction)
+    logger.info(f"User correction recorded ({correction.field}/{correction.entity or '-'}): {message[:100]}...")
+    return correction
+
+
+def format_corrections(corrections: List[Correction]) -> str:
+    """Corrections block for the chat preamble."""
+    lines = []
+    for c in corrections:
+        label = f"{c.field}: {c.entity}" if c.entity else c.field
+        lines.append(f"- [{label}] {c.text}")
+    return "## USER CORRECTIONS (THESE OVERRIDE THE RESUME; NEWEST PER FACT):\n" + "\n".join(lines)
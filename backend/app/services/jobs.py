@@ -0,0 +1,377 @@
+"""
+Background upload jobs.
+
+In job mode POST /api/upload stores the file, queues a job and answers 202
+with the job and session ids, so the connection is not held open through
+parsing and the LLM call (and a proxy timeout or browser retry cannot start
+a second analysis). Workers take jobs off the queue and run the same pipeline
+as the synchronous upload; clients poll GET /api/jobs/{id} or watch
+/api/jobs/{id}/ws.
+
+`InMemoryJobStore` keeps jobs in-process (workers run on the API's event
+loop). `RedisJobStore` keeps them in any Redis-protocol server, so every API
+process sees every job and workers can run as separate processes:
+
+    python -m app.services.jobs
+
+A job whose worker process dies stays "running" until it expires.
+"""
+
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.core.config import (
+    JOB_BACKEND, REDIS_URL, JOB_WORKERS, JOB_QUEUE_MAX, JOB_TTL_SECONDS, JOB_IDEMPOTENCY_TTL_SECONDS,
+    JOB_MAX_ENTRIES, JOB_POLL_SECONDS
+)
+from app.models.schemas import UploadJob, JobStatus
+from app.services.admission import AdmissionRejected
+from app.services.resilience import LLMUnavailableError
+from app.services.resume_parser import ParserBusyError
+from app.services.metrics import UPLOAD_JOBS, UPLOAD_JOB_DURATION
+from app.services.uploads import analyze_upload
+
+logger = logging.getLogger(__name__)
+
+FINISHED = (JobStatus.DONE, JobStatus.FAILED)
+# Attempts at getting through admission control before a job fails
+ADMISSION_ATTEMPTS = 5
+
+
+def idempotency_key(client: str, key: Optional[str], filename: str, content: bytes) -> str:
+    """Dedup key for a submission: the client's Idempotency-Key, or else the file itself, scoped to the client."""
+    digest = hashlib.sha256(client.encode("utf-8") + b"\x00")
+    if key:
+        digest.update(b"key\x00" + key.encode("utf-8"))
+    else:
+        digest.update(b"file\x00" + filename.encode("utf-8") + b"\x00" + content)
+    return digest.hexdigest()
+
+
+class JobStore(ABC):
+    """Interface for job persistence and the queue of jobs waiting for a worker."""
+
+    @abstractmethod
+    async def create(self, job: UploadJob, content: bytes, dedup_key: str) -> Tuple[UploadJob, bool]:
+        """Queue a new job, or return the live job already submitted under `dedup_key`.
+
+        Returns (job, created).
+        """
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[UploadJob]:
+        """Return the job, or None if it does not exist or has expired."""
+
+    @abstractmethod
+    async def update(self, job: UploadJob) -> None:
+        """Store a job's new state."""
+
+    @abstractmethod
+    async def take(self, timeout: float) -> Optional[str]:
+        """Next queued job id, waiting up to `timeout` seconds."""
+
+    @abstractmethod
+    async def content(self, job_id: str) -> Optional[bytes]:
+        """The uploaded file of a job."""
+
+    @abstractmethod
+    async def discard_content(self, job_id: str) -> None:
+        """Drop a job's file once it has been processed."""
+
+    @abstractmethod
+    async def depth(self) -> int:
+        """Jobs waiting for a worker."""
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local jobs with TTL and size-bounded eviction."""
+
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS, max_entries: int = JOB_MAX_ENTRIES, dedup_ttl_seconds: int = JOB_IDEMPOTENCY_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.dedup_ttl_seconds = dedup_ttl_seconds
+        self._jobs: "OrderedDict[str, Tuple[float, UploadJob]]" = OrderedDict()
+        self._contents: Dict[str, bytes] = {}
+        self._dedup: Dict[str, Tuple[float, str]] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+
+    async def create(self, job: UploadJob, content: bytes, dedup_key: str) -> Tuple[UploadJob, bool]:
+        self._evict()
+        entry = self._dedup.get(dedup_key)
+        if entry is not None and entry[0] > time.monotonic() and entry[1] in self._jobs:
+            return self._jobs[entry[1]][1], False
+        self._dedup[dedup_key] = (time.monotonic() + self.dedup_ttl_seconds, job.job_id)
+        self._jobs[job.job_id] = (time.monotonic() + self.ttl_seconds, job)
+        self._contents[job.job_id] = content
+        self._queue.put_nowait(job.job_id)
+        return job, True
+
+    async def get(self, job_id: str) -> Optional[UploadJob]:
+        entry = self._jobs.get(job_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    async def update(self, job: UploadJob) -> None:
+        entry = self._jobs.get(job.job_id)
+        if entry is not None:
+            self._jobs[job.job_id] = (entry[0], job)
+
+    async def take(self, timeout: float) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def content(self, job_id: str) -> Optional[bytes]:
+        return self._contents.get(job_id)
+
+    async def discard_content(self, job_id: str) -> None:
+        self._contents.pop(job_id, None)
+
+    async def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        # Oldest jobs sit at the front; drop expired ones, then trim to size
+        while self._jobs:
+            job_id, (expires_at, _) = next(iter(self._jobs.items()))
+            if expires_at > now and len(self._jobs) < self.max_entries:
+                break
+            del self._jobs[job_id]
+            self._contents.pop(job_id, None)
+        for key in [key for key, (expires_at, _) in self._dedup.items() if expires_at <= now]:
+            del self._dedup[key]
+
+
+class RedisJobStore(JobStore):
+    """Redis-protocol jobs: JSON records and file blobs with a server-side TTL, plus a list as the queue."""
+
+    key_prefix = "job:"
+    dedup_prefix = "job-dedup:"
+    queue_key = "jobs:queue"
+
+    def __init__(self, client, ttl_seconds: int = JOB_TTL_SECONDS, dedup_ttl_seconds: int = JOB_IDEMPOTENCY_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.dedup_ttl_seconds = dedup_ttl_seconds
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisJobStore":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url))
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.key_prefix}{job_id}"
+
+    async def create(self, job: UploadJob, content: bytes, dedup_key: str) -> Tuple[UploadJob, bool]:
+        dedup = f"{self.dedup_prefix}{dedup_key}"
+        # SET NX claims the key atomically, so concurrent duplicates across workers create one job
+        if not await self.client.set(dedup, job.job_id, nx=True, ex=self.dedup_ttl_seconds):
+            existing_id = await self.client.get(dedup)
+            existing = await self.get(existing_id.decode()) if existing_id else None
+            if existing is not None:
+                return existing, False
+            await self.client.set(dedup, job.job_id, ex=self.dedup_ttl_seconds)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(job.job_id), job.model_dump_json(), ex=self.ttl_seconds)
+            pipe.set(f"{self._key(job.job_id)}:file", content, ex=self.ttl_seconds)
+            pipe.lpush(self.queue_key, job.job_id)
+            await pipe.execute()
+        return job, True
+
+    async def get(self, job_id: str) -> Optional[UploadJob]:
+        data = await self.client.get(self._key(job_id))
+        return UploadJob.model_validate_json(data) if data is not None else None
+
+    async def update(self, job: UploadJob) -> None:
+        await self.client.set(self._key(job.job_id), job.model_dump_json(), keepttl=True)
+
+    async def take(self, timeout: float) -> Optional[str]:
+        item = await self.client.brpop(self.queue_key, timeout=timeout)
+        return item[1].decode() if item else None
+
+    async def content(self, job_id: str) -> Optional[bytes]:
+        return await self.client.get(f"{self._key(job_id)}:file")
+
+    async def discard_content(self, job_id: str) -> None:
+        await self.client.delete(f"{self._key(job_id)}:file")
+
+    async def depth(self) -> int:
+        return await self.client.llen(self.queue_key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class UploadJobs:
+    """Submits upload jobs and runs the workers that process them."""
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, queue_max: int = JOB_QUEUE_MAX):
+        self.store = store
+        self.workers = workers
+        self.queue_max = queue_max
+        self._tasks: List[asyncio.Task] = []
+        # Wakes watchers of jobs processed by this process; others are polled.
+        # Holds only watchers currently waiting, so departed ones leave nothing behind
+        self._changed: Dict[str, Set[asyncio.Event]] = {}
+
+    async def submit(self, filename: str, content: bytes, client: str, key: Optional[str] = None) -> Tuple[UploadJob, bool]:
+        """Queue an upload (or find its earlier submission); returns (job, created).
+
+        Raises AdmissionRejected when the queue is full.
+        """
+        self.start()
+        if await self.store.depth() >= self.queue_max:
+            UPLOAD_JOBS.labels("rejected").inc()
+            raise AdmissionRejected("Upload queue is full, please retry shortly", retry_after=5)
+        job = UploadJob(job_id=str(uuid.uuid4()), session_id=str(uuid.uuid4()), filename=filename, client=client)
+        job, created = await self.store.create(job, content, idempotency_key(client, key, filename, content))
+        UPLOAD_JOBS.labels("submitted" if created else "duplicate").inc()
+        return job, created
+
+    def start(self) -> None:
+        """Start the in-process workers (once; a no-op with JOB_WORKERS=0)."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the in-process workers; queued jobs stay in the store."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def close(self) -> None:
+        await self.stop()
+        await self.store.close()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job_id = await self.store.take(timeout=5)
+                if job_id is not None:
+                    await self.run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the worker alive through backend hiccups
+                logger.error(f"Upload job worker error: {e}")
+                await asyncio.sleep(1)
+
+    async def run(self, job_id: str) -> None:
+        """Process one queued job."""
+        job = await self.store.get(job_id)
+        if job is None or job.status != JobStatus.QUEUED:
+            return
+        job.status, job.started_at = JobStatus.RUNNING, datetime.utcnow()
+        await self._save(job)
+        UPLOAD_JOB_DURATION.labels("queued").observe((job.started_at - job.created_at).total_seconds())
+
+        start = time.perf_counter()
+        try:
+            content = await self.store.content(job_id)
+            if content is None:
+                raise ValueError("The uploaded file has expired, please upload again")
+            for attempt in range(ADMISSION_ATTEMPTS):
+                try:
+                    job.result = await analyze_upload(content, job.filename, job.client, job.session_id)
+                    break
+                except (AdmissionRejected, ParserBusyError) as e:
+                    # Queued work waits for budget or a parser slot instead of failing on the first rejection
+                    if attempt == ADMISSION_ATTEMPTS - 1:
+                        raise
+                    await asyncio.sleep(e.retry_after)
+            job.status = JobStatus.DONE
+        except ValueError as e:
+            job.status, job.error, job.error_status = JobStatus.FAILED, str(e), 400
+        except (LLMUnavailableError, AdmissionRejected):
+            job.status, job.error, job.error_status = JobStatus.FAILED, "The AI service is busy, please retry shortly", 503
+        except ParserBusyError as e:
+            job.status, job.error, job.error_status = JobStatus.FAILED, str(e), 503
+        except Exception as e:
+            logger.error(f"Upload job {job_id} failed: {e}")
+            job.status, job.error, job.error_status = JobStatus.FAILED, "Failed to process resume", 500
+        finally:
+            job.finished_at = datetime.utcnow()
+            await self._save(job)
+            await self.store.discard_content(job_id)
+            UPLOAD_JOBS.labels(job.status.value).inc()
+            UPLOAD_JOB_DURATION.labels("running").observe(time.perf_counter() - start)
+
+    async def _save(self, job: UploadJob) -> None:
+        await self.store.update(job)
+        for changed in self._changed.pop(job.job_id, ()):
+            changed.set()
+
+    async def watch(self, job_id: str, poll_seconds: float = JOB_POLL_SECONDS) -> AsyncIterator[UploadJob]:
+        """Yield the job on every status change until it finishes (or disappears)."""
+        last = None
+        while True:
+            job = await self.store.get(job_id)
+            if job is None:
+                return
+            if job.status != last:
+                last = job.status
+                yield job
+            if job.status in FINISHED:
+                return
+            changed = asyncio.Event()
+            self._changed.setdefault(job_id, set()).add(changed)
+            try:
+                await asyncio.wait_for(changed.wait(), poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # Also runs when the watcher disconnects (cancelled or closed mid-wait)
+                waiting = self._changed.get(job_id)
+                if waiting is not None:
+                    waiting.discard(changed)
+                    if not waiting:
+                        del self._changed[job_id]
+
+
+def create_job_store() -> JobStore:
+    """Build the store selected by JOB_BACKEND."""
+    if JOB_BACKEND == "redis":
+        logger.info("Using Redis upload job store")
+        return RedisJobStore.from_url(REDIS_URL)
+    return InMemoryJobStore()
+
+
+# Singleton instance
+upload_jobs = UploadJobs(create_job_store())
+
+
+async def run_workers(workers: int) -> None:
+    """Process upload jobs until cancelled (a worker process with JOB_BACKEND=redis)."""
+    if not isinstance(upload_jobs.store, RedisJobStore):
+        logger.warning("JOB_BACKEND is not redis: this process will only see jobs it submits itself")
+    upload_jobs.workers = workers
+    upload_jobs.start()
+    logger.info(f"Processing upload jobs with {workers} workers")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await upload_jobs.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Run upload job workers against the shared job queue")
+    parser.add_argument("--workers", type=int, default=max(1, JOB_WORKERS))
+    args = parser.parse_args()
+    asyncio.run(run_workers(args.workers))
@@ -1,31 +1,215 @@
+import time
+import asyncio
 import logging
-from typing import List, Dict, Optional
-from anthropic import Anthropic
-from app.core.config import ANTHROPIC_API_KEY, LLM_MODEL, MAX_TOKENS
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+from app.core.config import (
+    ANTHROPIC_API_KEY, ANTHROPIC_BASE_URL, LLM_MODEL, MAX_TOKENS,
+    LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY_SECONDS, PROMPT_CACHING,
+    LLM_TIMEOUT_SECONDS, LLM_CONNECT_TIMEOUT_SECONDS, LLM_MAX_RETRIES, LLM_MAX_CONCURRENCY
+)
+from app.services.resilience import (
+    CircuitBreaker, LLMUnavailableError, is_retryable, retry_after_seconds, backoff_delay
+)
+from app.services.metrics import LLM_LATENCY, LLM_TTFT, LLM_IN_FLIGHT, record_tokens, span
+from app.services.model_router import Route, model_router
 
 logger = logging.getLogger(__name__)
 
+# Built by init_clients() (from the app lifespan, or on first use); the
+# anthropic SDK is imported there because importing it dominates startup time
 client = None
-if ANTHROPIC_API_KEY:
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
+async_client = None
+
+
+def init_clients() -> None:
+    """Create the Anthropic clients: one pooled HTTP client per worker, shared by every request."""
+    global client, async_client
+    if not ANTHROPIC_API_KEY or async_client is not None:
+        return
+    import httpx
+    from anthropic import Anthropic, AsyncAnthropic, DefaultAsyncHttpxClient, Timeout
+
+    client = Anthropic(api_key=ANTHROPIC_API_KEY, base_url=ANTHROPIC_BASE_URL)
+    async_client = AsyncAnthropic(
+        api_key=ANTHROPIC_API_KEY,
+        base_url=ANTHROPIC_BASE_URL,
+        # Retries and deadlines are handled by _call_with_retries
+        max_retries=0,
+        timeout=Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+    )
+
+
+def _sync_client():
+    if client is None:
+        init_clients()
+    if client is None:
+        raise ValueError("ANTHROPIC_API_KEY not configured")
+    return client
+
+
+def _async_client():
+    if async_client is None:
+        init_clients()
+    if async_client is None:
+        raise ValueError("ANTHROPIC_API_KEY not configured")
+    return async_client
+
+
+async def warm_connection() -> None:
+    """Open a pooled connection (DNS, TCP, TLS) to the API so the first LLM call skips the handshake."""
+    llm = _async_client()
+    try:
+        # Any response, even an error status, leaves the connection in the pool
+        await llm.models.list(limit=1)
+    except Exception as e:
+        logger.info(f"Connection warm-up request failed ({e}); the connection may still be pooled")
+
+T = TypeVar("T")
+
+breaker = CircuitBreaker()
+# Caps outbound LLM calls from this worker; created on first use so it binds
+# to the server's event loop
+_llm_slots: Optional[asyncio.Semaphore] = None
+
+
+def _slots() -> asyncio.Semaphore:
+    global _llm_slots
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _llm_slots
+
+
+async def _call_with_retries(attempt: Callable[[], Awaitable[T]], token: Optional[int] = None) -> T:
+    """Run an LLM request under the circuit breaker, a deadline and retry policy.
+
+    The deadline (LLM_TIMEOUT_SECONDS) covers waiting for a concurrency slot,
+    every attempt and the backoff between them. Retryable failures (429, 529,
+    5xx, connection errors) are retried with jittered exponential backoff that
+    honours retry-after; when retries or time run out LLMUnavailableError is
+    raised. The breaker sees one outcome per call, so blips absorbed by a
+    retry do not count against it; a cancelled half-open trial counts as
+    neither and gives its slot back.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LLM_TIMEOUT_SECONDS
+    retries = 0
+    if token is None:
+        token = breaker.before_call()
+    try:
+        while True:
+            try:
+                result = await asyncio.wait_for(attempt(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                breaker.record_failure(token)
+                raise LLMUnavailableError(f"LLM call exceeded {LLM_TIMEOUT_SECONDS}s deadline")
+            except Exception as e:
+                if not is_retryable(e):
+                    # The API answered, so it is healthy even if this request was bad
+                    breaker.record_success(token)
+                    raise
+                retry_after = retry_after_seconds(e)
+                delay = backoff_delay(retries, retry_after)
+                if retries >= LLM_MAX_RETRIES or loop.time() + delay >= deadline:
+                    breaker.record_failure(token)
+                    raise LLMUnavailableError(f"LLM unavailable: {e}", retry_after=retry_after or delay) from e
+                retries += 1
+                logger.warning(f"LLM call failed ({e}), retry {retries}/{LLM_MAX_RETRIES} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success(token)
+            return result
+    finally:
+        # No-op once an outcome was recorded; frees the slot if the trial was cancelled
+        breaker.release_trial(token)
+
+
+# Cumulative token usage for this worker, including prompt-cache activity
+usage_totals: Dict[str, int] = {
+    "calls": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "cache_read_input_tokens": 0,
+    "cache_creation_input_tokens": 0,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for budgeting, not billing."""
+    return len(text) // 4 + 1
+
+
+def cache_block(text: str) -> Dict[str, Any]:
+    """Text content block that ends a cacheable prompt prefix (when caching is enabled)."""
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if PROMPT_CACHING:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+def mark_cacheable(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a message whose last content block ends a cacheable prefix."""
+    content = message["content"]
+    if isinstance(content, str):
+        return {"role": message["role"], "content": [cache_block(content)]}
+    return {"role": message["role"], "content": content[:-1] + [cache_block(content[-1]["text"])]}
+
+
+def _system_blocks(system_prompt: str):
+    if PROMPT_CACHING:
+        return [cache_block(system_prompt)]
+    return system_prompt
+
+
+def record_usage(usage, operation: str = "other", tier: str = "heavy") -> None:
+    """Accumulate, export and log token usage (and its estimated cost) from a Messages API response."""
+    if usage is None:
+        return
+    counts = {
+        "input_tokens": usage.input_tokens or 0,
+        "output_tokens": usage.output_tokens or 0,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+    usage_totals["calls"] += 1
+    for key, value in counts.items():
+        usage_totals[key] += value
+    record_tokens(operation, tier, {
+        "input": counts["input_tokens"],
+        "output": counts["output_tokens"],
+        "cache_read": counts["cache_read_input_tokens"],
+        "cache_write": counts["cache_creation_input_tokens"],
+    }, model_router.cost(tier, counts))
+    logger.info(
+        "LLM usage (%s, %s): input=%d output=%d cache_read=%d cache_write=%d",
+        operation, tier, counts["input_tokens"], counts["output_tokens"],
+        counts["cache_read_input_tokens"], counts["cache_creation_input_tokens"]
+    )
 
 
 def chat_completion(
-    messages: List[Dict[str, str]],
+    messages: List[Dict[str, Any]],
     system_prompt: str,
-    max_tokens: int = MAX_TOKENS
+    max_tokens: int = MAX_TOKENS,
+    operation: str = "other"
 ) -> str:
     """Get completion from Claude API."""
-    if not client:
-        raise ValueError("ANTHROPIC_API_KEY not configured")
+    llm = _sync_client()
 
     try:
-        response = client.messages.create(
+        response = llm.messages.create(
             model=LLM_MODEL,
             max_tokens=max_tokens,
-            system=system_prompt,
+            system=_system_blocks(system_prompt),
             messages=messages
         )
+        record_usage(response.usage, operation)
         return response.content[0].text
     except Exception as e:
         logger.error(f"LLM error: {e}")
@@ -33,23 +217,175 @@ def chat_completion(
 
 
 def stream_completion(
-    messages: List[Dict[str, str]],
+    messages: List[Dict[str, Any]],
     system_prompt: str,
-    max_tokens: int = MAX_TOKENS
+    max_tokens: int = MAX_TOKENS,
+    operation: str = "other"
 ):
     """Stream completion from Claude API."""
-    if not client:
-        raise ValueError("ANTHROPIC_API_KEY not configured")
+    llm = _sync_client()
 
     try:
-        with client.messages.stream(
+        with llm.messages.stream(
             model=LLM_MODEL,
             max_tokens=max_tokens,
-            system=system_prompt,
+            system=_system_blocks(system_prompt),
             messages=messages
         ) as stream:
             for text in stream.text_stream:
                 yield text
+            record_usage(stream.get_final_message().usage, operation)
+    except Exception as e:
+        logger.error(f"LLM streaming error: {e}")
+        raise
+
+
+async def _create_message_async(
+    messages: List[Dict[str, Any]],
+    system_prompt: str,
+    route: Route,
+    operation: str,
+    **params: Any
+):
+    """One Messages API call under the retry policy, with latency and token metrics."""
+    llm = _async_client()
+
+    async def attempt():
+        async with _slots():
+            with LLM_IN_FLIGHT.track_inprogress():
+                return await llm.messages.create(
+                    model=route.model,
+                    max_tokens=route.max_tokens,
+                    system=_system_blocks(system_prompt),
+                    messages=messages,
+                    **params
+                )
+
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span("llm.messages.create", operation=operation, model=route.model, tier=route.tier):
+            response = await _call_with_retries(attempt)
+        record_usage(response.usage, operation, route.tier)
+        outcome = "ok"
+        return response
     except Exception as e:
+        logger.error(f"LLM error: {e}")
+        raise
+    finally:
+        LLM_LATENCY.labels(operation, route.tier, outcome).observe(time.perf_counter() - start)
+
+
+async def chat_completion_async(
+    messages: List[Dict[str, Any]],
+    system_prompt: str,
+    max_tokens: int = MAX_TOKENS,
+    operation: str = "other",
+    route: Optional[Route] = None
+) -> str:
+    """Get completion from Claude API without blocking the event loop.
+
+    `operation` labels the call's latency and token metrics (e.g. "analyze_resume").
+    `route` picks the model tier and max_tokens; without it the call uses
+    LLM_MODEL and `max_tokens`.
+    """
+    response = await _create_message_async(messages, system_prompt, route or model_router.heavy(max_tokens), operation)
+    return response.content[0].text
+
+
+async def tool_completion_async(
+    messages: List[Dict[str, Any]],
+    system_prompt: str,
+    tool: Dict[str, Any],
+    max_tokens: int = MAX_TOKENS,
+    operation: str = "other",
+    route: Optional[Route] = None
+) -> Dict[str, Any]:
+    """Force a call to `tool` and return its input: JSON shaped by the tool's input_schema.
+
+    Raises ValueError if the model answered without calling the tool.
+    """
+    response = await _create_message_async(
+        messages, system_prompt, route or model_router.heavy(max_tokens), operation,
+        tools=[tool],
+        tool_choice={"type": "tool", "name": tool["name"]}
+    )
+    for block in response.content:
+        if block.type == "tool_use" and block.name == tool["name"]:
+            return block.input
+    raise ValueError(f"LLM response did not call the {tool['name']} tool (stop reason: {response.stop_reason})")
+
+
+async def stream_completion_async(
+    messages: List[Dict[str, Any]],
+    system_prompt: str,
+    max_tokens: int = MAX_TOKENS,
+    operation: str = "other",
+    route: Optional[Route] = None
+) -> AsyncIterator[str]:
+    """Stream completion from Claude API without blocking the event loop.
+
+    Records time-to-first-token and total time under `operation` and the route's tier.
+    """
+    llm = _async_client()
+    route = route or model_router.heavy(max_tokens)
+
+    async def attempt():
+        # Only opening the stream is retried; once tokens have been yielded a
+        # failure is surfaced to the caller. The slot is held until the end.
+        await _slots().acquire()
+        manager = llm.messages.stream(
+            model=route.model,
+            max_tokens=route.max_tokens,
+            system=_system_blocks(system_prompt),
+            messages=messages
+        )
+        try:
+            return manager, await manager.__aenter__()
+        except BaseException:
+            _slots().release()
+            raise
+
+    start = time.perf_counter()
+    try:
+        # Kept to report a failure after the stream has opened
+        token = breaker.before_call()
+        manager, stream = await _call_with_retries(attempt, token)
+    except Exception as e:
+        LLM_LATENCY.labels(operation, route.tier, "error").observe(time.perf_counter() - start)
         logger.error(f"LLM streaming error: {e}")
         raise
+
+    LLM_IN_FLIGHT.inc()
+    # Stays "aborted" if the consumer stops early (e.g. the client disconnected)
+    outcome = "aborted"
+    first = True
+    try:
+        async for text in stream.text_stream:
+            if first:
+                LLM_TTFT.labels(operation, route.tier).observe(time.perf_counter() - start)
+                first = False
+            yield text
+        record_usage((await stream.get_final_message()).usage, operation, route.tier)
+        outcome = "ok"
+    except Exception as e:
+        outcome = "error"
+        if is_retryable(e):
+            breaker.record_failure(token)
+        logger.error(f"LLM streaming error: {e}")
+        raise
+    finally:
+        LLM_LATENCY.labels(operation, route.tier, outcome).observe(time.perf_counter() - start)
+        LLM_IN_FLIGHT.dec()
+        await manager.__aexit__(None, None, None)
+        _slots().release()
+
+
+async def close_clients() -> None:
+    """Close pooled HTTP connections on shutdown."""
+    global client, async_client
+    if async_client:
+        await async_client.close()
+    if client:
+        client.close()
+    client = async_client = None
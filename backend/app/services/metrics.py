@@ -0,0 +1,175 @@
+"""
+Prometheus metrics and optional OpenTelemetry tracing.
+
+Request latency is recorded by MetricsMiddleware (labelled by route template,
+not raw path); parse time, LLM latency/time-to-first-token, token usage and
+estimated cost (per model tier), in-flight calls, upload jobs and speculative
+chat replies are recorded by the services themselves. Session-store size,
+analysis-cache counters, the upload-job queue depth and the circuit state are
+sampled when /metrics is scraped. With several worker processes, set PROMETHEUS_MULTIPROC_DIR so the
+scrape aggregates all of them.
+
+Tracing is enabled only when OTEL_EXPORTER_OTLP_ENDPOINT is set and the
+opentelemetry SDK and OTLP exporter are installed.
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+from app.core.config import APP_NAME, OTEL_EXPORTER_OTLP_ENDPOINT
+
+logger = logging.getLogger(__name__)
+
+# LLM calls take seconds to tens of seconds; the default buckets stop at 10s
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency (streamed responses: until the last byte)",
+    ["method", "route", "status"]
+)
+PARSE_LATENCY = Histogram(
+    "resume_parse_duration_seconds", "Resume text extraction time", ["file_type", "outcome"]
+)
+LLM_LATENCY = Histogram(
+    "llm_call_duration_seconds", "LLM call time including retries", ["operation", "tier", "outcome"], buckets=LLM_BUCKETS
+)
+LLM_TTFT = Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed token", ["operation", "tier"], buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported by the Messages API", ["operation", "tier", "kind"]
+)
+LLM_COST = Counter(
+    "llm_cost_usd_total", "Estimated LLM spend from token usage and the configured per-tier prices", ["operation", "tier"]
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_in_flight_calls", "Outbound LLM requests currently open", multiprocess_mode="livesum"
+)
+SESSIONS = Gauge("sessions", "Sessions in the session store", multiprocess_mode="max")
+ANALYSIS_CACHE = Gauge("analysis_cache_events", "Analysis cache counters since start", ["event"])
+ADMISSION_REQUESTS = Counter(
+    "admission_requests_total", "Admission decisions (admitted, queued, rate_limited, queue_full, queue_timeout)",
+    ["outcome"]
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for the global token budget", multiprocess_mode="livesum"
+)
+UPLOAD_JOBS = Counter(
+    "upload_jobs_total", "Upload job events (submitted, duplicate, rejected, done, failed)", ["outcome"]
+)
+UPLOAD_JOB_DURATION = Histogram(
+    "upload_job_duration_seconds", "Time upload jobs spend queued and running", ["stage"], buckets=LLM_BUCKETS
+)
+UPLOAD_JOB_QUEUE_DEPTH = Gauge(
+    "upload_job_queue_depth", "Upload jobs waiting for a worker", multiprocess_mode="max"
+)
+SPECULATIONS = Counter(
+    "chat_speculations_total", "Speculative follow-up replies (started, skipped, hit, wasted, failed)", ["outcome"]
+)
+CIRCUIT_OPEN = Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open or half-open")
+
+
+def _create_tracer():
+    if not OTEL_EXPORTER_OTLP_ENDPOINT:
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk / exporter is not installed")
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": APP_NAME}))
+    # The exporter reads OTEL_EXPORTER_OTLP_ENDPOINT itself
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    logger.info(f"OpenTelemetry tracing to {OTEL_EXPORTER_OTLP_ENDPOINT}")
+    return trace.get_tracer(__name__)
+
+
+tracer = _create_tracer()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Any]]:
+    """OpenTelemetry span when tracing is configured (yielded), otherwise a no-op yielding None."""
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def record_tokens(operation: str, tier: str, counts: dict, cost: float) -> None:
+    for kind, value in counts.items():
+        if value:
+            LLM_TOKENS.labels(operation, tier, kind).inc(value)
+    LLM_COST.labels(operation, tier).inc(cost)
+
+
+async def render_metrics() -> bytes:
+    """Sample point-in-time gauges and render the Prometheus text format."""
+    # Imported here: these services record metrics themselves
+    from app.services.analysis_cache import analysis_cache
+    from app.services.llm_service import breaker
+    from app.services.session_store import session_store
+    from app.services.jobs import upload_jobs
+
+    SESSIONS.set(await session_store.count())
+    UPLOAD_JOB_QUEUE_DEPTH.set(await upload_jobs.store.depth())
+    for event, value in analysis_cache.snapshot().items():
+        ANALYSIS_CACHE.labels(event).set(value)
+    CIRCUIT_OPEN.set(0 if breaker.state == "closed" else 1)
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request until its last body chunk is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # Named after the route template once routing has run; the raw path is only an attribute
+        with span(scope["method"], **{"http.method": scope["method"], "http.target": scope["path"]}) as current:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                # Unmatched paths share one label to keep cardinality bounded
+                template: Optional[str] = getattr(route, "path", None) or "unmatched"
+                REQUEST_LATENCY.labels(scope["method"], template, str(status)).observe(time.perf_counter() - start)
+                if current is not None:
+                    current.update_name(f"{scope['method']} {template}")
+                    current.set_attribute("http.route", template)
+                    current.set_attribute("http.status_code", status)
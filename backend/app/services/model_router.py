@@ -0,0 +1,107 @@
+"""
+Tiered model routing.
+
+Each LLM call is routed by the operation that makes it (the ResumeAgent
+method) to the heavy tier (LLM_MODEL) or the light tier (LLM_LIGHT_MODEL with
+max_tokens capped at LIGHT_MAX_TOKENS). MODEL_ROUTING sets the tier per
+operation; "auto" classifies each request locally: short messages without a
+rewrite/review intent ("thanks", "what does ATS mean?") go light, everything
+else stays heavy. Operations not listed use the heavy tier.
+
+The tiers have separate prompt caches, so a conversation that alternates
+between them writes its prefix to both.
+"""
+
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import (
+    LLM_MODEL, LLM_LIGHT_MODEL, MAX_TOKENS, LIGHT_MAX_TOKENS, MODEL_ROUTING, LIGHT_TURN_MAX_CHARS,
+    LLM_PRICE_PER_MTOK, LLM_LIGHT_PRICE_PER_MTOK
+)
+
+TIERS = ("light", "heavy", "auto")
+
+# Requests for substantial writing or assessment always go to the heavy tier
+_HEAVY_INTENT = re.compile(
+    r"\b(?:re-?write|rewrit|reword|rephrase|revis|draft|writ|tailor|improv|optimi[sz]|polish|strengthen|"
+    r"review|analy[sz]|assess|evaluat|critique|feedback|compar|bullet|cover letter|summary|section|"
+    r"job description|shorten|expand|generat|creat|make (?:it|this|my))",
+    re.IGNORECASE
+)
+
+# Cache reads and writes are billed relative to the input price
+CACHE_READ_PRICE_RATIO = 0.1
+CACHE_WRITE_PRICE_RATIO = 1.25
+
+
+class Route(NamedTuple):
+    tier: str  # "light" or "heavy"
+    model: str
+    max_tokens: int
+
+
+def parse_routing(spec: str) -> Dict[str, str]:
+    """Parse "operation=tier,..." into a dict; raises ValueError on an unknown tier."""
+    routing = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        operation, _, tier = item.partition("=")
+        tier = tier.strip().lower()
+        if tier not in TIERS:
+            raise ValueError(f"MODEL_ROUTING: unknown tier '{tier}' for '{operation.strip()}' (use {', '.join(TIERS)})")
+        routing[operation.strip()] = tier
+    return routing
+
+
+def parse_prices(spec: str) -> Tuple[float, float]:
+    """Parse "input,output" USD per million tokens."""
+    input_price, output_price = (float(part) for part in spec.split(","))
+    return input_price, output_price
+
+
+def is_light_turn(message: str, max_chars: int = LIGHT_TURN_MAX_CHARS) -> bool:
+    """Local intent heuristic: short, and not asking for writing or an assessment."""
+    return len(message) <= max_chars and not _HEAVY_INTENT.search(message)
+
+
+class ModelRouter:
+    """Picks the model tier and max_tokens for each LLM call."""
+
+    def __init__(
+        self,
+        routing: Dict[str, str],
+        heavy_model: str = LLM_MODEL,
+        light_model: str = LLM_LIGHT_MODEL,
+        light_max_tokens: int = LIGHT_MAX_TOKENS
+    ):
+        self.routing = routing
+        self.heavy_model = heavy_model
+        self.light_model = light_model
+        self.light_max_tokens = light_max_tokens
+        self.prices = {"heavy": parse_prices(LLM_PRICE_PER_MTOK), "light": parse_prices(LLM_LIGHT_PRICE_PER_MTOK)}
+
+    def route(self, operation: str, text: Optional[str] = None, max_tokens: int = MAX_TOKENS) -> Route:
+        """Route for one call; `text` is the user's message for "auto" operations."""
+        tier = self.routing.get(operation, "heavy")
+        if tier == "auto":
+            tier = "light" if text is not None and is_light_turn(text) else "heavy"
+        if tier == "light":
+            return Route("light", self.light_model, min(max_tokens, self.light_max_tokens))
+        return Route("heavy", self.heavy_model, max_tokens)
+
+    def heavy(self, max_tokens: int = MAX_TOKENS) -> Route:
+        return Route("heavy", self.heavy_model, max_tokens)
+
+    def cost(self, tier: str, counts: Dict[str, int]) -> float:
+        """Estimated USD for one call's token counts (as recorded by record_usage)."""
+        input_price, output_price = self.prices[tier]
+        return (
+            counts["input_tokens"] * input_price
+            + counts["cache_read_input_tokens"] * input_price * CACHE_READ_PRICE_RATIO
+            + counts["cache_creation_input_tokens"] * input_price * CACHE_WRITE_PRICE_RATIO
+            + counts["output_tokens"] * output_price
+        ) / 1_000_000
+
+
+# Singleton instance
+model_router = ModelRouter(parse_routing(MODEL_ROUTING))
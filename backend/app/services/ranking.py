@@ -0,0 +1,304 @@
+"""
+Rank many resumes against one job description.
+
+Resumes are indexed once into an inverted index (term -> {doc_id: tf}), with
+taxonomy keywords from the ATS automaton stored as `kw:` terms so aliases
+collapse. Ranking a job description only touches the postings of its terms,
+and a document's score depends on that document and the job description
+alone, so resumes indexed after a ranking was created are scored and merged
+into it without re-scoring the rest. Only the top candidates get an LLM
+rationale.
+"""
+
+import re
+import heapq
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import (
+    RANKING_INDEX_PATH, RANKING_RATIONALE_TOP, RANKING_MAX_RANKINGS, BATCH_CONCURRENCY
+)
+from app.models.schemas import RankedResume, RankingPage
+from app.services.ats_scoring import ats_scorer
+from app.services.resume_agent import resume_agent
+from app.services.resume_parser import parse_resume_async
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_PREFIX = "kw:"
+
+# Share of the score from taxonomy keywords; the rest comes from other job-description terms
+KEYWORD_SHARE = 0.7
+
+_TOKEN = re.compile(r"[a-z][a-z0-9+#]*")
+STOPWORDS = frozenset("""
+    about above after again all also and any are as at be been before being below between both but by can
+    could did does doing down during each few for from further had has have having her here hers him his how
+    into its itself just more most must nor not now off once only other our ours out over own same she should
+    some such than that the their theirs them then there these they this those through too under until very
+    was were what when where which while who whom why will with within would you your yours able across work
+    working experience years year team teams role join looking ideal candidate strong including plus etc
+""".split())
+
+
+def term_counts(text: str) -> Counter:
+    """Content words plus canonical taxonomy keywords found in `text`."""
+    counts = Counter(t for t in _TOKEN.findall(text.lower()) if len(t) > 2 and t not in STOPWORDS)
+    counts.update(KEYWORD_PREFIX + keyword for _, keyword in ats_scorer.automaton.search(text))
+    return counts
+
+
+class JobQuery:
+    """Weighted terms of a job description."""
+
+    def __init__(self, job_description: str):
+        self.job_description = job_description
+        counts = term_counts(job_description)
+        self.keywords = {
+            term[len(KEYWORD_PREFIX):]: float(min(count, 3))
+            for term, count in counts.items() if term.startswith(KEYWORD_PREFIX)
+        }
+        self.terms = {term: float(min(count, 3)) for term, count in counts.items() if not term.startswith(KEYWORD_PREFIX)}
+        if not self.terms and not self.keywords:
+            raise ValueError("The job description has no searchable terms")
+        # Most important keywords first, for matched/missing lists
+        self.ranked_keywords = sorted(self.keywords, key=lambda k: (-self.keywords[k], k))
+
+
+class IndexedResume:
+    __slots__ = ("doc_id", "name", "text", "terms", "seq")
+
+    def __init__(self, doc_id: str, name: str, text: str, terms: Counter, seq: int):
+        self.doc_id = doc_id
+        self.name = name
+        self.text = text
+        self.terms = terms
+        self.seq = seq
+
+
+class ResumeIndex:
+    """In-memory inverted index, optionally persisted (documents only) to sqlite."""
+
+    def __init__(self, path: str = ""):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.documents: Dict[str, IndexedResume] = {}
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ranking_documents (doc_id TEXT PRIMARY KEY, name TEXT NOT NULL, text TEXT NOT NULL)"
+            )
+            self._conn.commit()
+            rows = self._conn.execute("SELECT doc_id, name, text FROM ranking_documents ORDER BY rowid").fetchall()
+            for doc_id, name, text in rows:
+                self._index(doc_id, name, text)
+            logger.info(f"Loaded {len(rows)} resumes into the ranking index from {path}")
+
+    def _index(self, doc_id: str, name: str, text: str) -> None:
+        self._unindex(doc_id)
+        self.seq += 1
+        terms = term_counts(text)
+        self.documents[doc_id] = IndexedResume(doc_id, name, text, terms, self.seq)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def _unindex(self, doc_id: str) -> None:
+        document = self.documents.pop(doc_id, None)
+        if document is None:
+            return
+        for term in document.terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def add(self, doc_id: str, name: str, text: str) -> None:
+        """Index (or re-index) one resume."""
+        self._index(doc_id, name, text)
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ranking_documents (doc_id, name, text) VALUES (?, ?, ?)",
+                    (doc_id, name, text)
+                )
+                self._conn.commit()
+
+    def remove(self, doc_id: str) -> None:
+        self._unindex(doc_id)
+        self.seq += 1
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM ranking_documents WHERE doc_id = ?", (doc_id,))
+                self._conn.commit()
+
+    def added_since(self, seq: int) -> List[str]:
+        return [doc.doc_id for doc in self.documents.values() if doc.seq > seq]
+
+    def score(self, query: JobQuery, doc_ids: Optional[List[str]] = None) -> Dict[str, float]:
+        """0-100 fit scores, accumulated from the postings of the query's terms only."""
+        restrict = set(doc_ids) if doc_ids is not None else None
+        keyword_total = sum(query.keywords.values())
+        term_total = sum(query.terms.values())
+        keyword_share = KEYWORD_SHARE if keyword_total and term_total else (1.0 if keyword_total else 0.0)
+
+        scores: Dict[str, float] = {}
+        for keyword, weight in query.keywords.items():
+            for doc_id in self.postings.get(KEYWORD_PREFIX + keyword, ()):
+                if restrict is None or doc_id in restrict:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + 100 * keyword_share * weight / keyword_total
+        for term, weight in query.terms.items():
+            for doc_id, tf in self.postings.get(term, {}).items():
+                if restrict is None or doc_id in restrict:
+                    # Saturating term frequency: repeating a word adds little
+                    gain = 100 * (1 - keyword_share) * weight * (tf / (tf + 1.0)) / term_total
+                    scores[doc_id] = scores.get(doc_id, 0.0) + gain
+
+        # Indexed resumes with no matching term still rank (last)
+        for doc_id in (restrict if restrict is not None else self.documents):
+            if doc_id in self.documents:
+                scores.setdefault(doc_id, 0.0)
+        return scores
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+
+
+class Ranking:
+    """Scores of every indexed resume for one job description, kept current as resumes are added."""
+
+    def __init__(self, ranking_id: str, query: JobQuery, scores: Dict[str, float], seq: int):
+        self.ranking_id = ranking_id
+        self.query = query
+        self.scores = scores
+        self.seq = seq
+        self.rationales: Dict[str, str] = {}
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        """Best k (doc_id, score) pairs; ties broken by doc_id for stable pages."""
+        return heapq.nsmallest(k, self.scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class ResumeRanker:
+    """Owns the index and recent rankings; creates, refreshes and paginates rankings."""
+
+    def __init__(self, index: ResumeIndex, max_rankings: int = RANKING_MAX_RANKINGS):
+        self.index = index
+        self.max_rankings = max_rankings
+        self.rankings: "OrderedDict[str, Ranking]" = OrderedDict()
+
+    def rank(self, job_description: str) -> Ranking:
+        query = JobQuery(job_description)
+        ranking = Ranking(str(uuid.uuid4()), query, self.index.score(query), self.index.seq)
+        self.rankings[ranking.ranking_id] = ranking
+        while len(self.rankings) > self.max_rankings:
+            self.rankings.popitem(last=False)
+        return ranking
+
+    def get(self, ranking_id: str) -> Optional[Ranking]:
+        ranking = self.rankings.get(ranking_id)
+        if ranking is not None:
+            self.rankings.move_to_end(ranking_id)
+            self.refresh(ranking)
+        return ranking
+
+    def refresh(self, ranking: Ranking) -> None:
+        """Merge in resumes indexed (or re-indexed) since the ranking was computed, drop removed ones."""
+        if ranking.seq == self.index.seq:
+            return
+        changed = self.index.added_since(ranking.seq)
+        if changed:
+            ranking.scores.update(self.index.score(ranking.query, changed))
+            for doc_id in changed:
+                ranking.rationales.pop(doc_id, None)
+        for doc_id in [d for d in ranking.scores if d not in self.index.documents]:
+            del ranking.scores[doc_id]
+            ranking.rationales.pop(doc_id, None)
+        ranking.seq = self.index.seq
+
+    def _result(self, rank: int, doc_id: str, score: float, ranking: Ranking) -> RankedResume:
+        document = self.index.documents[doc_id]
+        keywords = ranking.query.ranked_keywords
+        return RankedResume(
+            rank=rank,
+            doc_id=doc_id,
+            name=document.name,
+            score=round(score, 1),
+            matched=[k for k in keywords if KEYWORD_PREFIX + k in document.terms],
+            missing=[k for k in keywords if KEYWORD_PREFIX + k not in document.terms],
+            rationale=ranking.rationales.get(doc_id)
+        )
+
+    async def index_files(self, items: List[Tuple[str, bytes]]) -> Dict[str, list]:
+        """Parse and index uploaded resumes; ids are content hashes, so re-uploads replace."""
+        async def index_one(filename: str, content: bytes):
+            text = await parse_resume_async(content, filename, wait=True)
+            if not text.strip():
+                raise ValueError("No text could be extracted")
+            doc_id = hashlib.sha256(content).hexdigest()[:16]
+            self.index.add(doc_id, filename, text)
+            return {"doc_id": doc_id, "name": filename}
+
+        results = await asyncio.gather(*(index_one(name, content) for name, content in items), return_exceptions=True)
+        indexed, errors = [], []
+        for (filename, _), result in zip(items, results):
+            if isinstance(result, Exception):
+                logger.error(f"Indexing {filename} failed: {result}")
+                errors.append({"name": filename, "error": str(result) if isinstance(result, ValueError) else "Failed to parse resume"})
+            else:
+                indexed.append(result)
+        return {"indexed": indexed, "errors": errors}
+
+    async def explain_top(self, ranking: Ranking, count: int = RANKING_RATIONALE_TOP) -> None:
+        """Fetch LLM rationales for the top `count` candidates that lack one."""
+        slots = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
+
+        async def explain(rank: int, doc_id: str, score: float):
+            result = self._result(rank, doc_id, score, ranking)
+            report = (
+                f"Local fit score: {result.score}/100 (rank {rank} of {len(ranking.scores)}). "
+                f"Matched keywords: {', '.join(result.matched) or 'none'}. "
+                f"Missing keywords: {', '.join(result.missing) or 'none'}."
+            )
+            async with slots:
+                try:
+                    ranking.rationales[doc_id] = await resume_agent.explain_fit(
+                        self.index.documents[doc_id].text, ranking.query.job_description, report
+                    )
+                except Exception as e:
+                    # A missing rationale should not fail the ranking
+                    logger.error(f"Rationale for {doc_id} failed: {e}")
+
+        await asyncio.gather(*(
+            explain(rank, doc_id, score)
+            for rank, (doc_id, score) in enumerate(ranking.top(count), start=1)
+            if doc_id not in ranking.rationales
+        ))
+
+    def page(self, ranking: Ranking, page: int, page_size: int) -> RankingPage:
+        offset = (page - 1) * page_size
+        top = ranking.top(offset + page_size)[offset:]
+        return RankingPage(
+            ranking_id=ranking.ranking_id,
+            total=len(ranking.scores),
+            page=page,
+            page_size=page_size,
+            results=[
+                self._result(offset + i, doc_id, score, ranking)
+                for i, (doc_id, score) in enumerate(top, start=1)
+            ]
+        )
+
+
+# Singleton instance
+resume_ranker = ResumeRanker(ResumeIndex(RANKING_INDEX_PATH))
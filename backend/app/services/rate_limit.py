@@ -0,0 +1,40 @@
+"""
+Rate limiting primitives.
+"""
+
+import time
+import asyncio
+
+
+class AsyncTokenBucket:
+    """Token bucket that callers await until enough budget has refilled.
+
+    `rate` tokens are added per second up to `capacity`. Waiters are served in
+    arrival order so a large request cannot be starved by small ones.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float) -> "AsyncTokenBucket":
+        return cls(rate=amount / 60.0, capacity=amount)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        # A request bigger than the bucket would wait forever; let it drain it
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= amount
@@ -0,0 +1,147 @@
+"""
+Failure handling for outbound LLM calls: retry policy and circuit breaker.
+"""
+
+import time
+import random
+import itertools
+import logging
+from collections import deque
+from typing import Deque, Optional
+
+from app.core.config import (
+    LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_RATIO, CIRCUIT_MIN_CALLS, CIRCUIT_WINDOW, CIRCUIT_RESET_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# 408 timeout, 409 lock conflict, 429 rate limited, 5xx server errors, 529 overloaded
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMUnavailableError(Exception):
+    """The LLM is overloaded, unreachable or the circuit is open; retry later."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    # Imported here so importing this module does not load the SDK
+    from anthropic import APIConnectionError, APIStatusError
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS
+    # Includes APITimeoutError
+    return isinstance(error, APIConnectionError)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested delay from a retry-after(-ms) header, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        # HTTP-date form is not used by the Anthropic API
+        return None
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's retry-after."""
+    delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Opens when most recent calls failed and fails fast until a cool-down passes.
+
+    Outcomes of the last `window` calls (after their retries) are tracked; once at least `min_calls`
+    are recorded and the failure ratio reaches `failure_ratio`, the circuit
+    opens. After `reset_seconds` one trial call is let through (half-open);
+    its outcome closes or re-opens the circuit.
+
+    Each call gets a token from before_call() and reports its outcome with it.
+    Only the trial's outcome moves the circuit out of open/half-open, and
+    only calls started since the circuit last closed can open it again; late
+    outcomes of older calls are just recorded.
+    """
+
+    def __init__(
+        self,
+        failure_ratio: float = CIRCUIT_FAILURE_RATIO,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        window: int = CIRCUIT_WINDOW,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.reset_seconds = reset_seconds
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.opened_at: Optional[float] = None
+        self._tokens = itertools.count(1)
+        # Token of the half-open trial in flight, and of the call that last closed the circuit
+        self._trial: Optional[int] = None
+        self._closed_by = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> int:
+        """Raise LLMUnavailableError if calls are currently not allowed, else return the call's token.
+
+        A half-open trial that ends without an outcome (cancelled) must give
+        the slot back with release_trial().
+        """
+        state = self.state
+        if state == "closed":
+            return next(self._tokens)
+        if state == "half_open" and self._trial is None:
+            self._trial = next(self._tokens)
+            return self._trial
+        remaining = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+        raise LLMUnavailableError("LLM circuit open", retry_after=remaining or 1.0)
+
+    def release_trial(self, token: int) -> None:
+        """Free the half-open trial slot without recording an outcome (no-op for other tokens)."""
+        if token == self._trial:
+            self._trial = None
+
+    def record_success(self, token: int) -> None:
+        self.outcomes.append(True)
+        if token != self._trial:
+            return
+        logger.info("LLM circuit closed")
+        self.outcomes.clear()
+        self.outcomes.append(True)
+        self.opened_at = None
+        self._trial = None
+        self._closed_by = token
+
+    def record_failure(self, token: int) -> None:
+        self.outcomes.append(False)
+        if token == self._trial:
+            # Trial call failed: stay open for another cool-down
+            self.opened_at = time.monotonic()
+            self._trial = None
+            return
+        if self.opened_at is not None or token < self._closed_by or len(self.outcomes) < self.min_calls:
+            return
+        failures = self.outcomes.count(False)
+        if failures / len(self.outcomes) >= self.failure_ratio:
+            logger.warning(f"LLM circuit opened: {failures}/{len(self.outcomes)} recent calls failed")
+            self.opened_at = time.monotonic()
@@ -2,13 +2,40 @@
 Expert Resume Review Agent with 20 years of experience in tech/IT/engineering hiring.
 """
 
+import json
+import asyncio
 import logging
-from typing import List, Dict, Optional
-from app.services.llm_service import chat_completion
-from app.models.schemas import Message, MessageRole
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, AsyncIterator, Sequence, Tuple
+from app.services.llm_service import (
+    chat_completion_async, stream_completion_async, tool_completion_async, cache_block, mark_cacheable
+)
+from app.services.analysis_cache import analysis_cache, cache_key
+from app.services.model_router import Route, model_router
+from app.services.ats_scoring import ats_scorer, format_ats_report, format_gap_table, resolve_role
+from app.services.corrections import format_corrections
+from app.services.structured_analysis import (
+    ANALYSIS_TOOL, DELTA_TOOL, build_analysis, cacheable_analysis, format_analysis, scores_context, merge_delta
+)
+from app.services.resume_diff import format_changes
+from app.core.config import (
+    SUMMARY_MAX_TOKENS, RANKING_RATIONALE_MAX_TOKENS, PROMPT_CACHING, STRUCTURED_ANALYSIS, REANALYSIS_MAX_TOKENS
+)
+from app.models.schemas import (
+    Message, MessageRole, Correction, KeywordGapTable, ResumeAnalysis, StructuredResume, ResumeDiff, ATSScore
+)
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_SYSTEM_PROMPT = "You maintain a faithful, compact memory of a resume coaching conversation. Never add facts that were not stated."
+
+# Bump whenever EXPERT_SYSTEM_PROMPT or a task prompt changes, so cached
+# analyses produced by the old prompts are no longer served
+PROMPT_VERSION = "2"
+
+# Chat preambles kept for reuse (one per active resume / summary / corrections state)
+PREAMBLE_CACHE_ENTRIES = 512
+
 EXPERT_SYSTEM_PROMPT = """You are an expert Resume Review Agent with over 20 years of experience in hiring for high tech, IT, and engineering industries. You have:
 
 ## Your Background
@@ -102,10 +129,12 @@ class ResumeAgent:
 
     def __init__(self):
         self.system_prompt = EXPERT_SYSTEM_PROMPT
+        self._preambles: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
 
-    def analyze_resume(self, resume_text: str) -> str:
-        """Provide initial comprehensive analysis of a resume."""
-        messages = [
+    def _analysis_messages(self, resume_text: str) -> List[Dict[str, Any]]:
+        """Build the messages for an initial resume analysis."""
+        ats_report = format_ats_report(ats_scorer.score(resume_text))
+        return [
             {
                 "role": "user",
                 "content": f"""Please analyze this resume and provide your expert assessment:
@@ -114,9 +143,11 @@ class ResumeAgent:
 {resume_text}
 ---
 
+{ats_report}
+
 Provide:
 1. Overall Score (1-10) with brief justification
-2. ATS Compatibility Score (1-10)
+2. ATS Compatibility: report the local keyword score above and explain what drives it
 3. Top 3 Strengths
 4. Top 3 Areas for Immediate Improvement
 5. Industry Fit (Tech/IT/Engineering)
@@ -127,39 +158,182 @@ Be specific, actionable, and encouraging."""
             }
         ]
 
-        return chat_completion(messages, self.system_prompt)
+    def _structured_analysis_messages(self, resume_text: str, ats: ATSScore) -> List[Dict[str, Any]]:
+        """Build the messages for an initial analysis recorded through ANALYSIS_TOOL."""
+        return [
+            {
+                "role": "user",
+                "content": f"""Please analyze this resume and record your expert assessment with the {ANALYSIS_TOOL["name"]} tool:
 
-    def chat(self, user_message: str, conversation_history: List[Message], resume_text: Optional[str] = None, user_corrections: Optional[List[str]] = None) -> str:
-        """Continue conversation with the user."""
-        messages = []
+---
+{resume_text}
+---
 
-        # ALWAYS include the original resume as source of truth at the start
-        if resume_text:
-            corrections_text = ""
-            if user_corrections:
-                corrections_text = "\n\n## USER CORRECTIONS (THESE OVERRIDE THE RESUME):\n" + "\n".join(f"- {c}" for c in user_corrections)
+{format_ats_report(ats)}
+
+Score each section of the resume, naming it as the resume does. For the bullet rewrite, quote one existing bullet exactly and rewrite it using only its facts. Be specific, actionable, and encouraging."""
+            }
+        ]
 
-            messages.append({
+    async def _cached_completion(self, key: str, messages: List[Dict[str, Any]], operation: str, route: Route) -> str:
+        cached = await analysis_cache.get(key)
+        if cached is not None:
+            return cached
+        result = await chat_completion_async(messages, self.system_prompt, operation=operation, route=route)
+        await analysis_cache.set(key, result)
+        return result
+
+    async def _cached_stream(self, key: str, messages: List[Dict[str, Any]], operation: str, route: Route) -> AsyncIterator[str]:
+        cached = await analysis_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        async for text in stream_completion_async(messages, self.system_prompt, operation=operation, route=route):
+            parts.append(text)
+            yield text
+        # Only complete responses are cached
+        await analysis_cache.set(key, "".join(parts))
+
+    async def analyze_resume(self, resume_text: str) -> str:
+        """Provide initial comprehensive analysis of a resume."""
+        route = model_router.route("analyze_resume")
+        key = cache_key("analysis", resume_text, PROMPT_VERSION, model=route.model)
+        return await self._cached_completion(key, self._analysis_messages(resume_text), "analyze_resume", route)
+
+    async def analyze_resume_structured(self, resume_text: str, structure: Optional[StructuredResume] = None) -> ResumeAnalysis:
+        """Initial analysis as a validated ResumeAnalysis (ValueError if the model's output does not fit)."""
+        ats = ats_scorer.score(resume_text, structure=structure)
+        route = model_router.route("analyze_resume")
+        key = cache_key("analysis-structured", resume_text, PROMPT_VERSION, model=route.model)
+        cached = await analysis_cache.get(key)
+        if cached is not None:
+            return build_analysis(json.loads(cached), ats.score, structure)
+
+        data = await tool_completion_async(
+            self._structured_analysis_messages(resume_text, ats), self.system_prompt, ANALYSIS_TOOL,
+            operation="analyze_resume", route=route
+        )
+        analysis = build_analysis(data, ats.score, structure)
+        await analysis_cache.set(key, cacheable_analysis(analysis))
+        return analysis
+
+    async def initial_analysis(self, resume_text: str, structure: Optional[StructuredResume] = None) -> Tuple[str, Optional[ResumeAnalysis]]:
+        """Markdown review of a new resume, plus its structure when STRUCTURED_ANALYSIS is on."""
+        if STRUCTURED_ANALYSIS:
+            try:
+                analysis = await self.analyze_resume_structured(resume_text, structure)
+                return format_analysis(analysis), analysis
+            except ValueError as e:
+                logger.warning(f"Structured analysis unusable ({e}); falling back to free-form")
+        return await self.analyze_resume(resume_text), None
+
+    def _delta_review_messages(self, previous: ResumeAnalysis, changes: str, ats_score: int) -> List[Dict[str, Any]]:
+        """Build the messages for reviewing the changes to a previously analyzed resume."""
+        return [
+            {
                 "role": "user",
-                "content": f"""## ORIGINAL RESUME (SOURCE OF TRUTH FOR ALL FACTS):
+                "content": f"""{scores_context(previous)}
+
+The user has uploaded a revised resume. These are the changes ("-" removed, "+" added lines):
+
+---
+{changes}
+---
+
+Local ATS keyword score: {ats_score}/100 (was {previous.ats_score}/100).
+
+Review only these changes and record the result with the {DELTA_TOOL["name"]} tool: re-score every changed or added section (naming it as the resume does), re-score the resume overall, and update the top areas still to improve. Be specific, actionable, and encouraging."""
+            }
+        ]
+
+    async def delta_review(self, previous: ResumeAnalysis, diff: ResumeDiff, resume_text: str, structure: StructuredResume) -> ResumeAnalysis:
+        """Previous analysis updated from a review of only the changed sections (ValueError if the output does not fit)."""
+        ats = ats_scorer.score(resume_text, structure=structure)
+        changes = format_changes(diff)
+        route = model_router.route("delta_review", max_tokens=REANALYSIS_MAX_TOKENS)
+        key = cache_key("analysis-delta", resume_text, PROMPT_VERSION, scores_context(previous), model=route.model)
+        cached = await analysis_cache.get(key)
+        if cached is not None:
+            return merge_delta(previous, json.loads(cached), ats.score, structure, diff, resume_text)
+
+        data = await tool_completion_async(
+            self._delta_review_messages(previous, changes, ats.score), self.system_prompt, DELTA_TOOL,
+            operation="delta_review", route=route
+        )
+        analysis = merge_delta(previous, data, ats.score, structure, diff, resume_text)
+        await analysis_cache.set(key, json.dumps(data))
+        return analysis
+
+    async def analyze_resume_stream(self, resume_text: str) -> AsyncIterator[str]:
+        """Stream the initial resume analysis as text chunks."""
+        route = model_router.route("analyze_resume")
+        key = cache_key("analysis", resume_text, PROMPT_VERSION, model=route.model)
+        async for text in self._cached_stream(key, self._analysis_messages(resume_text), "analyze_resume", route):
+            yield text
+
+    def _chat_preamble(self, resume_text: str, user_corrections: Optional[List[Correction]], conversation_summary: Optional[str]) -> List[Dict[str, Any]]:
+        """Resume / summary / corrections preamble, reused while its inputs are unchanged."""
+        key = (resume_text, conversation_summary, tuple((c.field, c.entity, c.text) for c in user_corrections or ()))
+        cached = self._preambles.get(key)
+        if cached is not None:
+            self._preambles.move_to_end(key)
+            return cached
+
+        # The resume is fixed for the session and cached; corrections change
+        # over time so they follow it in a separate, uncached block
+        preamble = [cache_block(f"""## ORIGINAL RESUME (SOURCE OF TRUTH FOR ALL FACTS):
 ---
 {resume_text}
 ---
-{corrections_text}
 
-IMPORTANT: When improving or rewriting this resume, you MUST use ONLY the facts from this original resume and any user corrections above. Do not invent or change any names, dates, companies, schools, job titles, or other factual information."""
+IMPORTANT: When improving or rewriting this resume, you MUST use ONLY the facts from this original resume and any user corrections. Do not invent or change any names, dates, companies, schools, job titles, or other factual information.""")]
+        if conversation_summary:
+            # Changes only when older turns are folded in, so it is cached too
+            preamble.append(cache_block(f"## SUMMARY OF EARLIER CONVERSATION:\n{conversation_summary}"))
+        if user_corrections:
+            preamble.append({
+                "type": "text",
+                "text": format_corrections(user_corrections)
             })
-            messages.append({
+
+        messages = [
+            {
+                "role": "user",
+                "content": preamble
+            },
+            {
                 "role": "assistant",
                 "content": "I understand. I will ONLY use factual information from the original resume you provided and any corrections you give me. I will never invent or hallucinate any details like company names, school names, job titles, dates, or achievements. How can I help you improve your resume today?"
-            })
+            }
+        ]
+        self._preambles[key] = messages
+        if len(self._preambles) > PREAMBLE_CACHE_ENTRIES:
+            self._preambles.popitem(last=False)
+        return messages
+
+    def _chat_messages(self, user_message: str, conversation_history: Sequence[Any], resume_text: Optional[str] = None, user_corrections: Optional[List[Correction]] = None, conversation_summary: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Build the messages for a conversation turn.
+
+        `conversation_history` is either Messages API dicts (as rendered by
+        ConversationHistory.render) or Message objects. The resume preamble
+        and the latest history turn end cacheable prefixes, so each turn
+        re-reads everything before the new message from cache.
+        """
+        messages = []
+
+        # ALWAYS include the original resume as source of truth at the start
+        if resume_text:
+            messages.extend(self._chat_preamble(resume_text, user_corrections, conversation_summary))
 
         # Add conversation history
-        for msg in conversation_history:
-            messages.append({
-                "role": msg.role.value,
-                "content": msg.content
-            })
+        messages.extend(
+            msg if isinstance(msg, dict) else {"role": msg.role.value, "content": msg.content}
+            for msg in conversation_history
+        )
+
+        if conversation_history:
+            messages[-1] = mark_cacheable(messages[-1])
 
         # Add current message
         messages.append({
@@ -167,36 +341,202 @@ IMPORTANT: When improving or rewriting this resume, you MUST use ONLY the facts
             "content": user_message
         })
 
-        return chat_completion(messages, self.system_prompt)
+        return messages
 
-    def suggest_improvements(self, resume_text: str, target_role: str, target_company: Optional[str] = None) -> str:
-        """Suggest specific improvements for a target role."""
+    async def chat(self, user_message: str, conversation_history: Sequence[Any], resume_text: Optional[str] = None, user_corrections: Optional[List[Correction]] = None, conversation_summary: Optional[str] = None, operation: str = "chat") -> str:
+        """Continue conversation with the user; `operation` labels the call's metrics (e.g. "chat_speculative")."""
+        messages = self._chat_messages(user_message, conversation_history, resume_text, user_corrections, conversation_summary)
+        return await chat_completion_async(messages, self.system_prompt, operation=operation, route=model_router.route("chat", user_message))
+
+    async def chat_stream(self, user_message: str, conversation_history: Sequence[Any], resume_text: Optional[str] = None, user_corrections: Optional[List[Correction]] = None, conversation_summary: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a conversation turn as text chunks."""
+        messages = self._chat_messages(user_message, conversation_history, resume_text, user_corrections, conversation_summary)
+        route = model_router.route("chat", user_message)
+        async for text in stream_completion_async(messages, self.system_prompt, operation="chat", route=route):
+            yield text
+
+    def _improvement_messages(self, resume_text: str, target_role: str, target_company: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Build the messages for role-targeted improvement suggestions."""
         company_context = f" at {target_company}" if target_company else ""
+        try:
+            ats_report = "\n\n" + format_ats_report(ats_scorer.score(resume_text, target_role))
+        except ValueError:
+            # Role outside the keyword taxonomy: the LLM judges keywords on its own
+            ats_report = ""
 
-        messages = [
+        return [
             {
                 "role": "user",
-                "content": f"""Based on this resume:
+                "content": [
+                    # Shared by every target role for the same resume
+                    cache_block(f"""Based on this resume:
 
 ---
 {resume_text}
----
+---"""),
+                    {
+                        "type": "text",
+                        "text": f"""I'm targeting a {target_role} position{company_context}.{ats_report}
 
-I'm targeting a {target_role} position{company_context}.
+Please provide:
+1. How well does my current resume match this target? (1-10)
+2. 5 specific changes I should make to better align with this role
+3. Keywords I should add (start from any missing keywords listed above)
+4. Experiences I should emphasize more
+5. Anything I should remove or de-emphasize
+6. A rewritten version of my most impactful bullet point tailored to this role"""
+                    }
+                ]
+            }
+        ]
+
+    async def suggest_improvements(self, resume_text: str, target_role: str, target_company: Optional[str] = None) -> str:
+        """Suggest specific improvements for a target role."""
+        route = model_router.route("suggest_improvements")
+        key = cache_key("improve", resume_text, PROMPT_VERSION, target_role, target_company, model=route.model)
+        messages = self._improvement_messages(resume_text, target_role, target_company)
+        return await self._cached_completion(key, messages, "suggest_improvements", route)
+
+    async def suggest_improvements_stream(self, resume_text: str, target_role: str, target_company: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream targeted improvement suggestions as text chunks."""
+        route = model_router.route("suggest_improvements")
+        key = cache_key("improve", resume_text, PROMPT_VERSION, target_role, target_company, model=route.model)
+        messages = self._improvement_messages(resume_text, target_role, target_company)
+        async for text in self._cached_stream(key, messages, "suggest_improvements", route):
+            yield text
+
+    def _multi_improvement_messages(self, resume_text: str, gap_report: str, target_role: str, target_company: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Messages for one target of a multi-role request; everything but the last block is shared."""
+        company_context = f" at {target_company}" if target_company else ""
+        role = resolve_role(target_role)
+        gaps = f"Its keyword gaps are the rows listing {role} in the table above." if role else "It has no keyword list; judge its keywords yourself."
+        return [
+            {
+                "role": "user",
+                "content": [
+                    cache_block(f"""Based on this resume:
+
+---
+{resume_text}
+---"""),
+                    # Identical for every target of the request
+                    cache_block(gap_report),
+                    {
+                        "type": "text",
+                        "text": f"""I'm targeting a {target_role} position{company_context}. {gaps}
 
 Please provide:
 1. How well does my current resume match this target? (1-10)
 2. 5 specific changes I should make to better align with this role
-3. Keywords I should add
+3. Keywords I should add (start from the missing keywords in the table)
 4. Experiences I should emphasize more
 5. Anything I should remove or de-emphasize
 6. A rewritten version of my most impactful bullet point tailored to this role"""
+                    }
+                ]
             }
         ]
 
-        return chat_completion(messages, self.system_prompt)
+    async def suggest_improvements_multi(
+        self,
+        resume_text: str,
+        targets: List[Tuple[str, Optional[str]]],
+        gaps: Optional[KeywordGapTable] = None
+    ) -> AsyncIterator[Tuple[int, Optional[str], Optional[Exception]]]:
+        """Suggestions for several (role, company) targets, yielded as (index, text, error) as each completes.
+
+        The keyword-gap table is computed once and shared by every call. The
+        calls run concurrently, except that with prompt caching the first one
+        runs alone until its first token arrives, so the shared resume + gap
+        prefix is cached before the others read it.
+        """
+        gap_report = format_gap_table(gaps or ats_scorer.gap_table(resume_text, [role for role, _ in targets]))
+        route = model_router.route("suggest_improvements")
+        primed = asyncio.Event()
+        if not PROMPT_CACHING:
+            primed.set()
+
+        async def run(index: int, role: str, company: Optional[str]):
+            key = cache_key("improve-multi", resume_text, PROMPT_VERSION, role, company, model=route.model)
+            messages = self._multi_improvement_messages(resume_text, gap_report, role, company)
+            if index > 0:
+                await primed.wait()
+            parts = []
+            try:
+                async for text in self._cached_stream(key, messages, "suggest_improvements", route):
+                    primed.set()
+                    parts.append(text)
+            except Exception as e:
+                return index, None, e
+            finally:
+                primed.set()
+            return index, "".join(parts), None
+
+        tasks = [asyncio.create_task(run(i, role, company)) for i, (role, company) in enumerate(targets)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: stop the remaining calls
+            for task in tasks:
+                task.cancel()
+
+    async def summarize_conversation(self, previous_summary: Optional[str], messages: List[Message]) -> str:
+        """Fold older conversation turns into the running summary."""
+        transcript = "\n\n".join(f"{msg.role.value.upper()}: {msg.content}" for msg in messages)
+        content = f"""Update the running summary of this resume coaching conversation.
+
+Previous summary:
+---
+{previous_summary or "(none yet)"}
+---
+
+New turns to fold in:
+---
+{transcript}
+---
+
+Write the updated summary as concise bullet points. Keep every fact the user stated or confirmed about their background, every correction they made, their target roles/companies, the scores and key findings you gave, and any rewrites they accepted. Drop pleasantries and repetition."""
+
+        return await chat_completion_async(
+            [{"role": "user", "content": content}],
+            SUMMARY_SYSTEM_PROMPT,
+            operation="summarize_conversation",
+            route=model_router.route("summarize_conversation", max_tokens=SUMMARY_MAX_TOKENS)
+        )
+
+    async def explain_fit(self, resume_text: str, job_description: str, fit_report: str) -> str:
+        """Short recruiter-facing rationale for a resume's rank against a job description."""
+        route = model_router.route("explain_fit", max_tokens=RANKING_RATIONALE_MAX_TOKENS)
+        key = cache_key("fit", resume_text, PROMPT_VERSION, job_description, model=route.model)
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    # Shared by every candidate ranked against this job description
+                    cache_block(f"""Job description:
+
+---
+{job_description}
+---"""),
+                    {
+                        "type": "text",
+                        "text": f"""Candidate resume:
+
+---
+{resume_text}
+---
+
+{fit_report}
+
+In 3-4 sentences for a recruiter, explain how well this candidate fits the job description: the strongest evidence of fit and the most important gaps. Use only facts from the resume."""
+                    }
+                ]
+            }
+        ]
+        return await self._cached_completion(key, messages, "explain_fit", route)
 
-    def rewrite_section(self, section_text: str, section_type: str, context: str = "") -> str:
+    async def rewrite_section(self, section_text: str, section_type: str, context: str = "") -> str:
         """Rewrite a specific section of the resume."""
         messages = [
             {
@@ -217,7 +557,7 @@ Provide:
             }
         ]
 
-        return chat_completion(messages, self.system_prompt)
+        return await chat_completion_async(messages, self.system_prompt, operation="rewrite_section", route=model_router.route("rewrite_section"))
 
 
 # Singleton instance
@@ -0,0 +1,100 @@
+"""
+Resume diffing for incremental re-analysis.
+
+A re-uploaded resume is compared with the session's previous version through
+the sectionizer's structure: sections are paired by kind and title (then by
+kind, for a renamed heading) and changed sections are diffed line by line,
+ignoring whitespace; changed lines are attributed to the experience/education
+entries that hold them. The delta review sends the model only these changed
+lines. No LLM calls.
+"""
+
+import difflib
+from typing import List, Optional, Tuple
+
+from app.models.schemas import StructuredResume, ParsedSection, SectionChange, ResumeDiff
+from app.services.analysis_cache import normalize_text
+
+
+def _lines(text: str) -> List[str]:
+    return [line for line in (normalize_text(raw) for raw in text.splitlines()) if line]
+
+
+def line_diff(old: str, new: str) -> List[str]:
+    """Removed and added lines ("- " / "+ "), in resume order."""
+    old_lines, new_lines = _lines(old), _lines(new)
+    diff = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag != "equal":
+            diff.extend(f"- {line}" for line in old_lines[i1:i2])
+            diff.extend(f"+ {line}" for line in new_lines[j1:j2])
+    return diff
+
+
+def _same(old: str, new: str) -> bool:
+    return normalize_text(old) == normalize_text(new)
+
+
+def _pair_sections(old: StructuredResume, new: StructuredResume) -> Tuple[List[Tuple[Optional[ParsedSection], ParsedSection]], List[ParsedSection]]:
+    """(previous, new) pairs for every new section, plus the previous sections left unpaired."""
+    unpaired = list(old.sections)
+    pairs = []
+    for section in new.sections:
+        title = normalize_text(section.title).lower()
+        match = next((s for s in unpaired if s.kind == section.kind and normalize_text(s.title).lower() == title), None)
+        # A renamed heading of the same kind ("Experience" -> "Work History"); unmodelled sections only pair by title
+        if match is None and section.kind != "other":
+            match = next((s for s in unpaired if s.kind == section.kind), None)
+        if match is not None:
+            unpaired.remove(match)
+        pairs.append((match, section))
+    return pairs, unpaired
+
+
+def _touched_entries(old: ParsedSection, new: ParsedSection, diff: List[str]) -> List[str]:
+    """Headings of the entries holding the changed lines (new entries for added lines, old for removed)."""
+    added = {line[2:] for line in diff if line.startswith("+ ")}
+    removed = {line[2:] for line in diff if line.startswith("- ")}
+    touched = []
+    for entries, lines in ((new.entries, added), (old.entries, removed)):
+        for entry in entries:
+            if entry.heading not in touched and lines.intersection(_lines(entry.content)):
+                touched.append(entry.heading)
+    return touched
+
+
+def diff_resumes(old: StructuredResume, new: StructuredResume, new_text: str) -> ResumeDiff:
+    """Section-by-section changes from the previous resume to the new one."""
+    result = ResumeDiff(total_chars=len(normalize_text(new_text)))
+    pairs, removed = _pair_sections(old, new)
+    for match, section in pairs:
+        if match is None:
+            diff = line_diff("", section.content)
+            result.changes.append(SectionChange(name=section.title, kind=section.kind, status="added", diff=diff))
+        elif _same(match.content, section.content):
+            result.unchanged.append(section.title)
+            continue
+        else:
+            diff = line_diff(match.content, section.content)
+            entries = _touched_entries(match, section, diff)
+            result.changes.append(SectionChange(name=section.title, kind=section.kind, status="changed", entries=entries, diff=diff))
+        result.changed_chars += sum(len(line) - 2 for line in diff)
+    for section in removed:
+        result.changes.append(SectionChange(name=section.title, kind=section.kind, status="removed"))
+        result.changed_chars += len(normalize_text(section.content))
+    return result
+
+
+def format_changes(diff: ResumeDiff) -> str:
+    """The changes as prompt text: changed and added lines per section, removed sections by name."""
+    blocks = []
+    for change in diff.changes:
+        lines = [f"### {change.name} ({change.status})"]
+        if change.entries:
+            lines.append(f"Entries: {'; '.join(change.entries)}")
+        if change.status != "removed":
+            lines.extend(change.diff)
+        blocks.append("\n".join(lines))
+    if diff.unchanged:
+        blocks.append(f"Unchanged sections: {', '.join(diff.unchanged)}")
+    return "\n\n".join(blocks)
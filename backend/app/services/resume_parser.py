@@ -1,51 +1,306 @@
 import io
+import os
+import time
+import signal
+import asyncio
 import logging
-from typing import Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, Optional
+
+from app.core.config import (
+    PARSER_WORKERS, PARSER_MAX_PENDING, PARSE_TIMEOUT_SECONDS, MAX_UPLOAD_BYTES, MAX_PDF_PAGES
+)
+from app.services.metrics import PARSE_LATENCY, span
 
 logger = logging.getLogger(__name__)
 
+PREVIEW_CHARS = 500
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Extra time the event loop waits past PARSE_TIMEOUT_SECONDS for the worker's own deadline to fire
+PARSE_TIMEOUT_GRACE_SECONDS = 2.0
+
+
+async def read_upload(file, limit: int = MAX_UPLOAD_BYTES) -> bytes:
+    """Read an uploaded file in chunks, raising ValueError as soon as it exceeds `limit` bytes."""
+    if file.size is not None and file.size > limit:
+        raise ValueError(f"File too large ({file.size} bytes, limit {limit})")
+    chunks, size = [], 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > limit:
+            raise ValueError(f"File too large (over {limit} bytes)")
+        chunks.append(chunk)
+
+
+def iter_pdf_chunks(file_content: bytes) -> Iterator[str]:
+    """Yield the text of each PDF page in order; pages are extracted lazily."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(file_content))
+    if len(reader.pages) > MAX_PDF_PAGES:
+        raise ValueError(f"PDF has {len(reader.pages)} pages (limit {MAX_PDF_PAGES})")
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+
+def _iter_docx_blocks(container) -> Iterator[str]:
+    """Yield paragraph, text box and table text from a DOCX block container in document order."""
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                cells = []
+                seen = set()
+                for cell in row.cells:
+                    # Merged cells repeat the same underlying element
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    text = "\n".join(chunk for chunk in _iter_docx_blocks(cell) if chunk)
+                    if text:
+                        cells.append(text)
+                if cells:
+                    yield " | ".join(cells)
+            continue
+
+        yield block.text
+        # Text boxes live inside runs, which Paragraph.text skips. Word writes
+        # each one twice (DrawingML plus a VML fallback); read only the first.
+        for textbox in block._p.iter(qn("w:txbxContent")):
+            if any(True for _ in textbox.iterancestors(_MC_FALLBACK)):
+                continue
+            for p in textbox.iter(qn("w:p")):
+                yield Paragraph(p, block).text
+
+
+def iter_docx_chunks(file_content: bytes) -> Iterator[str]:
+    """Yield DOCX text blocks: headers, body (paragraphs, tables, text boxes), then footers."""
+    from docx import Document
+    doc = Document(io.BytesIO(file_content))
+
+    def header_footer_chunks(parts) -> Iterator[str]:
+        # Sections usually share (link to) the same header/footer
+        seen = set()
+        for part in parts:
+            text = "\n".join(chunk for chunk in _iter_docx_blocks(part) if chunk)
+            if text and text not in seen:
+                seen.add(text)
+                yield text
+
+    yield from header_footer_chunks(section.header for section in doc.sections)
+    yield from _iter_docx_blocks(doc)
+    yield from header_footer_chunks(section.footer for section in doc.sections)
 
-def parse_pdf(file_content: bytes) -> str:
+
+def join_chunks(chunks: Iterable[str], max_chars: Optional[int] = None) -> str:
+    """Join text chunks with newlines in one pass, stopping once max_chars is reached."""
+    if max_chars is None:
+        return "\n".join(chunks).strip()
+
+    parts = []
+    total = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        total += len(chunk) + 1
+        if total >= max_chars:
+            # Stop pulling chunks, so the rest of the document is never extracted
+            break
+    return "\n".join(parts).strip()[:max_chars]
+
+
+def parse_pdf(file_content: bytes, max_chars: Optional[int] = None) -> str:
     """Parse PDF file and extract text."""
     try:
-        from PyPDF2 import PdfReader
-        reader = PdfReader(io.BytesIO(file_content))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        return join_chunks(iter_pdf_chunks(file_content), max_chars)
     except Exception as e:
         logger.error(f"Error parsing PDF: {e}")
         raise ValueError(f"Failed to parse PDF: {e}")
 
 
-def parse_docx(file_content: bytes) -> str:
+def parse_docx(file_content: bytes, max_chars: Optional[int] = None) -> str:
     """Parse DOCX file and extract text."""
     try:
-        from docx import Document
-        doc = Document(io.BytesIO(file_content))
-        text = ""
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-        return text.strip()
+        return join_chunks(iter_docx_chunks(file_content), max_chars)
     except Exception as e:
         logger.error(f"Error parsing DOCX: {e}")
         raise ValueError(f"Failed to parse DOCX: {e}")
 
 
-def parse_resume(file_content: bytes, filename: str) -> str:
-    """Parse resume file based on extension."""
+def parse_resume(file_content: bytes, filename: str, max_chars: Optional[int] = None) -> str:
+    """Parse resume file based on extension.
+
+    With max_chars, extraction stops once that many characters are available
+    (used for previews).
+    """
     filename_lower = filename.lower()
 
     if filename_lower.endswith('.pdf'):
-        return parse_pdf(file_content)
+        return parse_pdf(file_content, max_chars)
     elif filename_lower.endswith('.docx'):
-        return parse_docx(file_content)
+        return parse_docx(file_content, max_chars)
     elif filename_lower.endswith('.txt'):
-        return file_content.decode('utf-8')
+        return file_content.decode('utf-8')[:max_chars]
     else:
         # Try to decode as text
         try:
-            return file_content.decode('utf-8')
+            return file_content.decode('utf-8')[:max_chars]
         except:
             raise ValueError(f"Unsupported file format: {filename}")
+
+
+def resume_preview(resume_text: str, length: int = PREVIEW_CHARS) -> str:
+    """Truncated resume text shown back to the user."""
+    return resume_text[:length] + "..." if len(resume_text) > length else resume_text
+
+
+# Process pool for CPU-bound PDF/DOCX extraction, so parsing never holds the
+# API worker's GIL or event loop
+_pool: Optional[ProcessPoolExecutor] = None
+_pending: Optional[asyncio.Semaphore] = None
+
+
+def _warm_worker() -> None:
+    """Import the parser libraries once per worker process."""
+    import PyPDF2  # noqa: F401
+    import docx  # noqa: F401
+
+
+def _noop() -> None:
+    pass
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PARSER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker
+        )
+    return _pool
+
+
+async def start_parser_pool() -> None:
+    """Spawn and warm every parser worker ahead of the first upload."""
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(PARSER_WORKERS)))
+    logger.info(f"Parser pool ready with {PARSER_WORKERS} workers")
+
+
+def shutdown_parser_pool() -> None:
+    """Stop the parser workers."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _retire_pool() -> None:
+    # A parse that ignored its in-worker deadline still occupies a worker.
+    # New parses go to a fresh pool; the old one takes no more jobs but lets
+    # the parses already running on it finish, then its workers exit.
+    global _pool
+    if _pool is None:
+        return
+    _pool.shutdown(wait=False)
+    _pool = None
+
+
+class ParserBusyError(Exception):
+    """Every parser slot (PARSER_MAX_PENDING) is taken; retry later."""
+
+    def __init__(self, message: str = "Resume parser is busy, please retry shortly", retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ParseDeadlineExceeded(BaseException):
+    """Raised inside a pool worker when its parse runs out of time.
+
+    A BaseException, so the parsers' `except Exception` wrappers let it through.
+    """
+
+
+def _on_parse_deadline(signum, frame) -> None:
+    raise ParseDeadlineExceeded()
+
+
+def _parse_with_deadline(file_content: bytes, filename: str, max_chars: Optional[int], timeout: float) -> str:
+    """parse_resume in a pool worker, aborted by SIGALRM after `timeout` seconds so the worker survives."""
+    if not hasattr(signal, "setitimer"):
+        return parse_resume(file_content, filename, max_chars)
+    previous = signal.signal(signal.SIGALRM, _on_parse_deadline)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return parse_resume(file_content, filename, max_chars)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _needs_pool(filename: str) -> bool:
+    return filename.lower().endswith(('.pdf', '.docx'))
+
+
+async def parse_resume_async(file_content: bytes, filename: str, max_chars: Optional[int] = None, wait: bool = False) -> str:
+    """Parse a resume off the event loop, enforcing size and time limits.
+
+    Raises ParserBusyError when PARSER_MAX_PENDING parses are already waiting,
+    unless `wait` is set: background callers (batches, indexing) then queue
+    for a slot instead.
+    """
+    file_type = os.path.splitext(filename.lower())[1].lstrip(".") or "unknown"
+    if file_type not in ("pdf", "docx", "txt"):
+        file_type = "other"
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span("resume.parse", file_type=file_type, size=len(file_content)):
+            text = await _parse_resume_async(file_content, filename, max_chars, wait)
+        outcome = "ok"
+        return text
+    finally:
+        PARSE_LATENCY.labels(file_type, outcome).observe(time.perf_counter() - start)
+
+
+async def _parse_resume_async(file_content: bytes, filename: str, max_chars: Optional[int], wait: bool) -> str:
+    global _pending
+    if len(file_content) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"File too large ({len(file_content)} bytes, limit {MAX_UPLOAD_BYTES})")
+
+    if not _needs_pool(filename):
+        return parse_resume(file_content, filename, max_chars)
+
+    if _pending is None:
+        _pending = asyncio.Semaphore(PARSER_MAX_PENDING)
+    if _pending.locked() and not wait:
+        raise ParserBusyError()
+
+    async with _pending:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_pool(), _parse_with_deadline, file_content, filename, max_chars, PARSE_TIMEOUT_SECONDS)
+        try:
+            return await asyncio.wait_for(future, PARSE_TIMEOUT_SECONDS + PARSE_TIMEOUT_GRACE_SECONDS)
+        except ParseDeadlineExceeded:
+            # Only this parse was stopped; its worker carries on
+            logger.error(f"Parsing {filename} exceeded {PARSE_TIMEOUT_SECONDS}s")
+            raise ValueError("Timed out parsing resume")
+        except asyncio.TimeoutError:
+            logger.error(f"Parsing {filename} exceeded {PARSE_TIMEOUT_SECONDS}s and did not stop, replacing parser pool")
+            _retire_pool()
+            raise ValueError("Timed out parsing resume")
+        except BrokenProcessPool:
+            logger.error(f"Parser worker died while parsing {filename}, restarting parser pool")
+            shutdown_parser_pool()
+            raise ValueError("Failed to parse resume")
@@ -0,0 +1,177 @@
+"""
+Deterministic resume sectionizer.
+
+Splits parsed resume text into contact, summary, experience, education,
+skills and other sections (with per-entry splits for experience and
+education), keeping character offsets into the original text. No LLM calls;
+a typical resume is sectionized in well under a millisecond.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from app.models.schemas import StructuredResume, ParsedSection, ResumeEntry
+
+# Heading keywords, checked in order; the first match decides the kind
+SECTION_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("skills", ("skill", "technologies", "technical proficienc", "tools", "competenc", "tech stack")),
+    ("experience", ("experience", "employment", "work history", "career history", "professional background")),
+    ("education", ("education", "academic", "degrees")),
+    ("summary", ("summary", "profile", "objective", "about me", "overview")),
+    ("projects", ("project",)),
+    ("certifications", ("certification", "licens", "awards", "honors", "publications")),
+]
+
+# Sections whose bodies are a list of entries (title/date lines + bullets)
+ENTRY_SECTIONS = ("experience", "education", "projects")
+
+_BULLET = re.compile(r"^\s*(?:[-*•▪●–➢>]|\d+[.)])\s+")
+_WORDS = re.compile(r"[A-Za-z&]+")
+_SEGMENT_BREAK = re.compile(r"\s*\|\s*|\s{2,}|\t")
+_DATE = re.compile(
+    r"\b(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?(?:19|20)\d{2}\b|\bpresent\b",
+    re.IGNORECASE
+)
+
+
+def classify_heading(line: str) -> Optional[str]:
+    """Section kind if `line` looks like a section heading, else None."""
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 60 or _BULLET.match(line) or _DATE.search(stripped):
+        return None
+    words = _WORDS.findall(stripped)
+    if not words or len(words) > 6:
+        return None
+
+    lowered = stripped.lower()
+    for kind, keywords in SECTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            # Keyword headings may be Title Case ("Work Experience"); ordinary
+            # sentences that mention a keyword are not headings
+            if stripped.isupper() or line.rstrip().endswith(":") or all(w[0].isupper() or w == "&" for w in words):
+                return kind
+            return None
+    # Unrecognised all-caps line of a few words: a section we don't model
+    if stripped.isupper() and len(words) <= 4 and len(stripped) >= 4:
+        return "other"
+    return None
+
+
+def _lines_with_offsets(text: str) -> List[Tuple[int, str]]:
+    offsets = []
+    position = 0
+    for line in text.splitlines(keepends=True):
+        offsets.append((position, line.rstrip("\r\n")))
+        position += len(line)
+    return offsets
+
+
+def _trimmed_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink [start, end) so it does not begin or end with whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split_entries(text: str, lines: List[Tuple[int, str]], end: int) -> List[ResumeEntry]:
+    """Split a section body into entries: one or more heading lines followed by bullets."""
+    entries = []
+    entry_start = None
+    seen_bullet = False
+    heading = ""
+
+    def close(stop: int):
+        start, stop = _trimmed_span(text, entry_start, stop)
+        if start < stop:
+            entries.append(ResumeEntry(heading=heading, content=text[start:stop], start=start, end=stop))
+
+    for offset, line in lines:
+        if not line.strip():
+            continue
+        is_bullet = bool(_BULLET.match(line))
+        if not is_bullet and (entry_start is None or seen_bullet):
+            if entry_start is not None:
+                close(offset)
+            entry_start = offset
+            heading = " ".join(line.split())
+            seen_bullet = False
+        elif is_bullet:
+            seen_bullet = True
+            if entry_start is None:
+                entry_start = offset
+    if entry_start is not None:
+        close(end)
+    return entries
+
+
+def sectionize(text: str) -> StructuredResume:
+    """Split resume text into typed sections with offsets into `text`."""
+    lines = _lines_with_offsets(text)
+    headings = [(i, kind) for i, (_, line) in enumerate(lines) if (kind := classify_heading(line))]
+
+    sections = []
+    # Everything above the first heading is the contact block (name, email, ...)
+    first = headings[0][0] if headings else len(lines)
+    contact_end = lines[first][0] if first < len(lines) else len(text)
+    start, end = _trimmed_span(text, 0, contact_end)
+    if start < end:
+        sections.append(ParsedSection(kind="contact", title="Contact", content=text[start:end], start=start, end=end))
+
+    for n, (index, kind) in enumerate(headings):
+        next_index = headings[n + 1][0] if n + 1 < len(headings) else len(lines)
+        section_end = lines[next_index][0] if next_index < len(lines) else len(text)
+        heading_offset, heading_line = lines[index]
+        start, end = _trimmed_span(text, heading_offset, section_end)
+        body_lines = lines[index + 1:next_index]
+        entries = _split_entries(text, body_lines, end) if kind in ENTRY_SECTIONS else []
+        sections.append(ParsedSection(
+            kind=kind,
+            title=heading_line.strip().rstrip(":").strip(),
+            content=text[start:end],
+            start=start,
+            end=end,
+            entries=entries
+        ))
+
+    return StructuredResume(sections=sections)
+
+
+def entry_lead(entry: ResumeEntry) -> str:
+    """First segment of an entry's first line: the company, school or title ("Dentsu Americas")."""
+    return _SEGMENT_BREAK.split(entry.content.split("\n", 1)[0].strip(), 1)[0]
+
+
+def find_section(structure: StructuredResume, name: str) -> Optional[ParsedSection]:
+    """Look a section up by kind or (case-insensitive) title."""
+    name = name.strip().lower()
+    for section in structure.sections:
+        if section.kind == name or section.title.lower() == name:
+            return section
+    kind = classify_heading(name.upper())
+    return structure.find(kind) if kind else None
+
+
+def sections_mentioned(structure: StructuredResume, message: str) -> List[ParsedSection]:
+    """Sections a chat message is explicitly about ("rewrite my summary", "fix my skills")."""
+    lowered = message.lower()
+    mentioned = []
+    for section in structure.sections:
+        if section.kind in ("contact", "other"):
+            continue
+        keywords = dict(SECTION_KEYWORDS).get(section.kind, ())
+        if section.title.lower() in lowered or any(keyword in lowered for keyword in keywords):
+            mentioned.append(section)
+    return mentioned
+
+
+def focused_resume_text(structure: StructuredResume, message: str, max_sections: int = 2) -> Optional[str]:
+    """Contact block plus the sections a message targets, or None if it isn't targeted."""
+    mentioned = sections_mentioned(structure, message)
+    if not mentioned or len(mentioned) > max_sections:
+        return None
+    parts = [section.content for section in structure.sections if section.kind == "contact"]
+    parts.extend(section.content for section in mentioned)
+    parts.append("(Only the resume sections relevant to this request are shown.)")
+    return "\n\n".join(parts)
@@ -0,0 +1,169 @@
+"""
+Session storage backends.
+
+`InMemorySessionStore` keeps sessions in-process with LRU + TTL eviction.
+`RedisSessionStore` keeps them in any Redis-protocol server (redis-server,
+fakeredis, ...) so every uvicorn worker sees the same sessions.
+"""
+
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import SESSION_BACKEND, REDIS_URL, SESSION_TTL_SECONDS, SESSION_MAX_ENTRIES
+from app.models.schemas import SessionState
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_session(session: SessionState) -> bytes:
+    """Pack a session into compact msgpack bytes."""
+    import msgpack
+    return msgpack.packb(session.model_dump(mode="json"), use_bin_type=True)
+
+
+def deserialize_session(data: bytes) -> SessionState:
+    """Unpack a session produced by serialize_session."""
+    import msgpack
+    return SessionState.model_validate(msgpack.unpackb(data, raw=False))
+
+
+class SessionStore(ABC):
+    """Interface for session persistence.
+
+    Sessions returned by `get` are copies for remote backends, so callers must
+    `save` after mutating them.
+    """
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        """Return the session, or None if it does not exist or has expired."""
+
+    @abstractmethod
+    async def save(self, session: SessionState) -> None:
+        """Create or replace a session and refresh its TTL."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of live sessions."""
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store with least-recently-used and time-to-live eviction."""
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_entries: int = SESSION_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, SessionState]]" = OrderedDict()
+
+    def _expired(self, expires_at: float) -> bool:
+        return expires_at <= time.monotonic()
+
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        expires_at, session = entry
+        if self._expired(expires_at):
+            del self._entries[session_id]
+            return None
+        # Sliding expiry: an active session stays alive
+        self._entries[session_id] = (time.monotonic() + self.ttl_seconds, session)
+        self._entries.move_to_end(session_id)
+        return session
+
+    async def save(self, session: SessionState) -> None:
+        self._entries[session.session_id] = (time.monotonic() + self.ttl_seconds, session)
+        self._entries.move_to_end(session.session_id)
+        self._evict()
+
+    async def delete(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    async def count(self) -> int:
+        self._evict()
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        # Oldest entries sit at the front; drop expired ones, then trim to size
+        while self._entries:
+            session_id, (expires_at, _) = next(iter(self._entries.items()))
+            if not self._expired(expires_at) and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[session_id]
+
+
+class RedisSessionStore(SessionStore):
+    """Redis-protocol store; sessions are msgpack blobs with a server-side TTL.
+
+    A sorted set of session ids scored by expiry time is kept alongside, so
+    count() needs no scan of the keyspace.
+    """
+
+    key_prefix = "session:"
+    index_key = "sessions:expiry"
+
+    def __init__(self, client, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: int = SESSION_TTL_SECONDS) -> "RedisSessionStore":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url), ttl_seconds)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.getex(self._key(session_id), ex=self.ttl_seconds)
+            # Follow the sliding TTL; xx so a missing session is not added
+            pipe.zadd(self.index_key, {session_id: time.time() + self.ttl_seconds}, xx=True)
+            data, _ = await pipe.execute()
+        if data is None:
+            return None
+        return deserialize_session(data)
+
+    async def save(self, session: SessionState) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(session.session_id), serialize_session(session), ex=self.ttl_seconds)
+            pipe.zadd(self.index_key, {session.session_id: time.time() + self.ttl_seconds})
+            await pipe.execute()
+
+    async def delete(self, session_id: str) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(self._key(session_id))
+            pipe.zrem(self.index_key, session_id)
+            await pipe.execute()
+
+    async def count(self) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(self.index_key, "-inf", time.time())
+            pipe.zcard(self.index_key)
+            _, total = await pipe.execute()
+        return total
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_BACKEND."""
+    if SESSION_BACKEND == "redis":
+        logger.info("Using Redis session store")
+        return RedisSessionStore.from_url(REDIS_URL)
+    return InMemorySessionStore()
+
+
+# Singleton instance
+session_store = create_session_store()
@@ -0,0 +1,196 @@
+"""
+Speculative follow-up replies.
+
+After a chat reply, the likeliest suggested follow-ups are pre-run in the
+background with exactly the inputs the next turn would send, so a user who
+clicks one gets the finished (or already in-flight) reply instead of a cold
+LLM call. Speculation is optional work under a strict budget: its own
+SPECULATION_TOKENS_PER_MINUTE bucket, the global admission budget only when it
+has room without queueing, and at most SPECULATION_MAX_CONCURRENT calls. The
+session's next message cancels whatever it did not use, and a result is only
+served while the session is still in the state it was computed for. Nothing is
+speculated while the LLM circuit is not closed, so a pre-run never takes the
+half-open trial call meant for real traffic.
+
+Speculation is per process: with several workers, a click that lands on a
+worker other than the one that speculated is a miss.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import SPECULATION_TOP, SPECULATION_TOKENS_PER_MINUTE, SPECULATION_MAX_CONCURRENT, SPECULATION_TTL_SECONDS
+from app.models.schemas import SessionState
+from app.services.admission import admission
+from app.services.analysis_cache import normalize_text
+from app.services.llm_service import breaker
+from app.services.metrics import SPECULATIONS
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_TOKENS_KEY = "speculation:tokens"
+
+# (message, estimated tokens, call producing the reply)
+SpeculativeRun = Tuple[str, int, Callable[[], Awaitable[str]]]
+
+
+def _key(message: str) -> str:
+    return normalize_text(message).lower()
+
+
+class _Speculation:
+    __slots__ = ("state", "task", "created", "started")
+
+    def __init__(self, state: tuple):
+        self.state = state
+        self.task: Optional[asyncio.Task] = None
+        self.created = time.monotonic()
+        self.started = False  # admitted and calling the LLM
+
+
+class SpeculativeChat:
+    """Pre-runs likely next chat turns per session and hands them to the turn that asks for them."""
+
+    def __init__(
+        self,
+        top: int = SPECULATION_TOP,
+        tokens_per_minute: float = SPECULATION_TOKENS_PER_MINUTE,
+        max_concurrent: int = SPECULATION_MAX_CONCURRENT,
+        ttl_seconds: float = SPECULATION_TTL_SECONDS,
+        max_sessions: int = 10_000
+    ):
+        self.top = top
+        self.token_rate, self.token_capacity = tokens_per_minute / 60.0, tokens_per_minute
+        self.max_concurrent = max_concurrent
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, _Speculation]]" = OrderedDict()
+        self._running = 0
+        self.counts = {"started": 0, "skipped": 0, "hit": 0, "wasted": 0, "failed": 0}
+
+    @staticmethod
+    def state(session: SessionState) -> tuple:
+        """Everything besides the message that a chat turn's reply depends on."""
+        return (
+            len(session.conversation_history),
+            session.summarized_through,
+            session.conversation_summary,
+            session.resume_text,
+            tuple((c.field, c.entity, c.text) for c in session.user_corrections),
+        )
+
+    def _count(self, outcome: str) -> None:
+        self.counts[outcome] += 1
+        SPECULATIONS.labels(outcome).inc()
+
+    def start(self, session_id: str, state: tuple, runs: List[SpeculativeRun]) -> None:
+        """Pre-run the first SPECULATION_TOP runs for the session's next turn, replacing earlier speculation."""
+        self.cancel(session_id)
+        self._prune()
+        if self.top <= 0 or self.max_concurrent <= 0:
+            return
+        speculations = {}
+        for message, tokens, call in runs[:self.top]:
+            speculation = _Speculation(state)
+            speculation.task = asyncio.create_task(self._run(speculation, tokens, call))
+            speculations[_key(message)] = speculation
+        if speculations:
+            self._sessions[session_id] = speculations
+
+    async def _admit(self, tokens: int) -> bool:
+        """Take the speculation budget and then the global one, without ever waiting."""
+        if breaker.state != "closed":
+            return False
+        try:
+            if self.token_rate > 0:
+                if await admission.backend.take(SPECULATION_TOKENS_KEY, self.token_rate, self.token_capacity, min(tokens, self.token_capacity)) > 0:
+                    return False
+            return await admission.try_reserve(tokens)
+        except Exception as e:
+            # Speculation is optional: skip it rather than fail open
+            logger.error(f"Speculation budget error: {e}")
+            return False
+
+    async def _run(self, speculation: _Speculation, tokens: int, call: Callable[[], Awaitable[str]]) -> Optional[str]:
+        if self._running >= self.max_concurrent:
+            self._count("skipped")
+            return None
+        self._running += 1
+        try:
+            if not await self._admit(tokens):
+                self._count("skipped")
+                return None
+            speculation.started = True
+            self._count("started")
+            return await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._count("failed")
+            logger.warning(f"Speculative reply failed: {e}")
+            return None
+        finally:
+            self._running -= 1
+
+    def _discard(self, speculation: _Speculation) -> None:
+        """Drop an unused speculation; one that reached the LLM counts as wasted."""
+        if speculation.task.done():
+            if not speculation.task.cancelled() and speculation.task.result() is not None:
+                self._count("wasted")
+            return
+        if speculation.started:
+            self._count("wasted")
+        speculation.task.cancel()
+
+    async def take(self, session_id: str, state: tuple, message: str) -> Optional[str]:
+        """The speculated reply to `message` if it was pre-run for this exact state.
+
+        Waits for it if it is still running. Any other speculation for the
+        session is cancelled.
+        """
+        speculations = self._sessions.pop(session_id, None)
+        if not speculations:
+            return None
+        speculation = speculations.pop(_key(message), None)
+        for other in speculations.values():
+            self._discard(other)
+        if speculation is None:
+            return None
+        if speculation.state != state or time.monotonic() - speculation.created > self.ttl_seconds:
+            self._discard(speculation)
+            return None
+        if speculation.task.cancelled():
+            return None
+        reply = await speculation.task
+        if reply is not None:
+            self._count("hit")
+        return reply
+
+    def cancel(self, session_id: str) -> None:
+        for speculation in (self._sessions.pop(session_id, None) or {}).values():
+            self._discard(speculation)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        while self._sessions:
+            session_id, speculations = next(iter(self._sessions.items()))
+            expired = all(now - s.created > self.ttl_seconds for s in speculations.values())
+            if not expired and len(self._sessions) < self.max_sessions:
+                break
+            self.cancel(session_id)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters since start; hit_rate is hits over speculated replies that were resolved (hit or wasted)."""
+        resolved = self.counts["hit"] + self.counts["wasted"]
+        return {**self.counts, "hit_rate": round(self.counts["hit"] / resolved, 3) if resolved else 0.0}
+
+    async def close(self) -> None:
+        for session_id in list(self._sessions):
+            self.cancel(session_id)
+
+
+# Singleton instance
+speculative_chat = SpeculativeChat()
@@ -0,0 +1,98 @@
+"""
+Startup warm-up and profiling.
+
+`warm_up` does the work the first request would otherwise pay for: importing
+the PDF/DOCX libraries, spawning the parser pool, building the LLM client and
+opening a pooled connection to the API. The app runs it in the background
+from its lifespan and only reports ready on /health once it has finished.
+
+`import_profile` reports import time per module for the app and the
+libraries warm-up loads (via `python -X importtime` in a child process, so
+the measured imports are cold). Run it directly:
+
+    python -m app.services.startup [--top 25]
+"""
+
+import re
+import sys
+import time
+import asyncio
+import logging
+import subprocess
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The app itself plus what warm-up imports
+PROFILED_MODULES = ("app.main", "anthropic", "PyPDF2", "docx")
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def _import_parsers() -> None:
+    import PyPDF2  # noqa: F401
+    import docx  # noqa: F401
+
+
+async def _timed(name: str, step, timings: Dict[str, float]) -> None:
+    start = time.perf_counter()
+    try:
+        await step()
+    except Exception as e:
+        # A failed warm-up step only costs latency later; it must not block readiness
+        logger.warning(f"Warm-up step '{name}' failed: {e}")
+    timings[name] = time.perf_counter() - start
+
+
+async def warm_up() -> Dict[str, float]:
+    """Pre-import parsers, start the parser pool, build the LLM client and open a connection.
+
+    Returns the seconds spent per step.
+    """
+    from app.services.llm_service import init_clients, warm_connection
+    from app.services.resume_parser import start_parser_pool
+
+    timings: Dict[str, float] = {}
+
+    async def llm_client():
+        # The SDK import is CPU-bound; a thread keeps /health answering meanwhile
+        await _timed("llm_client", lambda: asyncio.to_thread(init_clients), timings)
+        await _timed("llm_connection", warm_connection, timings)
+
+    await asyncio.gather(
+        llm_client(),
+        _timed("parser_imports", lambda: asyncio.to_thread(_import_parsers), timings),
+        _timed("parser_pool", start_parser_pool, timings),
+    )
+    return timings
+
+
+def import_profile(modules: Sequence[str] = PROFILED_MODULES, top: int = 25) -> List[Tuple[str, float, float]]:
+    """Slowest imports when loading `modules` cold: (module, self seconds, cumulative seconds)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            rows.append((name, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+
+def format_import_profile(rows: List[Tuple[str, float, float]]) -> str:
+    lines = [f"{'module':<50} {'self':>8} {'cumulative':>11}"]
+    lines.extend(f"{name:<50} {own * 1000:7.1f}ms {cumulative * 1000:10.1f}ms" for name, own, cumulative in rows)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report import time per module for the API process")
+    parser.add_argument("--modules", nargs="+", default=list(PROFILED_MODULES))
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    print(format_import_profile(import_profile(args.modules, args.top)))
@@ -0,0 +1,287 @@
+"""
+Structured resume analysis.
+
+The initial analysis is requested as a call to the `record_resume_analysis`
+tool, so the model returns JSON matching ANALYSIS_TOOL's schema instead of
+free-form markdown. The JSON is validated into a ResumeAnalysis: the ATS score
+is the local keyword score and section contents come from the sectionizer, so
+the model only writes judgements. The markdown shown to the user is rendered
+locally from the structure, and follow-up chat turns replay the compact
+`analysis_context` instead of the rendered text.
+
+A re-uploaded resume is reviewed through `record_delta_review`, which scores
+only the changed sections; `merge_delta` folds that into the previous analysis.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from app.models.schemas import (
+    ResumeAnalysis, ResumeSection, SectionReview, DeltaReview, StructuredResume, ResumeDiff, Message, MessageRole
+)
+from app.services.analysis_cache import normalize_text
+from app.services.sectionizer import find_section
+
+_STRINGS = {"type": "array", "items": {"type": "string"}}
+
+_SECTION_REVIEWS = TypeAdapter(List[SectionReview])
+
+ANALYSIS_TOOL: Dict[str, Any] = {
+    "name": "record_resume_analysis",
+    "description": "Record the expert assessment of the resume.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "overall_score": {"type": "integer", "minimum": 1, "maximum": 10},
+            "summary": {"type": "string", "description": "Brief justification of the overall score"},
+            "ats_notes": {"type": "string", "description": "What drives the local ATS keyword score"},
+            "strengths": {**_STRINGS, "description": "Top 3 strengths"},
+            "improvements": {**_STRINGS, "description": "Top 3 areas for immediate improvement"},
+            "industry_fit": {"type": "string", "description": "Fit for tech/IT/engineering roles"},
+            "target_companies": {**_STRINGS, "description": "Suggested target companies for this profile"},
+            "sections": {
+                "type": "array",
+                "description": "One entry per resume section, named as in the resume",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "score": {"type": "integer", "minimum": 1, "maximum": 10},
+                        "suggestions": _STRINGS,
+                    },
+                    "required": ["name", "score", "suggestions"],
+                },
+            },
+            "bullet_rewrite": {
+                "type": "object",
+                "description": "One bullet point you would rewrite, quoted exactly, and its rewrite",
+                "properties": {
+                    "before": {"type": "string"},
+                    "after": {"type": "string"},
+                    "why": {"type": "string"},
+                },
+                "required": ["before", "after"],
+            },
+        },
+        "required": [
+            "overall_score", "summary", "ats_notes", "strengths", "improvements",
+            "industry_fit", "target_companies", "sections",
+        ],
+    },
+}
+
+
+DELTA_TOOL: Dict[str, Any] = {
+    "name": "record_delta_review",
+    "description": "Record the review of the changes made to a previously analyzed resume.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "overall_score": {"type": "integer", "minimum": 1, "maximum": 10},
+            "summary": {"type": "string", "description": "What the changes improved or weakened, and why the overall score moved (or not)"},
+            "improvements": {**_STRINGS, "description": "Top 3 areas still to improve, after these changes"},
+            "sections": {
+                "type": "array",
+                "description": "One entry per changed or added section, named as in the resume",
+                "items": ANALYSIS_TOOL["input_schema"]["properties"]["sections"]["items"],
+            },
+            "bullet_rewrite": {
+                **ANALYSIS_TOOL["input_schema"]["properties"]["bullet_rewrite"],
+                "description": "Optionally, one changed bullet you would still rewrite, quoted exactly, and its rewrite",
+            },
+        },
+        "required": ["overall_score", "summary", "improvements", "sections"],
+    },
+}
+
+
+def build_analysis(data: Dict[str, Any], ats_score: int, structure: Optional[StructuredResume] = None) -> ResumeAnalysis:
+    """Validate tool (or cached) output into a ResumeAnalysis.
+
+    Raises ValueError (pydantic's ValidationError) when required fields are
+    missing or mistyped.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Analysis tool input is a {type(data).__name__}, not an object")
+    sections = []
+    for review in _SECTION_REVIEWS.validate_python(data.get("sections") or []):
+        parsed = find_section(structure, review.name) if structure else None
+        sections.append({**review.model_dump(), "content": parsed.content if parsed else ""})
+    analysis = ResumeAnalysis.model_validate({**data, "ats_score": ats_score, "sections": sections})
+    analysis.overall_score = min(10, max(1, analysis.overall_score))
+    for section in analysis.sections:
+        if section.score is not None:
+            section.score = min(10, max(1, section.score))
+    return analysis
+
+
+def _section_key(structure: StructuredResume, name: str) -> str:
+    """Kind of the named section (its title for sections the sectionizer does not model)."""
+    section = find_section(structure, name)
+    if section is None:
+        return name.strip().lower()
+    return section.kind if section.kind != "other" else section.title.lower()
+
+
+def _change_key(change) -> str:
+    return change.kind if change.kind != "other" else change.name.lower()
+
+
+def merge_delta(
+    previous: ResumeAnalysis, data: Dict[str, Any], ats_score: int, structure: StructuredResume, diff: ResumeDiff, resume_text: str
+) -> ResumeAnalysis:
+    """Previous analysis updated with a delta review of the revised resume.
+
+    Re-scored sections replace their previous entries, removed sections are
+    dropped and section contents come from the new resume. Raises ValueError
+    (pydantic's ValidationError) when the tool output does not fit.
+    """
+    review = DeltaReview.model_validate(data)
+    scored = [ResumeSection(**section.model_dump(), content="") for section in review.sections]
+    analysis = previous.model_copy(deep=True)
+    analysis.overall_score = min(10, max(1, review.overall_score))
+    analysis.summary = review.summary
+    analysis.ats_score = ats_score
+    if review.improvements:
+        analysis.improvements = review.improvements
+
+    removed = {_change_key(change) for change in diff.changes if change.status == "removed"}
+    sections = {_section_key(structure, section.name): section for section in analysis.sections}
+    for kind in removed:
+        sections.pop(kind, None)
+    for section in scored:
+        if section.score is not None:
+            section.score = min(10, max(1, section.score))
+        sections[_section_key(structure, section.name)] = section
+    for section in sections.values():
+        parsed = find_section(structure, section.name)
+        section.content = parsed.content if parsed else ""
+    analysis.sections = list(sections.values())
+
+    if review.bullet_rewrite:
+        analysis.bullet_rewrite = review.bullet_rewrite
+    elif analysis.bullet_rewrite and normalize_text(analysis.bullet_rewrite.before) not in normalize_text(resume_text):
+        # The quoted bullet was edited or removed
+        analysis.bullet_rewrite = None
+    return analysis
+
+
+def cacheable_analysis(analysis: ResumeAnalysis) -> str:
+    """JSON for the analysis cache: section contents are rebuilt from the resume on load."""
+    return analysis.model_dump_json(exclude={"ats_score": True, "sections": {"__all__": {"content"}}})
+
+
+def _bullets(items: List[str]) -> List[str]:
+    return [f"- {item}" for item in items] or ["- (none)"]
+
+
+def _section_heading(section: ResumeSection) -> str:
+    return f"**{section.name}**" + (f" ({section.score}/10)" if section.score is not None else "")
+
+
+def format_analysis(analysis: ResumeAnalysis) -> str:
+    """Render the analysis as the markdown review shown to the user."""
+    lines = [f"## Overall Score: {analysis.overall_score}/10", analysis.summary, ""]
+    lines += [f"## ATS Compatibility: {analysis.ats_score}/100", analysis.ats_notes, ""]
+    lines += ["## Top Strengths", *_bullets(analysis.strengths), ""]
+    lines += ["## Top Areas for Improvement", *_bullets(analysis.improvements), ""]
+    lines += ["## Industry Fit", analysis.industry_fit, ""]
+    lines += ["## Suggested Target Companies", *_bullets(analysis.target_companies), ""]
+    if analysis.sections:
+        lines.append("## Section by Section")
+        for section in analysis.sections:
+            lines.append(_section_heading(section))
+            lines.extend(f"- {suggestion}" for suggestion in section.suggestions)
+        lines.append("")
+    if analysis.bullet_rewrite:
+        rewrite = analysis.bullet_rewrite
+        lines += ["## Bullet Point Rewrite", f"**Before:** {rewrite.before}", f"**After:** {rewrite.after}"]
+        if rewrite.why:
+            lines.append(f"**Why:** {rewrite.why}")
+    return "\n".join(lines).strip()
+
+
+def analysis_context(analysis: ResumeAnalysis) -> str:
+    """Compact form of the analysis for the conversation history the model replays."""
+    lines = [
+        "My initial analysis (the user saw it rendered as a full review):",
+        f"Overall {analysis.overall_score}/10: {analysis.summary}",
+        f"ATS {analysis.ats_score}/100: {analysis.ats_notes}",
+        f"Strengths: {'; '.join(analysis.strengths)}",
+        f"Improvements: {'; '.join(analysis.improvements)}",
+        f"Industry fit: {analysis.industry_fit}",
+        f"Target companies: {', '.join(analysis.target_companies)}",
+    ]
+    lines.extend(
+        f"{section.name} {section.score}/10: {'; '.join(section.suggestions)}" for section in analysis.sections
+    )
+    if analysis.bullet_rewrite:
+        lines.append(f'Rewrite: "{analysis.bullet_rewrite.before}" -> "{analysis.bullet_rewrite.after}"')
+    return "\n".join(lines)
+
+
+def scores_context(analysis: ResumeAnalysis) -> str:
+    """Previous scores and open suggestions, the baseline a delta review is judged against."""
+    sections = "; ".join(
+        f"{section.name} {section.score}/10" + (f" ({'; '.join(section.suggestions)})" if section.suggestions else "")
+        for section in analysis.sections
+    )
+    return "\n".join([
+        f"My previous review: overall {analysis.overall_score}/10, ATS {analysis.ats_score}/100.",
+        f"Section scores: {sections or '(none)'}",
+        f"Open improvements: {'; '.join(analysis.improvements) or '(none)'}",
+    ])
+
+
+def _score_change(now: Optional[int], before: Optional[int], scale: int = 10) -> str:
+    if now is None:
+        return ""
+    if before is None or before == now:
+        return f"{now}/{scale}"
+    return f"{now}/{scale} (was {before}/{scale})"
+
+
+def format_delta(previous: ResumeAnalysis, analysis: ResumeAnalysis, diff: ResumeDiff, structure: StructuredResume) -> str:
+    """Render the delta review of a revised resume as markdown."""
+    before = {_section_key(structure, section.name): section.score for section in previous.sections}
+    current = {_section_key(structure, section.name): section for section in analysis.sections}
+    lines = [f"## Overall Score: {_score_change(analysis.overall_score, previous.overall_score)}", analysis.summary, ""]
+    lines.append(f"## ATS Compatibility: {_score_change(analysis.ats_score, previous.ats_score, 100)}")
+    lines += ["", "## What Changed"]
+    for change in diff.changes:
+        section = current.get(_change_key(change))
+        if change.status == "removed" or section is None:
+            lines.append(f"**{change.name}** ({change.status})")
+            continue
+        lines.append(f"**{change.name}** ({change.status}): {_score_change(section.score, before.get(_change_key(change)))}")
+        lines.extend(f"- {suggestion}" for suggestion in section.suggestions)
+    lines += ["", "## Top Areas for Improvement", *_bullets(analysis.improvements)]
+    if analysis.bullet_rewrite and analysis.bullet_rewrite != previous.bullet_rewrite:
+        rewrite = analysis.bullet_rewrite
+        lines += ["", "## Bullet Point Rewrite", f"**Before:** {rewrite.before}", f"**After:** {rewrite.after}"]
+        if rewrite.why:
+            lines.append(f"**Why:** {rewrite.why}")
+    return "\n".join(lines).strip()
+
+
+def delta_context(previous: ResumeAnalysis, analysis: ResumeAnalysis, diff: ResumeDiff, structure: StructuredResume) -> str:
+    """Compact form of a delta review for the conversation history."""
+    names = ", ".join(f"{change.name} ({change.status})" for change in diff.changes)
+    lines = [
+        f"The user uploaded a revised resume; changed sections: {names}. My review of the changes:",
+        f"Overall {analysis.overall_score}/10 (was {previous.overall_score}): {analysis.summary}",
+        f"ATS {analysis.ats_score}/100 (was {previous.ats_score})",
+        f"Improvements: {'; '.join(analysis.improvements)}",
+    ]
+    changed = {_change_key(change) for change in diff.changes}
+    lines.extend(
+        f"{section.name} {section.score}/10: {'; '.join(section.suggestions)}"
+        for section in analysis.sections if _section_key(structure, section.name) in changed
+    )
+    return "\n".join(lines)
+
+
+def analysis_message(review: str, analysis: Optional[ResumeAnalysis]) -> Message:
+    """History entry for the initial analysis: the compact structure when there is one, else the review text."""
+    return Message(role=MessageRole.ASSISTANT, content=analysis_context(analysis) if analysis else review)
@@ -0,0 +1,68 @@
+"""
+Local follow-up suggestions for chat replies.
+
+Builds the next actions a user is likely to ask for ("Rewrite my summary
+section", "Tailor my resume for Stripe") from the structured analysis and the
+sectionized resume, most likely first: the weakest scored sections, a missing
+summary, experience entries without numbers, then role targeting. No LLM
+calls; suggestions the user has already sent are skipped.
+"""
+
+import re
+from typing import List
+
+from app.core.config import SUGGESTIONS_MAX
+from app.models.schemas import SessionState, MessageRole
+from app.services.analysis_cache import normalize_text
+from app.services.sectionizer import sectionize, entry_lead, find_section
+
+# Sections scored below this get a rewrite suggestion
+REWRITE_BELOW_SCORE = 8
+
+_BULLET_LINE = re.compile(r"^\s*[-*•▪●–➢>]\s+")
+
+
+def _unquantified(content: str) -> bool:
+    """Whether an entry has bullets and none of them carries a number."""
+    bullets = [line for line in content.splitlines() if _BULLET_LINE.match(line)]
+    return bool(bullets) and not any(char.isdigit() for line in bullets for char in line)
+
+
+def suggest_followups(session: SessionState, limit: int = SUGGESTIONS_MAX) -> List[str]:
+    """Suggested next messages for the session, most likely first."""
+    if limit <= 0 or not session.resume_text:
+        return []
+    structure = session.resume_structure or sectionize(session.resume_text)
+    analysis = session.resume_analysis
+
+    candidates = []
+    if analysis:
+        weak = sorted(
+            (s for s in analysis.sections
+             if s.score is not None and s.score < REWRITE_BELOW_SCORE and find_section(structure, s.name) is not None),
+            key=lambda s: s.score
+        )
+        candidates.extend(f"Rewrite my {section.name.lower()} section" for section in weak)
+    if structure.find("summary") is None:
+        candidates.append("Write a professional summary for my resume")
+    for section in structure.sections:
+        if section.kind == "experience":
+            candidates.extend(
+                f"Add measurable results to my {entry_lead(entry)} bullets"
+                for entry in section.entries if _unquantified(entry.content)
+            )
+    if analysis and analysis.target_companies:
+        candidates.append(f"Tailor my resume for {analysis.target_companies[0]}")
+    candidates.append("Which keywords is my resume missing?")
+
+    # Only unsummarized turns: older (possibly compressed) messages are not decompressed for this
+    asked = {
+        normalize_text(message.content).lower()
+        for message in session.conversation_history[session.summarized_through:] if message.role == MessageRole.USER
+    }
+    suggestions = []
+    for candidate in candidates:
+        key = normalize_text(candidate).lower()
+        if key not in asked and candidate not in suggestions:
+            suggestions.append(candidate)
+    return suggestions[:limit]
@@ -0,0 +1,114 @@
+"""
+Resume upload pipeline, shared by the synchronous /upload route and the
+background upload jobs: parse, reserve admission tokens, run the initial
+analysis and save the new session.
+
+A revised resume re-uploaded to an existing session keeps the conversation
+and the corrections that still apply, and is reviewed incrementally when
+little of it changed.
+"""
+
+import uuid
+import logging
+from typing import Optional
+
+from app.core.config import REANALYSIS_MAX_CHANGE
+from app.models.schemas import SessionState, ResumeUploadResponse, ReanalysisResponse, StructuredResume, Message, MessageRole
+from app.services.admission import admission, estimate_request_tokens
+from app.services.corrections import corrections_for_resume
+from app.services.resume_agent import resume_agent
+from app.services.resume_diff import diff_resumes, format_changes
+from app.services.resume_parser import parse_resume_async, resume_preview
+from app.services.sectionizer import sectionize
+from app.services.session_store import session_store
+from app.services.structured_analysis import analysis_message, scores_context, format_delta, delta_context
+
+logger = logging.getLogger(__name__)
+
+
+async def analyze_upload(content: bytes, filename: str, client: str, session_id: Optional[str] = None) -> ResumeUploadResponse:
+    """Parse and analyze an uploaded resume into a new session.
+
+    Raises ValueError for unreadable files, AdmissionRejected when over the
+    token budget and LLMUnavailableError when the LLM cannot be reached.
+    """
+    resume_text = await parse_resume_async(content, filename)
+    await admission.reserve(client, estimate_request_tokens(resume_text))
+
+    session = SessionState(
+        session_id=session_id or str(uuid.uuid4()),
+        resume_text=resume_text,
+        resume_structure=sectionize(resume_text)
+    )
+
+    # Initial analysis (structured when STRUCTURED_ANALYSIS is on)
+    initial_analysis, session.resume_analysis = await resume_agent.initial_analysis(resume_text, session.resume_structure)
+
+    # Store analysis in conversation
+    session.conversation_history.append(analysis_message(initial_analysis, session.resume_analysis))
+    await session_store.save(session)
+
+    return ResumeUploadResponse(
+        session_id=session.session_id,
+        message="Resume uploaded and analyzed successfully",
+        resume_text=resume_preview(resume_text),
+        initial_analysis=initial_analysis,
+        analysis=session.resume_analysis
+    )
+
+
+async def reanalyze_upload(session: SessionState, content: bytes, filename: str, client: str) -> ReanalysisResponse:
+    """Replace the session's resume with a revised version and review what changed.
+
+    Unchanged resumes make no LLM call. Small changes to a structurally
+    analyzed resume get a delta review of the changed lines only; anything
+    else gets a full analysis. Raises like analyze_upload.
+    """
+    resume_text = await parse_resume_async(content, filename)
+    structure = sectionize(resume_text)
+    previous_structure = session.resume_structure or (sectionize(session.resume_text) if session.resume_text else StructuredResume())
+    diff = diff_resumes(previous_structure, structure, resume_text)
+    kept, dropped = corrections_for_resume(session.user_corrections, resume_text)
+    previous = session.resume_analysis
+
+    if not diff.changes:
+        mode, review, analysis = "unchanged", "No changes found since the last upload; the previous analysis still applies.", previous
+    elif previous is not None and diff.changed_ratio <= REANALYSIS_MAX_CHANGE:
+        mode = "incremental"
+        await admission.reserve(client, estimate_request_tokens(scores_context(previous), format_changes(diff)))
+        try:
+            analysis = await resume_agent.delta_review(previous, diff, resume_text, structure)
+            review = format_delta(previous, analysis, diff, structure)
+        except ValueError as e:
+            logger.warning(f"Delta review unusable ({e}); running a full analysis")
+            mode = "full"
+    else:
+        mode = "full"
+    if mode == "full":
+        await admission.reserve(client, estimate_request_tokens(resume_text))
+        review, analysis = await resume_agent.initial_analysis(resume_text, structure)
+
+    session.resume_text = resume_text
+    session.resume_structure = structure
+    session.resume_analysis = analysis
+    session.user_corrections = kept
+    if mode != "unchanged":
+        changed = ", ".join(change.name for change in diff.changes)
+        session.conversation_history.append(Message(role=MessageRole.USER, content=f"I uploaded a revised resume (changed: {changed})."))
+        if mode == "incremental":
+            session.conversation_history.append(Message(role=MessageRole.ASSISTANT, content=delta_context(previous, analysis, diff, structure)))
+        else:
+            session.conversation_history.append(analysis_message(review, analysis))
+    await session_store.save(session)
+
+    return ReanalysisResponse(
+        session_id=session.session_id,
+        message="Revised resume analyzed" if mode != "unchanged" else "No changes found",
+        mode=mode,
+        resume_text=resume_preview(resume_text),
+        review=review,
+        analysis=analysis,
+        changes=diff.changes,
+        corrections_kept=len(kept),
+        corrections_dropped=dropped
+    )
@@ -0,0 +1,177 @@
+"""
+Admission control check.
+
+Exercises the limiter against both backends (in-process and a fakeredis
+server running the Lua token bucket): per-session burst limits, the global
+token budget with its fair queue (a heavy client cannot starve a light one),
+rejection with Retry-After when the queue is full, a shared budget across
+two controllers (standing in for two workers), and batch reservations (one
+budget per client across its batches, behind queued interactive requests).
+Then checks that the app turns a rejection into HTTP 429 with a Retry-After
+header.
+
+Usage (from backend/):
+    python -m benchmarks.admission_check
+"""
+
+import sys
+import time
+import asyncio
+
+from app.services.admission import (
+    AdmissionController, AdmissionRejected, InMemoryLimiterBackend, RedisLimiterBackend
+)
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"{'PASS' if passed else 'FAIL'}  {name}")
+    return passed
+
+
+def backend_factories():
+    """Fresh-backend factories; each check starts from full buckets."""
+    factories = [("memory", InMemoryLimiterBackend)]
+    try:
+        import fakeredis
+        factories.append(("redis", lambda: RedisLimiterBackend(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))))
+    except ImportError:
+        print("fakeredis not installed; skipping the Redis backend")
+    return factories
+
+
+async def session_burst(backend) -> bool:
+    controller = AdmissionController(backend, session_per_minute=60, session_burst=3, ip_per_minute=0, tokens_per_minute=0)
+    admitted, retry_after = 0, None
+    for _ in range(5):
+        try:
+            await controller.admit("1.2.3.4", "s1", 100)
+            admitted += 1
+        except AdmissionRejected as e:
+            retry_after = e.retry_after
+    await controller.admit("1.2.3.4", "s2", 100)
+    return admitted == 3 and retry_after is not None and 0 < retry_after <= 1.0
+
+
+async def fair_queue(backend) -> bool:
+    # 6000 tokens/minute = 100/s; each request takes 50 tokens -> one every 0.5s
+    controller = AdmissionController(
+        backend, session_per_minute=0, ip_per_minute=0, tokens_per_minute=6000,
+        queue_max=50, queue_per_client=10, max_wait=10
+    )
+    await controller.reserve("drain", 6000)
+    order = []
+
+    async def request(client: str):
+        await controller.reserve(client, 50)
+        order.append(client)
+
+    tasks = [asyncio.create_task(request("heavy")) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    tasks.append(asyncio.create_task(request("light")))
+    await asyncio.gather(*tasks)
+    # Round-robin: the light client is served second, not after all six heavy requests
+    return order.index("light") <= 2
+
+
+async def queue_full(backend) -> bool:
+    controller = AdmissionController(
+        backend, session_per_minute=0, ip_per_minute=0, tokens_per_minute=600,
+        queue_max=2, queue_per_client=2, max_wait=30
+    )
+    await controller.reserve("drain", 600)
+    waiting = [asyncio.create_task(controller.reserve(f"c{i}", 10)) for i in range(2)]
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    try:
+        await controller.reserve("c3", 10)
+        rejected = False
+    except AdmissionRejected as e:
+        rejected = e.retry_after > 0
+    fast = time.perf_counter() - start < 0.1
+    for task in waiting:
+        task.cancel()
+    await controller.close()
+    return rejected and fast
+
+
+async def shared_budget(backend) -> bool:
+    # Two controllers on one backend behave like two workers
+    workers = [AdmissionController(backend, session_per_minute=0, ip_per_minute=0, tokens_per_minute=1000, max_wait=0.1) for _ in range(2)]
+    admitted = 0
+    for i in range(10):
+        try:
+            await workers[i % 2].reserve("x", 250)
+            admitted += 1
+        except AdmissionRejected:
+            pass
+    return admitted == 4
+
+
+async def batch_budget(backend) -> bool:
+    # 6000 tokens/minute = 100/s per client, shared by all of its batches
+    controller = AdmissionController(backend, session_per_minute=0, ip_per_minute=0, tokens_per_minute=60000)
+    await controller.reserve_background("scripted", 6000, 6000)
+    start = time.perf_counter()
+    await asyncio.gather(*(controller.reserve_background("scripted", 50, 6000) for _ in range(4)))
+    shared = time.perf_counter() - start >= 1.5
+    start = time.perf_counter()
+    await controller.reserve_background("other", 50, 6000)
+    return shared and time.perf_counter() - start < 0.1
+
+
+async def batch_yields(backend) -> bool:
+    controller = AdmissionController(
+        backend, session_per_minute=0, ip_per_minute=0, tokens_per_minute=6000, queue_per_client=10, max_wait=10
+    )
+    await controller.reserve("drain", 6000)
+    order = []
+
+    async def batch():
+        await controller.reserve_background("scripted", 50, 0)
+        order.append("batch")
+
+    async def interactive():
+        await controller.reserve("web", 50)
+        order.append("web")
+
+    tasks = [asyncio.create_task(batch())]
+    await asyncio.sleep(0.01)
+    tasks.append(asyncio.create_task(interactive()))
+    await asyncio.gather(*tasks)
+    await controller.close()
+    return order == ["web", "batch"]
+
+
+async def http_429() -> bool:
+    import httpx
+    from app.main import app
+    from app.services.admission import admission
+
+    admission.ip_rate, admission.ip_burst = 1 / 60.0, 1
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # Invalid PDF: the first upload passes admission and fails parsing (400),
+        # the second is over the per-IP limit before the file is parsed
+        first = await client.post("/api/upload", files={"file": ("r.pdf", b"not a pdf")})
+        second = await client.post("/api/upload", files={"file": ("r.pdf", b"not a pdf")})
+    return first.status_code == 400 and second.status_code == 429 and int(second.headers["retry-after"]) >= 1
+
+
+async def run() -> bool:
+    results = []
+    for name, factory in backend_factories():
+        results.append(check(f"[{name}] per-session burst limit", await session_burst(factory())))
+        results.append(check(f"[{name}] fair queue serves the light client early", await fair_queue(factory())))
+        results.append(check(f"[{name}] full queue rejects immediately", await queue_full(factory())))
+        results.append(check(f"[{name}] budget shared across workers", await shared_budget(factory())))
+        results.append(check(f"[{name}] batch budget shared by a client's batches", await batch_budget(factory())))
+        results.append(check(f"[{name}] batches yield the global budget to queued requests", await batch_yields(factory())))
+    results.append(check("HTTP 429 with Retry-After", await http_429()))
+    return all(results)
+
+
+def main() -> int:
+    return 0 if asyncio.run(run()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
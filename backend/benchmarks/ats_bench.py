@@ -0,0 +1,53 @@
+"""
+ATS keyword scoring benchmark.
+
+Times the local scorer (sectionizing included) on the sample resume and on a
+resume inflated to N copies of its experience section, for every taxonomy
+role, the best-fit role and a pasted job description.
+
+Usage (from backend/):
+    python -m benchmarks.ats_bench --inflate 10
+"""
+
+import argparse
+import time
+
+from benchmarks.sectionizer_check import SAMPLE
+from app.services.ats_scoring import ats_scorer, ROLE_KEYWORDS
+
+JOB_DESCRIPTION = """Senior Data Engineer. You will build batch and streaming data pipelines
+with Python, SQL, Spark and Airflow, model data in Snowflake and dbt, and run services on AWS
+with Docker and Kubernetes. Kafka experience required; Airflow and dbt expertise a plus."""
+
+
+def measure(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inflate", type=int, default=10, help="Copies of the experience section in the large resume")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(SAMPLE) as f:
+        sample = f.read()
+    head, _, rest = sample.partition("EDUCATION")
+    large = head * args.inflate + "EDUCATION" + rest
+
+    for name, text in (("sample", sample), (f"x{args.inflate}", large)):
+        print(f"{name} resume ({len(text):,} chars)")
+        for role in list(ROLE_KEYWORDS) + [None]:
+            result = ats_scorer.score(text, role)
+            ms = measure(lambda: ats_scorer.score(text, role), args.repeat)
+            print(f"  {role or 'best fit':<28} score={result.score:>3}  {ms:7.3f}ms")
+        result = ats_scorer.score(text, job_description=JOB_DESCRIPTION)
+        ms = measure(lambda: ats_scorer.score(text, job_description=JOB_DESCRIPTION), args.repeat)
+        print(f"  {'job description':<28} score={result.score:>3}  {ms:7.3f}ms  missing={', '.join(result.missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Synthetic resume corpus for parser benchmarks.
+
+Builds text-layer PDFs (hand-written, no PDF library needed) and DOCX files
+(python-docx) of configurable size from test_data/sample_resume.txt.
+"""
+
+import io
+import os
+from typing import List
+
+SAMPLE_RESUME = os.path.join(os.path.dirname(__file__), "..", "..", "test_data", "sample_resume.txt")
+
+
+def sample_lines() -> List[str]:
+    with open(SAMPLE_RESUME, encoding="utf-8") as f:
+        return [line.rstrip() for line in f]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 45) -> bytes:
+    """PDF with `pages` pages of resume text in Helvetica."""
+    source = sample_lines()
+    objects = []  # object bodies, numbered from 1
+
+    def add(body: str) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_obj = add("")  # placeholder, filled once kids are known
+    kids = []
+    line_no = 0
+    for _ in range(pages):
+        commands = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        for _ in range(lines_per_page):
+            commands.append(f"({_pdf_escape(source[line_no % len(source)])}) Tj T*")
+            line_no += 1
+        commands.append("ET")
+        stream = "\n".join(commands)
+        content = add(f"<< /Length {len(stream.encode('latin-1', 'replace'))} >>\nstream\n{stream}\nendstream")
+        kids.append(add(
+            f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>"
+        ))
+    objects[pages_obj - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+    catalog = add(f"<< /Type /Catalog /Pages {pages_obj} 0 R >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int, tables: int = 0) -> bytes:
+    """DOCX with `paragraphs` paragraphs of resume text and optional 2-column tables."""
+    from docx import Document
+
+    source = sample_lines()
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = source[0]
+    for i in range(paragraphs):
+        doc.add_paragraph(source[i % len(source)])
+    for t in range(tables):
+        table = doc.add_table(rows=4, cols=2)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = source[(t * 8 + r * 2 + c) % len(source)]
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
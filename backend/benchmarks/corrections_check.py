@@ -0,0 +1,126 @@
+"""
+Correction detection and ledger check.
+
+Compares the old 26-substring detector with the compiled matcher on a small
+labelled set of chat messages (precision/recall and time per message), then
+checks ledger behaviour: supersede by (field, entity), entity-less
+corrections kept side by side, de-duplication and the size cap, and that
+entities are matched on whole words only.
+
+Usage (from backend/):
+    python -m benchmarks.corrections_check
+"""
+
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.sectionizer_check import SAMPLE
+from app.models.schemas import SessionState, Correction
+from app.services.sectionizer import sectionize
+from app.services.corrections import detect_correction, record_correction, corrections_for_resume
+from app.core.config import CORRECTIONS_MAX_ENTRIES
+
+CORRECTIONS = [
+    "I didn't work at Dentsu Americas until 2021, the start date should be Jan. 2021",
+    "That's wrong, I was a Senior Data Engineer, not a Data Engineer",
+    "Actually, I graduated from Georgia Tech in May 2019",
+    "I never led a team of 10, it was 4 people",
+    "You got my title wrong on the second role",
+    "Correction: the fraud model captured $80M, not $100M",
+    "My actual degree is an MS in Analytics",
+    "That's not right - I don't have a PhD",
+    "I wasn't a consultant at Dentsu, I was a manager",
+    "The date should be 2018, not 2019",
+]
+
+NOT_CORRECTIONS = [
+    "Can you help me describe the error budget work I did on the SRE team?",
+    "What should be on my resume for a data science role?",
+    "I built a fraud detection model, how do I make this bullet stronger?",
+    "Is it wrong to have a two page resume?",
+    "Please rewrite my summary to focus on experimentation",
+    "How do I explain a mistake I learned from in an interview?",
+    "I do not want the summary to be longer than three lines",
+    "What's the correct format for dates?",
+    "I wasn't sure whether to include my certifications",
+    "Which error metrics should I mention for my forecasting work?",
+]
+
+
+def legacy_detect_correction(message: str) -> bool:
+    correction_indicators = [
+        "i did not", "i didn't", "that's wrong", "that's incorrect", "not correct",
+        "actually,", "correction:", "wrong", "incorrect", "i never", "not true",
+        "that's not right", "i don't have", "i haven't", "my actual", "the correct",
+        "should be", "is actually", "isn't right", "was not", "wasn't",
+        "i do not", "not accurate", "mistake", "error", "fix that"
+    ]
+    message_lower = message.lower()
+    return any(indicator in message_lower for indicator in correction_indicators)
+
+
+def evaluate(name: str, detector) -> None:
+    true_positives = sum(detector(m) for m in CORRECTIONS)
+    false_positives = sum(detector(m) for m in NOT_CORRECTIONS)
+    messages = CORRECTIONS + NOT_CORRECTIONS
+    start = time.perf_counter()
+    for _ in range(500):
+        for message in messages:
+            detector(message)
+    per_message = (time.perf_counter() - start) / (500 * len(messages)) * 1e6
+    print(
+        f"{name:<10} recall={true_positives}/{len(CORRECTIONS)} "
+        f"false_positives={false_positives}/{len(NOT_CORRECTIONS)} {per_message:5.2f}us/message"
+    )
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"{'PASS' if passed else 'FAIL'}  {name}")
+    return passed
+
+
+def main() -> int:
+    evaluate("legacy", legacy_detect_correction)
+    evaluate("compiled", detect_correction)
+
+    with open(SAMPLE) as f:
+        resume = f.read()
+    session = SessionState(session_id="check", resume_text=resume, resume_structure=sectionize(resume))
+
+    results = []
+    record_correction(session, "I didn't work at Dentsu Americas until 2021, the start date should be Jan. 2021")
+    record_correction(session, "Correction: my Dentsu Americas start date should be March 2021")
+    dates = [c for c in session.user_corrections if c.field == "date"]
+    results.append(check("newer correction supersedes the same fact", len(dates) == 1 and "March" in dates[0].text))
+    results.append(check("entity resolved from resume entries", dates[0].entity == "Dentsu Americas"))
+
+    record_correction(session, "That's not right - I don't have a PhD")
+    record_correction(session, "That's not right - I don't have a PhD")
+    results.append(check("repeated correction de-duplicated", len(session.user_corrections) == 2))
+
+    record_correction(session, "I never used Kubernetes, please take it off")
+    record_correction(session, "I never used Spark either, that's wrong")
+    skills = [c for c in session.user_corrections if c.field == "skill" and not c.entity]
+    results.append(check("entity-less corrections of one field both kept", len(skills) == 2))
+
+    for i in range(CORRECTIONS_MAX_ENTRIES + 10):
+        record_correction(session, f"Actually, I also know tool number {i}, that is not true on the resume")
+    results.append(check(f"ledger capped at {CORRECTIONS_MAX_ENTRIES}", len(session.user_corrections) <= CORRECTIONS_MAX_ENTRIES))
+
+    record_correction(session, "That's wrong, our database engineering team had 4 people")
+    database = session.user_corrections[-1]
+    data_engineer = Correction(field="title", entity="Data Engineer", text="I was a Senior Data Engineer", timestamp=datetime.utcnow())
+    kept, dropped = corrections_for_resume([data_engineer], "Database Engineer, Acme\n- Tuned database queries")
+    results.append(check(
+        "entities matched on whole words (\"data\" is not \"database\")",
+        database.entity == "" and dropped == [data_engineer]
+    ))
+
+    legacy = SessionState.model_validate({"session_id": "old", "user_corrections": ["That's wrong"]})
+    results.append(check("legacy string corrections upgraded", legacy.user_corrections[0].text == "That's wrong"))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Text extraction benchmark on large documents.
+
+Compares the previous concatenate-in-a-loop extraction with the generator
+pipeline in resume_parser (full text and 500-char preview), reporting time and
+peak Python heap allocation (tracemalloc) per parse.
+
+Usage (from backend/):
+    python -m benchmarks.extract_bench --pdf-pages 20 --docx-paragraphs 5000
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from benchmarks.corpus import make_pdf, make_docx
+from app.services.resume_parser import parse_resume, PREVIEW_CHARS
+
+
+def legacy_pdf(file_content: bytes) -> str:
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(file_content))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+
+def legacy_docx(file_content: bytes) -> str:
+    from docx import Document
+    doc = Document(io.BytesIO(file_content))
+    text = ""
+    for para in doc.paragraphs:
+        text += para.text + "\n"
+    return text.strip()
+
+
+def measure(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main(pdf_pages: int, docx_paragraphs: int, repeat: int):
+    pdf = make_pdf(pages=pdf_pages)
+    docx = make_docx(paragraphs=docx_paragraphs, tables=docx_paragraphs // 100)
+    cases = [
+        ("pdf legacy", lambda: legacy_pdf(pdf)),
+        ("pdf full", lambda: parse_resume(pdf, "r.pdf")),
+        ("pdf preview", lambda: parse_resume(pdf, "r.pdf", max_chars=PREVIEW_CHARS)),
+        ("docx legacy", lambda: legacy_docx(docx)),
+        ("docx full", lambda: parse_resume(docx, "r.docx")),
+        ("docx preview", lambda: parse_resume(docx, "r.docx", max_chars=PREVIEW_CHARS)),
+    ]
+    print(f"{'case':<14} {'best_ms':>9} {'peak_kib':>10} {'chars':>9}")
+    for name, fn in cases:
+        seconds, peak, chars = measure(fn, repeat)
+        print(f"{name:<14} {seconds * 1000:>9.1f} {peak / 1024:>10.0f} {chars:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--docx-paragraphs", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.pdf_pages, args.docx_paragraphs, args.repeat)
@@ -0,0 +1,260 @@
+"""
+Local fake of the Anthropic Messages API for offline load tests and benchmarks.
+
+Responds to POST /v1/messages (plain and streaming) after a configurable delay,
+so the backend can be exercised end to end without network access or API spend.
+By default `latency` is the whole generation time (spread over the streamed
+tokens); with `token_rate` set, `latency` is the time to the first token and
+tokens then arrive at `token_rate` per second. `model_latency` overrides
+`latency` per requested model, and with `prefill_rate` set every uncached
+input token adds 1/prefill_rate seconds before the first token.
+`header_delay` holds every response (streams included) before its status
+line, like an overloaded upstream that accepts the request but is slow to answer.
+Prompt caching is simulated: blocks marked with cache_control become cached
+prefixes once the first token of the response that wrote them is sent, and
+later requests sharing a prefix report it as cache_read_input_tokens.
+Requests that force a tool call (tool_choice type "tool") get a tool_use
+block whose input is the canned `tool_input`.
+Errors (429/529/5xx with optional retry-after) can be injected at a given rate;
+all knobs live on `app.state` and can be changed while the server runs.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import uuid
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_REPLY = (
+    "Overall Score: 7/10. Strong technical foundation with clear impact. "
+    "ATS Compatibility Score: 8/10. Consider adding more quantified results "
+    "and role-specific keywords to the experience section."
+)
+
+# Input for forced tool calls; fits the structured analysis tool
+DEFAULT_TOOL_INPUT = {
+    "overall_score": 7,
+    "summary": "Strong technical foundation with clear impact.",
+    "ats_notes": "Core skills are present; several role keywords are missing.",
+    "strengths": ["Quantified results", "Modern data stack", "Clear progression"],
+    "improvements": ["Add metrics to every role", "Tighten the summary", "Group skills by area"],
+    "industry_fit": "Good fit for data science and ML engineering roles.",
+    "target_companies": ["Stripe", "Airbnb", "Databricks"],
+    "sections": [
+        {"name": "Summary", "score": 6, "suggestions": ["Lead with your specialty"]},
+        {"name": "Experience", "score": 8, "suggestions": ["Start bullets with action verbs"]},
+    ],
+    "bullet_rewrite": {"before": "Worked on models", "after": "Built models that cut churn", "why": "Action verb and outcome"},
+}
+
+
+def create_fake_app(
+    latency: float = 1.0,
+    reply: str = DEFAULT_REPLY,
+    error_rate: float = 0.0,
+    error_status: int = 529,
+    retry_after: Optional[float] = None,
+    token_rate: Optional[float] = None,
+    tool_input: Optional[dict] = None,
+    model_latency: Optional[dict] = None,
+    prefill_rate: Optional[float] = None,
+    header_delay: float = 0.0
+) -> FastAPI:
+    """Create a fake Messages API that answers every request after `latency` seconds."""
+    app = FastAPI()
+    app.state.latency = latency
+    app.state.model_latency = model_latency or {}
+    app.state.token_rate = token_rate
+    app.state.prefill_rate = prefill_rate
+    app.state.header_delay = header_delay
+    app.state.error_rate = error_rate
+    app.state.error_status = error_status
+    app.state.retry_after = retry_after
+    app.state.requests = 0
+    app.state.errors = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.prompt_cache = set()
+    app.state.uncached_input_tokens = 0
+    app.state.cache_read_tokens = 0
+    app.state.cache_write_tokens = 0
+    app.state.tool_input = DEFAULT_TOOL_INPUT if tool_input is None else tool_input
+
+    def cache_breakpoints(body: dict) -> List[Tuple[str, int]]:
+        """(prefix digest, prefix tokens) at each cache_control marker, in prompt order."""
+        # Tool definitions come first in the prompt, so they are part of every prefix
+        blocks = [{"text": json.dumps(body["tools"])}] if body.get("tools") else []
+        system = body.get("system")
+        if isinstance(system, str):
+            blocks.append({"text": system})
+        elif system:
+            blocks.extend(system)
+        for message in body.get("messages", []):
+            content = message["content"]
+            blocks.extend([{"text": content}] if isinstance(content, str) else content)
+        digest, size, points = hashlib.sha256(), 0, []
+        for block in blocks:
+            text = block.get("text", "")
+            digest.update(text.encode())
+            size += len(text) // 4
+            if block.get("cache_control"):
+                points.append((digest.hexdigest(), size))
+        return points
+
+    def prompt_usage(points: List[Tuple[str, int]], input_tokens: int) -> dict:
+        read = max((size for digest, size in points if digest in app.state.prompt_cache), default=0)
+        written = points[-1][1] - read if points else 0
+        app.state.cache_read_tokens += read
+        app.state.cache_write_tokens += written
+        app.state.uncached_input_tokens += max(0, input_tokens - read)
+        return {
+            "input_tokens": max(0, input_tokens - read - written),
+            "cache_creation_input_tokens": written,
+            "cache_read_input_tokens": read,
+        }
+
+    def message_body(model: str, usage: dict, tool: Optional[str] = None) -> dict:
+        if tool:
+            content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tool, "input": app.state.tool_input}]
+            output_tokens = len(json.dumps(app.state.tool_input)) // 4
+        else:
+            content = [{"type": "text", "text": reply}]
+            output_tokens = len(reply.split())
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": content,
+            "stop_reason": "tool_use" if tool else "end_turn",
+            "stop_sequence": None,
+            "usage": {**usage, "output_tokens": output_tokens},
+        }
+
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def latency_for(model: str) -> float:
+        return app.state.model_latency.get(model, app.state.latency)
+
+    def prefill_delay(usage: dict) -> float:
+        if not app.state.prefill_rate:
+            return 0.0
+        return (usage["input_tokens"] + usage["cache_creation_input_tokens"]) / app.state.prefill_rate
+
+    def token_delay(model: str, words: int) -> float:
+        if app.state.token_rate:
+            return 1.0 / app.state.token_rate
+        return latency_for(model) / max(words, 1)
+
+    async def stream_events(model: str, usage: dict, points: List[Tuple[str, int]]):
+        message = message_body(model, usage)
+        message["content"] = []
+        message["stop_reason"] = None
+        yield sse("message_start", {"type": "message_start", "message": message})
+        yield sse("content_block_start", {
+            "type": "content_block_start", "index": 0,
+            "content_block": {"type": "text", "text": ""}
+        })
+        words = reply.split(" ")
+        await asyncio.sleep(prefill_delay(usage))
+        if app.state.token_rate:
+            await asyncio.sleep(latency_for(model))
+        for i, word in enumerate(words):
+            await asyncio.sleep(token_delay(model, len(words)))
+            if i == 0:
+                app.state.prompt_cache.update(digest for digest, _ in points)
+            text = word if i == 0 else f" {word}"
+            yield sse("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": text}
+            })
+        yield sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield sse("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(words)}
+        })
+        yield sse("message_stop", {"type": "message_stop"})
+
+    def error_response(status: int) -> JSONResponse:
+        error_type = {429: "rate_limit_error", 529: "overloaded_error"}.get(status, "api_error")
+        headers = {}
+        if app.state.retry_after is not None:
+            headers["retry-after"] = str(app.state.retry_after)
+        return JSONResponse(
+            {"type": "error", "error": {"type": error_type, "message": "Injected fake error"}},
+            status_code=status,
+            headers=headers
+        )
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        raw = await request.body()
+        body = json.loads(raw)
+        model = body.get("model", "fake-model")
+        # Rough prompt size, so token metrics move with prompt changes
+        input_tokens = len(raw) // 4
+        points = cache_breakpoints(body)
+        app.state.requests += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            if app.state.header_delay:
+                await asyncio.sleep(app.state.header_delay)
+            if random.random() < app.state.error_rate:
+                app.state.errors += 1
+                return error_response(app.state.error_status)
+            if body.get("stream"):
+                usage = prompt_usage(points, input_tokens)
+                return StreamingResponse(stream_events(model, usage, points), media_type="text/event-stream")
+            delay = latency_for(model)
+            if app.state.token_rate:
+                delay += len(reply.split(" ")) / app.state.token_rate
+            usage = prompt_usage(points, input_tokens)
+            await asyncio.sleep(delay + prefill_delay(usage))
+            app.state.prompt_cache.update(digest for digest, _ in points)
+            tool_choice = body.get("tool_choice") or {}
+            return JSONResponse(message_body(model, usage, tool_choice.get("name") if tool_choice.get("type") == "tool" else None))
+        finally:
+            app.state.in_flight -= 1
+
+    return app
+
+
+async def serve(app: FastAPI, port: int, host: str = "127.0.0.1"):
+    """Run the fake API on the current event loop; returns the started uvicorn server."""
+    import uvicorn
+
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local fake Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--token-rate", type=float, default=None, help="Streamed tokens per second")
+    args = parser.parse_args()
+    fake = create_fake_app(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        token_rate=args.token_rate
+    )
+    uvicorn.run(fake, host="127.0.0.1", port=args.port)
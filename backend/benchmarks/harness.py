@@ -0,0 +1,288 @@
+"""
+End-to-end benchmark harness.
+
+Starts the app over real HTTP against the fake Messages API and runs complete
+user flows (streamed upload + analysis, N chat turns, streamed improvement
+suggestions) at each concurrency level. Reports flow throughput, p50/p95/p99
+latency and time-to-first-token per step, RSS growth per session, and parse
+throughput per file type. Results go to JSON; pass --compare with an earlier
+file to print the change per metric.
+
+Usage (from backend/):
+    python -m benchmarks.harness --users 1 10 50 --turns 3 --latency 0.2 --token-rate 200 -o bench.json
+    python -m benchmarks.harness --users 10 --compare bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import SAMPLE_RESUME, make_pdf, make_docx
+
+FAKE_PORT = 8999
+APP_PORT = 8998
+STEPS = ("upload", "chat", "improve")
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    # Peak, not current, where /proc is unavailable (kB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99 in milliseconds."""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))] * 1000, 2)
+
+    return {"p50_ms": rank(0.50), "p95_ms": rank(0.95), "p99_ms": rank(0.99)}
+
+
+async def stream_request(client, url: str, **kwargs) -> Dict[str, object]:
+    """POST to an SSE endpoint; returns total time, time to first token and start-event data."""
+    start = time.perf_counter()
+    ttft = None
+    start_data = {}
+    event = None
+    async with client.stream("POST", url, **kwargs) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event == "token" and ttft is None:
+                    ttft = time.perf_counter() - start
+                elif event == "error":
+                    raise RuntimeError(f"{url} streamed an error event")
+            elif line.startswith("data: ") and event == "start":
+                start_data = json.loads(line[len("data: "):])
+    return {"total": time.perf_counter() - start, "ttft": ttft, "start": start_data}
+
+
+async def user_flow(client, resume: bytes, turns: int, samples: Dict[str, Dict[str, list]]) -> str:
+    upload = await stream_request(client, "/api/upload/stream", files={"file": ("resume.txt", resume)})
+    session_id = upload["start"]["session_id"]
+    samples["upload"]["total"].append(upload["total"])
+    samples["upload"]["ttft"].append(upload["ttft"])
+
+    for turn in range(turns):
+        chat = await stream_request(client, "/api/chat/stream", json={
+            "session_id": session_id,
+            "message": f"Can you help me strengthen bullet {turn + 1} of my most recent role?"
+        })
+        samples["chat"]["total"].append(chat["total"])
+        samples["chat"]["ttft"].append(chat["ttft"])
+
+    improve = await stream_request(client, "/api/improve/stream", params={
+        "session_id": session_id, "target_role": "Machine Learning Engineer"
+    })
+    samples["improve"]["total"].append(improve["total"])
+    samples["improve"]["ttft"].append(improve["ttft"])
+    return session_id
+
+
+async def run_level(client, resume: bytes, users: int, turns: int) -> dict:
+    samples: Dict[str, Dict[str, list]] = defaultdict(lambda: {"total": [], "ttft": []})
+    flow_times: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await user_flow(client, resume, turns, samples)
+            flow_times.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(users)))
+    wall = time.perf_counter() - start
+    rss_after = rss_bytes()
+
+    requests = sum(len(samples[step]["total"]) for step in STEPS)
+    return {
+        "users": users,
+        "turns": turns,
+        "wall_s": round(wall, 3),
+        "flows_per_s": round(len(flow_times) / wall, 3),
+        "requests_per_s": round(requests / wall, 3),
+        "errors": errors,
+        "flow": percentiles(flow_times),
+        "steps": {
+            step: {
+                "latency": percentiles(samples[step]["total"]),
+                "ttft": percentiles([t for t in samples[step]["ttft"] if t is not None]),
+            }
+            for step in STEPS
+        },
+        # Includes the in-process fake LLM and client, so read it as an upper bound
+        "rss_per_session_kb": round(max(0, rss_after - rss_before) / max(users, 1) / 1024, 1),
+    }
+
+
+async def parse_throughput(files: int, concurrency: int) -> dict:
+    from app.services.resume_parser import parse_resume_async, start_parser_pool
+
+    await start_parser_pool()
+    corpus = {
+        "pdf": [(f"r{i}.pdf", make_pdf(pages=2)) for i in range(files)],
+        "docx": [(f"r{i}.docx", make_docx(paragraphs=80, tables=2)) for i in range(files)],
+        "txt": [(f"r{i}.txt", open(SAMPLE_RESUME, "rb").read()) for i in range(files)],
+    }
+    slots = asyncio.Semaphore(concurrency)
+
+    async def parse(name: str, content: bytes):
+        async with slots:
+            await parse_resume_async(content, name)
+
+    results = {}
+    for file_type, items in corpus.items():
+        start = time.perf_counter()
+        await asyncio.gather(*(parse(name, content) for name, content in items))
+        wall = time.perf_counter() - start
+        megabytes = sum(len(content) for _, content in items) / 1e6
+        results[file_type] = {"files_per_s": round(len(items) / wall, 1), "mb_per_s": round(megabytes / wall, 2)}
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_level(level: dict) -> None:
+    print(
+        f"users={level['users']:<4} flows/s={level['flows_per_s']:<8} req/s={level['requests_per_s']:<8} "
+        f"errors={level['errors']:<3} rss/session={level['rss_per_session_kb']}kB"
+    )
+    for step, stats in level["steps"].items():
+        latency, ttft = stats["latency"], stats["ttft"]
+        print(
+            f"    {step:<8} p50={latency['p50_ms']}ms p95={latency['p95_ms']}ms p99={latency['p99_ms']}ms "
+            f"ttft_p50={ttft['p50_ms']}ms"
+        )
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print relative change of each latency/throughput figure against a baseline run."""
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta']['timestamp']}):")
+    previous = {level["users"]: level for level in baseline["levels"]}
+    for level in current["levels"]:
+        old = previous.get(level["users"])
+        if old is None:
+            continue
+        rows = [("flows/s", old["flows_per_s"], level["flows_per_s"])]
+        for step in STEPS:
+            for kind in ("latency", "ttft"):
+                for pct in ("p50_ms", "p95_ms", "p99_ms"):
+                    rows.append((f"{step} {kind} {pct}", old["steps"][step][kind][pct], level["steps"][step][kind][pct]))
+        print(f"  users={level['users']}")
+        for name, before, after in rows:
+            if before and after is not None:
+                print(f"    {name:<24} {before:>10} -> {after:<10} ({(after - before) / before * 100:+.1f}%)")
+
+
+async def main(args) -> None:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    # Every flow should reach the (fake) LLM rather than the analysis cache
+    os.environ["ANALYSIS_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["ANALYSIS_CACHE_PATH"] = ""
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", "1000")
+    # Measure the service, not the admission limits (every simulated user shares one IP)
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+
+    logging.disable(logging.WARNING)
+
+    fake = create_fake_app(latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate)
+    fake_server = await serve(fake, FAKE_PORT)
+    # Real HTTP: the in-process ASGI transport would buffer streamed responses
+    app_server = await serve(app, APP_PORT)
+    with open(SAMPLE_RESUME, "rb") as f:
+        resume = f.read()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "levels": [],
+    }
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=None, limits=limits) as client:
+        # Warm-up: imports, pools and connections
+        await run_level(client, resume, 1, 1)
+        for users in args.users:
+            level = await run_level(client, resume, users, args.turns)
+            results["levels"].append(level)
+            print_level(level)
+
+    if args.parse_files:
+        results["parse"] = await parse_throughput(args.parse_files, args.parse_concurrency)
+        for file_type, stats in results["parse"].items():
+            print(f"parse {file_type:<5} {stats['files_per_s']} files/s  {stats['mb_per_s']} MB/s")
+
+    results["fake_llm"] = {"requests": fake.state.requests, "errors": fake.state.errors, "max_in_flight": fake.state.max_in_flight}
+
+    app_server.should_exit = True
+    fake_server.should_exit = True
+    from app.services.resume_parser import shutdown_parser_pool
+    shutdown_parser_pool()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50], help="Concurrent user flows per level")
+    parser.add_argument("--turns", type=int, default=3, help="Chat turns per flow")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake LLM streamed tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM calls that return 529")
+    parser.add_argument("--parse-files", type=int, default=20, help="Files per type for parse throughput (0 to skip)")
+    parser.add_argument("--parse-concurrency", type=int, default=8)
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    asyncio.run(main(parser.parse_args()))
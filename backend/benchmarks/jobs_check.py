@@ -0,0 +1,203 @@
+"""
+Upload job check.
+
+Runs the API (in-process uvicorn) against the fake Messages API and checks
+job-mode uploads on both job stores (in-process, and a fakeredis server shared
+by an API-side queue with no workers and a separate worker queue, standing in
+for `python -m app.services.jobs`):
+  - `Prefer: respond-async` answers 202 well before the analysis is done
+  - GET /api/jobs/{id} reports the result, and the session exists
+  - retries with the same Idempotency-Key (or the same file) reuse the job,
+    with no second LLM call
+  - an unreadable file fails the job with the 400 the synchronous upload gives
+  - /api/jobs/{id}/ws pushes each status change until the job finishes
+  - upload_job_queue_depth reflects jobs waiting for a worker
+  - watchers (WebSocket or poller) that leave before the job finishes do not
+    leave a wake-up entry behind
+
+Usage (from backend/):
+    python -m benchmarks.jobs_check
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+
+from benchmarks.sectionizer_check import SAMPLE
+
+FAKE_PORT = 8999
+APP_PORT = 8996
+LATENCY = 0.5
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"{'PASS' if passed else 'FAIL'}  {name}")
+    return passed
+
+
+async def wait_done(client, job_id: str) -> dict:
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+
+
+async def submit(client, content: bytes, key: str = None, filename: str = "resume.txt"):
+    headers = {"Prefer": "respond-async"}
+    if key:
+        headers["Idempotency-Key"] = key
+    return await client.post("/api/upload", files={"file": (filename, content)}, headers=headers)
+
+
+async def upload_flow(client, state, resume: bytes, label: str) -> list:
+    from app.services.session_store import session_store
+
+    results = []
+    start = time.perf_counter()
+    response = await submit(client, resume, key=f"{label}-1")
+    accepted = time.perf_counter() - start
+    body = response.json()
+    results.append(check(
+        f"[{label}] 202 in {accepted * 1000:.0f}ms (analysis takes {LATENCY * 1000:.0f}ms)",
+        response.status_code == 202 and response.headers["location"] == body["status_url"] and accepted < LATENCY / 2
+    ))
+
+    before = state.requests
+    retry = await submit(client, resume, key=f"{label}-1")
+    pending = (await client.get(body["status_url"])).json()
+    results.append(check(
+        f"[{label}] no session id handed out before the session exists",
+        "session_id" not in body and "session_id" not in pending and pending["result"] is None
+    ))
+    job = await wait_done(client, body["job_id"])
+    session = await session_store.get(job["result"]["session_id"]) if job["result"] else None
+    results.append(check(f"[{label}] job done with the upload response", job["status"] == "done" and session is not None))
+    results.append(check(f"[{label}] session created", session is not None and session.resume_text is not None))
+    results.append(check(
+        f"[{label}] same Idempotency-Key -> same job, one LLM call",
+        retry.json()["job_id"] == body["job_id"] and state.requests - before == 1
+    ))
+
+    same_file = (await submit(client, resume + label.encode())).json()
+    again = (await submit(client, resume + label.encode())).json()
+    results.append(check(f"[{label}] same file without a key -> same job", same_file["job_id"] == again["job_id"]))
+    await wait_done(client, same_file["job_id"])
+
+    bad = (await submit(client, b"not a pdf", filename="resume.pdf")).json()
+    failed = await wait_done(client, bad["job_id"])
+    results.append(check(f"[{label}] unreadable file -> failed with 400", failed["status"] == "failed" and failed["error_status"] == 400))
+    return results
+
+
+async def websocket_flow(resume: bytes, label: str) -> bool:
+    import httpx
+    import websockets
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}") as client:
+        body = (await submit(client, resume + b"\nwebsocket " + label.encode())).json()
+    statuses = []
+    async with websockets.connect(f"ws://127.0.0.1:{APP_PORT}{body['websocket_url']}") as ws:
+        async for message in ws:
+            statuses.append(json.loads(message)["status"])
+    return check(f"[{label}] websocket pushes {' -> '.join(statuses)}", statuses[-1] == "done" and "running" in statuses)
+
+
+async def queue_depth(client, resume: bytes, jobs, label: str) -> bool:
+    # No workers: jobs stay queued
+    workers, jobs.workers = jobs.workers, 0
+    await jobs.stop()
+    for i in range(3):
+        await submit(client, resume + f"\ndepth {label} {i}".encode())
+    scrape = (await client.get("/metrics")).text
+    depth = next(line for line in scrape.splitlines() if line.startswith("upload_job_queue_depth"))
+    jobs.workers = workers
+    return check(f"[{label}] queue depth metric ({depth})", depth.endswith(" 3.0"))
+
+
+async def watcher_cleanup(client, resume: bytes, jobs, label: str) -> bool:
+    """Watchers that leave before the job finishes (it stays queued: no workers) leave no wake-up entry behind."""
+    import websockets
+
+    body = (await submit(client, resume + f"\nwatchers {label}".encode())).json()
+    async with websockets.connect(f"ws://127.0.0.1:{APP_PORT}{body['websocket_url']}") as ws:
+        await ws.recv()
+        await asyncio.sleep(0.1)
+        registered = body["job_id"] in jobs._changed
+    poller = jobs.watch(body["job_id"], poll_seconds=5)
+    await poller.__anext__()
+    waiting = asyncio.create_task(poller.__anext__())
+    await asyncio.sleep(0.1)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    await asyncio.sleep(0.1)
+    return check(f"[{label}] departed watchers leave no entries", registered and body["job_id"] not in jobs._changed)
+
+
+async def run() -> bool:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    os.environ["ANALYSIS_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["ANALYSIS_CACHE_PATH"] = ""
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+    from app.services.llm_service import init_clients
+    from app.services.jobs import UploadJobs, RedisJobStore, upload_jobs
+
+    logging.disable(logging.WARNING)
+    init_clients()
+    fake = create_fake_app(latency=LATENCY)
+    fake_server = await serve(fake, FAKE_PORT)
+    app_server = await serve(app, APP_PORT)
+    with open(SAMPLE, "rb") as f:
+        resume = f.read()
+
+    results = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=None) as client:
+        results += await upload_flow(client, fake.state, resume, "memory")
+        results.append(await websocket_flow(resume, "memory"))
+        await asyncio.sleep(0.1)
+        results.append(await queue_depth(client, resume, upload_jobs, "memory"))
+        results.append(await watcher_cleanup(client, resume, upload_jobs, "memory"))
+
+        try:
+            import fakeredis
+        except ImportError:
+            print("fakeredis not installed; skipping the Redis job store")
+        else:
+            # API-side queue without workers plus a separate worker, sharing one server
+            server = fakeredis.FakeServer()
+            memory_jobs = upload_jobs.store
+            upload_jobs.store = RedisJobStore(fakeredis.FakeAsyncRedis(server=server))
+            api_workers, upload_jobs.workers = upload_jobs.workers, 0
+            await upload_jobs.stop()
+            worker = UploadJobs(RedisJobStore(fakeredis.FakeAsyncRedis(server=server)), workers=2)
+            worker.start()
+            results += await upload_flow(client, fake.state, resume, "redis")
+            results.append(await websocket_flow(resume, "redis"))
+            await worker.close()
+            # fakeredis keeps serving a cancelled BRPOP (redis-py drops the connection), so use a fresh server
+            upload_jobs.store = RedisJobStore(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+            results.append(await queue_depth(client, resume, upload_jobs, "redis"))
+            results.append(await watcher_cleanup(client, resume, upload_jobs, "redis"))
+            upload_jobs.store, upload_jobs.workers = memory_jobs, api_workers
+
+    app_server.should_exit = True
+    fake_server.should_exit = True
+    await asyncio.sleep(0.2)
+    return all(results)
+
+
+def main() -> int:
+    return 0 if asyncio.run(run()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Concurrency load test for /api/chat against a local fake LLM.
+
+Every chat turn waits `--latency` seconds on the fake Messages API. With a
+blocking LLM client one worker serves one request at a time, so wall time grows
+linearly with concurrency; with the async client all requests overlap.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 1 10 100 300 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+FAKE_PORT = 8999
+
+
+async def run_level(client, concurrency: int) -> dict:
+    async def one(i: int) -> float:
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/chat",
+            json={"session_id": f"load-{concurrency}-{i}", "message": "How can I improve my summary?"}
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "throughput_rps": concurrency / wall,
+        # Average number of requests the worker had in progress at once
+        "effective_concurrency": sum(latencies) / wall,
+    }
+
+
+async def main(levels, latency: float):
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    # Measure how far the event loop scales, not the outbound concurrency cap
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", "1000")
+    # Measure the service, not the admission limits (every simulated user shares one IP)
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+    from app.services.llm_service import init_clients
+
+    # ASGITransport does not run the lifespan; build the clients up front as it would
+    init_clients()
+    for name in ("httpx", "httpx2"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    fake = create_fake_app(latency=latency)
+    server = await serve(fake, FAKE_PORT)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+        print(f"{'concurrency':>12} {'wall_s':>8} {'req/s':>8} {'effective':>10}")
+        for level in levels:
+            result = await run_level(client, level)
+            print(
+                f"{result['concurrency']:>12} {result['wall_s']:>8.2f} "
+                f"{result['throughput_rps']:>8.1f} {result['effective_concurrency']:>10.1f}"
+            )
+
+    print(f"max concurrent upstream LLM calls: {fake.state.max_in_flight}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 300])
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.latency))
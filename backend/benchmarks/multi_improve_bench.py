@@ -0,0 +1,107 @@
+"""
+Multi-role improvement benchmark.
+
+Asks for improvement suggestions for several target roles, first as one
+/api/improve round trip per role (sequential, as the frontend did), then as a
+single /api/improve/multi request, and reports wall time, time to the first
+result on the streamed variant, and the prompt tokens the fake Messages API
+saw as uncached input, cache writes and cache reads.
+
+Usage (from backend/):
+    python -m benchmarks.multi_improve_bench --latency 0.5 --token-rate 100
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from benchmarks.sectionizer_check import SAMPLE
+
+FAKE_PORT = 8999
+ROLES = ["Machine Learning Engineer", "Data Scientist", "Data Engineer"]
+
+
+def token_snapshot(state) -> dict:
+    return {"read": state.cache_read_tokens, "written": state.cache_write_tokens, "requests": state.requests}
+
+
+def print_row(name: str, seconds: float, before: dict, after: dict, extra: str = "") -> None:
+    print(
+        f"{name:<26} {seconds * 1000:8.1f}ms  calls={after['requests'] - before['requests']:<3} "
+        f"cache_written={after['written'] - before['written']:<6} cache_read={after['read'] - before['read']:<6}{extra}"
+    )
+
+
+async def main(args) -> None:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    os.environ["ANALYSIS_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["ANALYSIS_CACHE_PATH"] = ""
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+    from app.models.schemas import SessionState
+    from app.services.session_store import session_store
+    from app.services.llm_service import init_clients
+
+    logging.disable(logging.WARNING)
+    # ASGITransport does not run the lifespan; build the clients up front as it would
+    init_clients()
+    fake = create_fake_app(latency=args.latency, token_rate=args.token_rate)
+    server = await serve(fake, FAKE_PORT)
+    state = fake.state
+    roles = ROLES[:args.roles] if args.roles <= len(ROLES) else ROLES + [f"Software Engineer {i}" for i in range(args.roles - len(ROLES))]
+
+    with open(SAMPLE) as f:
+        resume = f.read()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+        # Separate sessions with distinct resumes, so neither run reads the other's cache
+        for name, text in (("sequential", resume), ("multi", resume + "\n"), ("multi-stream", resume + "\n\n")):
+            await session_store.save(SessionState(session_id=name, resume_text=text))
+
+        before = token_snapshot(state)
+        start = time.perf_counter()
+        for role in roles:
+            response = await client.post("/api/improve", params={"session_id": "sequential", "target_role": role})
+            response.raise_for_status()
+        print_row("sequential /improve", time.perf_counter() - start, before, token_snapshot(state))
+
+        before = token_snapshot(state)
+        start = time.perf_counter()
+        response = await client.post("/api/improve/multi", json={
+            "session_id": "multi", "targets": [{"role": role} for role in roles]
+        })
+        response.raise_for_status()
+        failed = sum(1 for r in response.json()["results"] if r["error"])
+        print_row("/improve/multi", time.perf_counter() - start, before, token_snapshot(state), f" failed={failed}")
+
+        before = token_snapshot(state)
+        start = time.perf_counter()
+        first_result = None
+        async with client.stream("POST", "/api/improve/multi/stream", json={
+            "session_id": "multi-stream", "targets": [{"role": role} for role in roles]
+        }) as response:
+            async for line in response.aiter_lines():
+                if line == "event: result" and first_result is None:
+                    first_result = time.perf_counter() - start
+        print_row(
+            "/improve/multi/stream", time.perf_counter() - start, before, token_snapshot(state),
+            f" first_result={first_result * 1000:.1f}ms"
+        )
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="Fake LLM streamed tokens per second")
+    asyncio.run(main(parser.parse_args()))
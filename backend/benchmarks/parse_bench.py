@@ -0,0 +1,93 @@
+"""
+Resume parsing benchmark: inline (on the event loop) vs the warm process pool.
+
+Parses a generated corpus of PDFs and DOCXs at the given concurrency and
+reports throughput, p50/p99 per-file latency and the worst event-loop stall
+seen by a 10ms ticker (how long every other request on the worker would wait).
+
+Usage (from backend/):
+    python -m benchmarks.parse_bench --files 80 --concurrency 16 --pages 12
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.corpus import make_pdf, make_docx
+
+
+def build_corpus(files: int, pages: int):
+    corpus = []
+    for i in range(files):
+        if i % 2:
+            corpus.append((f"resume_{i}.docx", make_docx(paragraphs=pages * 40, tables=pages)))
+        else:
+            corpus.append((f"resume_{i}.pdf", make_pdf(pages=1 + i % pages)))
+    return corpus
+
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def run(mode: str, corpus, concurrency: int) -> dict:
+    from app.services.resume_parser import parse_resume, parse_resume_async
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(filename: str, content: bytes):
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "inline":
+                parse_resume(content, filename)
+            else:
+                await parse_resume_async(content, filename)
+            latencies.append(time.perf_counter() - start)
+            # Yield so the ticker can observe the loop between inline parses
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(name, content) for name, content in corpus))
+    wall = time.perf_counter() - start
+    stop.set()
+    latencies.sort()
+    return {
+        "mode": mode,
+        "files_per_s": len(corpus) / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "max_loop_stall_ms": await ticker * 1000,
+    }
+
+
+async def main(files: int, concurrency: int, pages: int):
+    from app.services.resume_parser import start_parser_pool, shutdown_parser_pool
+
+    corpus = build_corpus(files, pages)
+    await start_parser_pool()
+    print(f"{'mode':<8} {'files/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'loop_stall_ms':>14}")
+    for mode in ("inline", "pool"):
+        r = await run(mode, corpus, concurrency)
+        print(
+            f"{r['mode']:<8} {r['files_per_s']:>8.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {r['max_loop_stall_ms']:>14.1f}"
+        )
+    shutdown_parser_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=80)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=12)
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.concurrency, args.pages))
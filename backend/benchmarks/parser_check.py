@@ -0,0 +1,194 @@
+"""
+Parser pool limits check.
+
+With a 1s PARSE_TIMEOUT_SECONDS, parses a DOCX that takes several seconds
+next to a normal one and checks that only the slow parse times out: the other
+finishes, the pool is kept and its workers keep serving. Then checks that
+uploads are cut off at MAX_UPLOAD_BYTES while being read (HTTP 400 from
+/api/upload and /api/preview) rather than after the whole file is in memory,
+that a full parser queue is reported as 503 with Retry-After, not as a
+bad file, and that batch and index parses wait for the shared queue instead.
+Finally checks the zip limits: archive size while reading, and member count
+and expanded size before anything is decompressed.
+
+Usage (from backend/):
+    python -m benchmarks.parser_check
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import logging
+import zipfile
+
+SETTINGS = {
+    "PARSE_TIMEOUT_SECONDS": "1",
+    "PARSER_WORKERS": "2",
+    "MAX_UPLOAD_BYTES": "200000",
+    "BATCH_MAX_FILES": "50",
+    "BATCH_MAX_ARCHIVE_BYTES": "300000",
+    "BATCH_MAX_UNCOMPRESSED_BYTES": "1000000",
+}
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"{'PASS' if passed else 'FAIL'}  {name}")
+    return passed
+
+
+class ChunkedUpload:
+    """Stands in for an UploadFile of unknown size; counts the bytes handed out."""
+
+    def __init__(self, size: int):
+        self.size = None
+        self.remaining = size
+        self.read_bytes = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = min(size, self.remaining)
+        self.remaining -= chunk
+        self.read_bytes += chunk
+        return b"x" * chunk
+
+
+def make_zip(members: dict, compression: int = zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+async def collect(results) -> list:
+    return [result async for result in results]
+
+
+async def run() -> bool:
+    os.environ.update(SETTINGS)
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.corpus import make_docx
+    from app.main import app
+    from app.services import resume_parser
+    from app.services.resume_parser import (
+        start_parser_pool, shutdown_parser_pool, parse_resume_async, read_upload, UPLOAD_CHUNK_BYTES
+    )
+
+    logging.disable(logging.CRITICAL)
+    await start_parser_pool()
+    pool = resume_parser._get_pool()
+    results = []
+
+    async def parse(name: str, content: bytes, delay: float = 0.0):
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        try:
+            await parse_resume_async(content, name)
+            return "ok", time.perf_counter() - start
+        except ValueError as e:
+            return str(e), time.perf_counter() - start
+
+    slow, normal = await asyncio.gather(
+        parse("slow.docx", make_docx(paragraphs=60000, tables=0)),
+        # Still running when the slow parse hits its deadline
+        parse("normal.docx", make_docx(paragraphs=10000, tables=0), delay=0.85)
+    )
+    results.append(check(f"slow parse times out ({slow[1]:.2f}s)", slow[0] == "Timed out parsing resume" and slow[1] < 2.0))
+    results.append(check("parse next to it completes", normal[0] == "ok"))
+    again = await asyncio.gather(*(parse(f"after{i}.docx", make_docx(paragraphs=200, tables=1)) for i in range(4)))
+    results.append(check("pool kept and still serving", resume_parser._pool is pool and all(r[0] == "ok" for r in again)))
+
+    limit = int(SETTINGS["MAX_UPLOAD_BYTES"])
+    upload = ChunkedUpload(limit * 20)
+    try:
+        await read_upload(upload)
+        rejected = False
+    except ValueError:
+        rejected = True
+    results.append(check(
+        f"oversized upload stops after {upload.read_bytes} of {limit * 20} bytes",
+        rejected and upload.read_bytes <= limit + UPLOAD_CHUNK_BYTES
+    ))
+
+    big = b"Jane Doe\n" * (limit // 9 + 1)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+        uploaded = await client.post("/api/upload", files={"file": ("resume.txt", big)})
+        preview = await client.post("/api/preview", files={"file": ("resume.txt", big)})
+    results.append(check(
+        "/api/upload and /api/preview reject it with 400",
+        uploaded.status_code == 400 and preview.status_code == 400 and "too large" in uploaded.json()["detail"]
+    ))
+
+    # Every pending slot taken
+    pending, resume_parser._pending = resume_parser._pending, asyncio.Semaphore(0)
+    docx = make_docx(paragraphs=20, tables=0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+        busy = [
+            await client.post("/api/upload", files={"file": ("resume.docx", docx)}),
+            await client.post("/api/preview", files={"file": ("resume.docx", docx)})
+        ]
+    resume_parser._pending = pending
+    results.append(check(
+        f"full parser queue answers {[r.status_code for r in busy]} with Retry-After",
+        all(r.status_code == 503 and int(r.headers.get("retry-after", 0)) >= 1 for r in busy)
+    ))
+
+    # A batch and an index run sharing a single pending slot both queue for it
+    from app.services.batch import analyze_batch
+    from app.services.ranking import resume_ranker
+    from app.services.resume_agent import resume_agent
+    pending, resume_parser._pending = resume_parser._pending, asyncio.Semaphore(1)
+    items = [(f"queued{i}.docx", make_docx(paragraphs=20 + i, tables=0)) for i in range(4)]
+
+    async def analyzed(resume_text, structure):
+        # Parsing is under test here, not the LLM
+        return "analysis", None
+
+    initial_analysis, resume_agent.initial_analysis = resume_agent.initial_analysis, analyzed
+    batched, indexed = await asyncio.gather(
+        collect(analyze_batch(items, create_sessions=False)),
+        resume_ranker.index_files(items)
+    )
+    resume_agent.initial_analysis = initial_analysis
+    errors = [r["error"] for r in batched if r.get("status") == "error"]
+    resume_parser._pending = pending
+    results.append(check(
+        f"batch and index parses queue for the shared slots ({len(indexed['indexed'])} indexed, {len(errors)} batch errors)",
+        len(indexed["indexed"]) == len(items) and not indexed["errors"] and not errors
+    ))
+
+    extracted = []
+    read = zipfile.ZipFile.read
+    zipfile.ZipFile.read = lambda archive, name, pwd=None: extracted.append(name) or read(archive, name, pwd)
+    too_many = make_zip({f"r{i}.txt": "Jane Doe" for i in range(int(SETTINGS["BATCH_MAX_FILES"]) + 1)})
+    bomb = make_zip({f"r{i}.txt": b"a" * 150000 for i in range(10)})
+    oversized = make_zip({"r.txt": os.urandom(400000)}, zipfile.ZIP_STORED)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+        rejected = [
+            await client.post("/api/rank/index", files={"files": ("many.zip", too_many)}),
+            await client.post("/api/rank/index", files={"files": ("bomb.zip", bomb)}),
+            await client.post("/api/rank/index", files={"files": ("big.zip", oversized)})
+        ]
+    zipfile.ZipFile.read = read
+    results.append(check(
+        f"zip over the file count, expanded size or archive size is rejected {[r.status_code for r in rejected]}"
+        f" with {len(extracted)} members extracted",
+        all(r.status_code == 400 for r in rejected) and not extracted
+        and "limit" in rejected[0].json()["detail"] and "expand" in rejected[1].json()["detail"]
+        and "too large" in rejected[2].json()["detail"]
+    ))
+
+    shutdown_parser_pool()
+    return all(results)
+
+
+def main() -> int:
+    return 0 if asyncio.run(run()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Incremental re-analysis benchmark.
+
+Uploads the sample resume, records two corrections through /api/chat, then
+re-uploads an edited copy (one reworded bullet, one role removed) to
+/api/session/{id}/reupload. Compares the delta review against a full analysis
+of the same edited resume (a fresh /api/upload): wall time and the uncached
+prompt tokens the fake Messages API processed, with prefill time proportional
+to them. Also reports what the re-upload kept: corrections, conversation and
+the no-change and large-change paths.
+
+Usage (from backend/):
+    python -m benchmarks.reanalysis_bench --runs 5 --latency 0.5 --prefill-rate 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+from benchmarks.sectionizer_check import SAMPLE
+
+FAKE_PORT = 8999
+
+CORRECTIONS = [
+    "Correction: my title at Dentsu Americas should be Principal Consultant",
+    "Actually, the Sr. Analyst role was a contract position",
+]
+
+
+def edit(resume: str) -> str:
+    """One reworded bullet and the Sr. Analyst role removed."""
+    edited = resume.replace(
+        "- Deployed real-time fraud detection in Kubernetes",
+        "- Deployed real-time fraud detection on Kubernetes, scoring 2M transactions/day"
+    )
+    start = edited.index("Sr. Analyst |")
+    return edited[:start] + edited[edited.index("EDUCATION"):]
+
+
+async def timed(state, call) -> tuple:
+    requests, tokens = state.requests, state.uncached_input_tokens
+    start = time.perf_counter()
+    response = await call()
+    response.raise_for_status()
+    return response.json(), time.perf_counter() - start, state.requests - requests, state.uncached_input_tokens - tokens
+
+
+async def main(args) -> None:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    os.environ["ANALYSIS_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["ANALYSIS_CACHE_PATH"] = ""
+    # Pre-runs after the correction turns would add their prompt tokens to the measured window
+    os.environ["SPECULATION_TOP"] = "0"
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+    from app.services.session_store import session_store
+    from app.services.llm_service import init_clients
+
+    logging.disable(logging.WARNING)
+    # ASGITransport does not run the lifespan; build the clients up front as it would
+    init_clients()
+    fake = create_fake_app(latency=args.latency, prefill_rate=args.prefill_rate)
+    server = await serve(fake, FAKE_PORT)
+    state = fake.state
+
+    with open(SAMPLE) as f:
+        resume = f.read()
+    edited = edit(resume)
+
+    def upload(text: str):
+        return client.post("/api/upload", files={"file": ("resume.txt", text.encode())})
+
+    def reupload(session_id: str, text: str):
+        return client.post(f"/api/session/{session_id}/reupload", files={"file": ("resume.txt", text.encode())})
+
+    timings = {"full": [], "incremental": []}
+    tokens = {"full": [], "incremental": []}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=None) as client:
+        for _ in range(args.runs):
+            session_id = (await upload(resume)).json()["session_id"]
+            for message in CORRECTIONS:
+                (await client.post("/api/chat", json={"session_id": session_id, "message": message})).raise_for_status()
+            history = len((await session_store.get(session_id)).conversation_history)
+
+            result, seconds, _, prompt = await timed(state, lambda: reupload(session_id, edited))
+            timings[result["mode"]].append(seconds)
+            tokens[result["mode"]].append(prompt)
+            _, seconds, _, prompt = await timed(state, lambda: upload(edited))
+            timings["full"].append(seconds)
+            tokens["full"].append(prompt)
+
+        after = await session_store.get(session_id)
+        print(f"re-upload mode={result['mode']}  changed={[(c['name'], c['status']) for c in result['changes']]}")
+        print(
+            f"corrections kept={result['corrections_kept']} dropped={[c['entity'] for c in result['corrections_dropped']]}  "
+            f"history {history} -> {len(after.conversation_history)} messages"
+        )
+        same, _, calls, _ = await timed(state, lambda: reupload(session_id, edited))
+        print(f"identical re-upload: mode={same['mode']} llm_calls={calls}")
+        rewritten = "\n".join(line[::-1] if line.startswith("- ") else line for line in edited.splitlines())
+        large, _, calls, _ = await timed(state, lambda: reupload(session_id, rewritten))
+        print(f"every bullet rewritten: mode={large['mode']} llm_calls={calls}")
+
+    print()
+    for mode in ("full", "incremental"):
+        if timings[mode]:
+            print(
+                f"{mode:<12} runs={len(timings[mode]):<3} p50={statistics.median(timings[mode]) * 1000:7.1f}ms  "
+                f"uncached prompt tokens={statistics.median(tokens[mode]):7.0f}"
+            )
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake generation time per call (s)")
+    parser.add_argument("--prefill-rate", type=float, default=2000, help="Fake uncached prompt tokens processed per second")
+    asyncio.run(main(parser.parse_args()))
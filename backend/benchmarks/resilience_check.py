@@ -0,0 +1,249 @@
+"""
+Fault-injection check of the LLM retry / deadline / circuit-breaker layer.
+
+Drives /api/chat against the fake Messages API while it injects overload
+errors, retry-after throttling, hangs and a full outage, and checks that:
+  - transient 529s are absorbed by retries
+  - retry-after is honoured
+  - a hung upstream is cut off at the per-call deadline with a 503
+  - a full outage opens the circuit, so callers fail fast without upstream calls
+  - the circuit closes again once the upstream recovers
+  - a half-open trial call that is cancelled (client gone) frees the trial slot
+  - speculative pre-runs are skipped while the circuit is not closed, and
+    cancelling one in flight leaves the breaker untouched
+  - a multi-role improvement request abandoned by its client while one of
+    its calls is the half-open trial does not leave the circuit stuck
+  - outbound concurrency never exceeds LLM_MAX_CONCURRENCY
+  - late outcomes of calls started before the circuit opened (or before it
+    last closed) neither close it, free the trial slot nor re-open it
+
+Usage (from backend/):
+    python -m benchmarks.resilience_check
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import statistics
+import sys
+import time
+from functools import partial
+
+FAKE_PORT = 8999
+SETTINGS = {
+    "LLM_TIMEOUT_SECONDS": "2",
+    "LLM_MAX_RETRIES": "3",
+    "LLM_RETRY_BASE_DELAY": "0.05",
+    "LLM_RETRY_MAX_DELAY": "0.5",
+    "LLM_MAX_CONCURRENCY": "8",
+    "CIRCUIT_MIN_CALLS": "10",
+    "CIRCUIT_RESET_SECONDS": "1.5",
+}
+
+
+async def fire(client, count: int):
+    async def one(i: int):
+        start = time.perf_counter()
+        response = await client.post("/api/chat", json={"session_id": f"chaos-{i}", "message": "Hi"})
+        return response.status_code, time.perf_counter() - start, response.headers.get("retry-after")
+
+    return await asyncio.gather(*(one(i) for i in range(count)))
+
+
+def report(name: str, results, upstream_calls: int, passed: bool) -> bool:
+    ok = sum(1 for status, _, _ in results if status == 200)
+    unavailable = sum(1 for status, _, _ in results if status == 503)
+    p50 = statistics.median(latency for _, latency, _ in results) * 1000
+    verdict = "PASS" if passed else "FAIL"
+    print(f"{verdict}  {name:<28} ok={ok:<3} 503={unavailable:<3} p50={p50:7.1f}ms upstream_calls={upstream_calls}")
+    return passed
+
+
+async def main() -> int:
+    os.environ.update(SETTINGS)
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    # Measure the service, not the admission limits (every simulated user shares one IP)
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+    from app.services.llm_service import init_clients, breaker
+    from app.services.resilience import CircuitBreaker, LLMUnavailableError
+    from app.services.resume_agent import resume_agent
+    from app.services.speculation import speculative_chat
+
+    logging.disable(logging.CRITICAL)
+    # ASGITransport does not run the lifespan; build the clients up front as it would
+    init_clients()
+    fake = create_fake_app(latency=0.05)
+    server = await serve(fake, FAKE_PORT)
+    state = fake.state
+    checks = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as client:
+        def calls_since(before: int) -> int:
+            return state.requests - before
+
+        # 1. Transient overload: 30% of calls return 529, retries absorb them
+        state.error_rate, state.error_status, state.retry_after = 0.3, 529, None
+        before = state.requests
+        results = await fire(client, 40)
+        ok = sum(1 for status, _, _ in results if status == 200)
+        checks.append(report("transient 529 (30%)", results, calls_since(before), ok >= 38))
+
+        # 2. Throttling with retry-after: the retry waits at least that long
+        state.error_rate, state.error_status, state.retry_after = 1.0, 429, 0.4
+        asyncio.get_running_loop().call_later(0.2, setattr, state, "error_rate", 0.0)
+        before = state.requests
+        results = await fire(client, 1)
+        status, latency, _ = results[0]
+        checks.append(report("429 + retry-after 0.4s", results, calls_since(before), status == 200 and latency >= 0.4))
+        state.retry_after = None
+
+        # 3. Concurrency cap: many slow calls never exceed LLM_MAX_CONCURRENCY upstream
+        state.error_rate, state.latency, state.max_in_flight = 0.0, 0.3, 0
+        before = state.requests
+        results = await fire(client, 40)
+        checks.append(report(
+            f"concurrency cap (max {state.max_in_flight})", results, calls_since(before),
+            state.max_in_flight <= int(SETTINGS["LLM_MAX_CONCURRENCY"])
+        ))
+
+        # 4. Hung upstream: cut off at the deadline with 503
+        state.latency = 10.0
+        before = state.requests
+        results = await fire(client, 3)
+        checks.append(report("hung upstream -> deadline", results, calls_since(before), all(
+            status == 503 and latency < float(SETTINGS["LLM_TIMEOUT_SECONDS"]) + 0.5 for status, latency, _ in results
+        )))
+        state.latency = 0.05
+
+        # 5. Full outage: circuit opens, later calls fail fast without reaching upstream
+        state.error_rate, state.error_status = 1.0, 529
+        await fire(client, 10)
+        before = state.requests
+        gc.collect()
+        results = await fire(client, 20)
+        checks.append(report("outage -> circuit open", results, calls_since(before), calls_since(before) == 0 and all(
+            status == 503 and retry_after is not None and latency < 0.1 for status, latency, retry_after in results
+        )))
+
+        # 6. Recovery: after the cool-down a trial call closes the circuit
+        state.error_rate = 0.0
+        await asyncio.sleep(float(SETTINGS["CIRCUIT_RESET_SECONDS"]) + 0.1)
+        await fire(client, 1)
+        before = state.requests
+        results = await fire(client, 10)
+        checks.append(report("recovery -> circuit closed", results, calls_since(before), all(
+            status == 200 for status, _, _ in results
+        )))
+
+        # 7. Cancelled trial: the half-open trial call is cancelled mid-flight, the next call still gets through
+        state.error_rate = 1.0
+        await fire(client, 10)
+        state.error_rate, state.latency = 0.0, 5.0
+        await asyncio.sleep(float(SETTINGS["CIRCUIT_RESET_SECONDS"]) + 0.1)
+        trial = asyncio.create_task(fire(client, 1))
+        await asyncio.sleep(0.2)
+        held = breaker._trial is not None
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+        state.latency = 0.05
+        before = state.requests
+        results = await fire(client, 1)
+        results += await fire(client, 5)
+        checks.append(report("cancelled half-open trial", results, calls_since(before), held and breaker.state == "closed" and all(
+            status == 200 for status, _, _ in results
+        )))
+
+        # 8. Speculation in a brownout: not started while half-open, and a cancelled pre-run frees nothing it holds
+        def speculate(session_id: str) -> None:
+            call = partial(resume_agent.chat, "Hi", [], None, [], None, operation="chat_speculative")
+            speculative_chat.start(session_id, (), [("Hi", 100, call)])
+
+        state.error_rate = 1.0
+        await fire(client, 10)
+        state.error_rate, state.latency = 0.0, 5.0
+        await asyncio.sleep(float(SETTINGS["CIRCUIT_RESET_SECONDS"]) + 0.1)
+        skipped = speculative_chat.counts["skipped"]
+        speculate("spec-half-open")
+        await asyncio.sleep(0.2)
+        held = breaker._trial is not None
+        speculative_chat.cancel("spec-half-open")
+        state.latency = 0.05
+        before = state.requests
+        results = await fire(client, 1)
+        checks.append(report("half-open: no speculation", results, calls_since(before), not held and all(
+            status == 200 for status, _, _ in results
+        ) and speculative_chat.counts["skipped"] == skipped + 1))
+
+        state.latency = 5.0
+        wasted = speculative_chat.counts["wasted"]
+        speculate("spec-cancelled")
+        await asyncio.sleep(0.2)
+        speculative_chat.cancel("spec-cancelled")
+        await asyncio.sleep(0)
+        state.latency = 0.05
+        before = state.requests
+        results = await fire(client, 5)
+        checks.append(report("cancelled speculation", results, calls_since(before), breaker.state == "closed" and all(
+            status == 200 for status, _, _ in results
+        ) and speculative_chat.counts["wasted"] == wasted + 1))
+
+        # 9. Multi-role improvements abandoned mid-trial: the remaining per-role calls are cancelled
+        state.error_rate = 1.0
+        await fire(client, 20)
+        state.error_rate, state.header_delay = 0.0, 5.0
+        await asyncio.sleep(float(SETTINGS["CIRCUIT_RESET_SECONDS"]) + 0.1)
+        improvements = resume_agent.suggest_improvements_multi("Data analyst resume", [("Data Scientist", None), ("Data Engineer", None)])
+        consumer = asyncio.create_task(improvements.__anext__())
+        await asyncio.sleep(0.2)
+        held = breaker._trial is not None
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        state.header_delay = 0.0
+        before = state.requests
+        results = await fire(client, 1)
+        results += await fire(client, 5)
+        checks.append(report("abandoned multi-improve", results, calls_since(before), held and breaker.state == "closed" and all(
+            status == 200 for status, _, _ in results
+        )))
+
+        # 10. Late outcomes, on a breaker of its own: calls in flight when the circuit opened report afterwards
+        late = CircuitBreaker(failure_ratio=0.5, min_calls=4, window=20, reset_seconds=0.2)
+        tokens = [late.before_call() for _ in range(12)]
+        for token in tokens[:4]:
+            late.record_failure(token)
+        opened = late.state == "open"
+        late.record_success(tokens[4])
+        stays_open = late.state == "open"
+        await asyncio.sleep(0.25)
+        trial = late.before_call()
+        late.record_failure(tokens[5])
+        try:
+            late.before_call()
+            second_trial = True
+        except LLMUnavailableError:
+            second_trial = False
+        late.record_success(trial)
+        for token in tokens[6:]:
+            late.record_failure(token)
+        passed = opened and stays_open and not second_trial and late.state == "closed" and len(late.outcomes) == 7
+        print(
+            f"{'PASS' if passed else 'FAIL'}  {'late outcomes':<28} open={opened} kept_open={stays_open} "
+            f"second_trial={second_trial} state={late.state}"
+        )
+        checks.append(passed)
+
+    server.should_exit = True
+    return 0 if all(checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,123 @@
+"""
+Tiered model routing benchmark.
+
+Replays a scripted coaching conversation (acknowledgements and clarifying
+questions mixed with rewrite/review requests) through /api/chat against the
+fake Messages API, where the light model answers faster than the heavy one.
+Runs once with every operation on the heavy tier and once with the configured
+MODEL_ROUTING, and reports turn latency and the estimated cost (from the
+llm_cost_usd_total metric) per tier.
+
+Usage (from backend/):
+    python -m benchmarks.routing_bench --sessions 20 --heavy-latency 1.0 --light-latency 0.3
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+from collections import defaultdict
+
+from benchmarks.sectionizer_check import SAMPLE
+
+FAKE_PORT = 8999
+
+SCRIPT = [
+    "Thanks, that's really helpful!",
+    "Can you rewrite my summary to focus on machine learning?",
+    "What does ATS stand for?",
+    "Yes, I led a team of 4 at Dentsu.",
+    "Improve the bullets in my most recent role",
+    "ok, sounds good",
+    "Should I include my GPA?",
+    "Review my skills section for a data engineering role",
+]
+
+
+def cost_by_tier() -> dict:
+    from prometheus_client import REGISTRY
+
+    totals = defaultdict(float)
+    for metric in REGISTRY.collect():
+        if metric.name == "llm_cost_usd":
+            for sample in metric.samples:
+                if sample.name == "llm_cost_usd_total":
+                    totals[sample.labels["tier"]] += sample.value
+    return totals
+
+
+async def run_mode(client, name: str, sessions: int) -> None:
+    from app.models.schemas import SessionState
+    from app.services.model_router import model_router
+    from app.services.session_store import session_store
+
+    with open(SAMPLE) as f:
+        resume = f.read()
+    for i in range(sessions):
+        await session_store.save(SessionState(session_id=f"{name}-{i}", resume_text=resume))
+
+    latencies = defaultdict(list)
+    cost_before = cost_by_tier()
+
+    async def converse(i: int):
+        for message in SCRIPT:
+            tier = model_router.route("chat", message).tier
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json={"session_id": f"{name}-{i}", "message": message})
+            response.raise_for_status()
+            latencies[tier].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(converse(i) for i in range(sessions)))
+    wall = time.perf_counter() - start
+    cost_after = cost_by_tier()
+
+    spend = {tier: cost_after[tier] - cost_before.get(tier, 0.0) for tier in cost_after}
+    print(f"{name:<8} wall={wall:6.2f}s  total cost=${sum(spend.values()):.4f}")
+    for tier in ("heavy", "light"):
+        if latencies[tier]:
+            print(
+                f"  {tier:<6} turns={len(latencies[tier]):<4} p50={statistics.median(latencies[tier]) * 1000:7.1f}ms  "
+                f"cost=${spend.get(tier, 0.0):.4f}"
+            )
+
+
+async def main(args) -> None:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.core.config import LLM_MODEL, LLM_LIGHT_MODEL
+    from app.main import app
+    from app.services.model_router import model_router
+    from app.services.llm_service import init_clients
+
+    logging.disable(logging.WARNING)
+    init_clients()
+    fake = create_fake_app(
+        latency=args.heavy_latency,
+        model_latency={LLM_MODEL: args.heavy_latency, LLM_LIGHT_MODEL: args.light_latency}
+    )
+    server = await serve(fake, FAKE_PORT)
+
+    routing = model_router.routing
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=None) as client:
+        model_router.routing = {}
+        await run_mode(client, "heavy", args.sessions)
+        model_router.routing = routing
+        await run_mode(client, "routed", args.sessions)
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--heavy-latency", type=float, default=1.0, help="Fake response time of LLM_MODEL (s)")
+    parser.add_argument("--light-latency", type=float, default=0.3, help="Fake response time of LLM_LIGHT_MODEL (s)")
+    asyncio.run(main(parser.parse_args()))
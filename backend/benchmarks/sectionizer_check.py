@@ -0,0 +1,96 @@
+"""
+Sectionizer check on variants of test_data/sample_resume.txt.
+
+Each variant reformats the sample (heading case and aliases, colons, bullet
+glyphs, CRLF line endings, an added summary, reordered sections) and checks
+that the expected sections and experience entries are found and that every
+offset slices back to the reported content. Also reports sectionizing time.
+
+Usage (from backend/):
+    python -m benchmarks.sectionizer_check
+"""
+
+import os
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from app.services.sectionizer import sectionize, find_section, focused_resume_text
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "..", "test_data", "sample_resume.txt")
+
+BASE_KINDS = ["contact", "experience", "education", "skills"]
+
+
+def split_sections(text: str) -> List[str]:
+    """Split the sample on its known headings (keeping them)."""
+    blocks = []
+    for heading in ("EDUCATION", "CERTIFICATIONS, SKILLS & INTERESTS"):
+        head, _, text = text.partition(heading)
+        blocks.append(head)
+        text = heading + text
+    blocks.append(text)
+    return blocks
+
+
+def variants(sample: str) -> List[Tuple[str, str, List[str]]]:
+    summary = "PROFESSIONAL SUMMARY\nData scientist with 8 years of experimentation and ML experience.\n\n"
+    contact, rest = sample.split("WORK EXPERIENCE", 1)
+    experience, education, skills = split_sections("WORK EXPERIENCE" + rest)
+    cases: List[Tuple[str, Callable[[str], str], List[str]]] = [
+        ("original", lambda t: t, BASE_KINDS),
+        ("title case headings", lambda t: t.replace("WORK EXPERIENCE", "Work Experience")
+            .replace("EDUCATION", "Education")
+            .replace("CERTIFICATIONS, SKILLS & INTERESTS", "Skills & Interests"), BASE_KINDS),
+        ("colon headings", lambda t: t.replace("WORK EXPERIENCE", "Professional Experience:")
+            .replace("EDUCATION", "Education:"), BASE_KINDS),
+        ("bullet glyphs", lambda t: t.replace("\n- ", "\n• "), BASE_KINDS),
+        ("CRLF line endings", lambda t: t.replace("\n", "\r\n"), BASE_KINDS),
+        ("added summary", lambda t: t.replace("WORK EXPERIENCE", summary + "WORK EXPERIENCE"),
+            ["contact", "summary", "experience", "education", "skills"]),
+        ("education first", lambda t: contact + education + experience + skills,
+            ["contact", "education", "experience", "skills"]),
+    ]
+    return [(name, transform(sample), kinds) for name, transform, kinds in cases]
+
+
+def check(name: str, text: str, expected_kinds: List[str]) -> bool:
+    structure = sectionize(text)
+    problems = []
+    kinds = [section.kind for section in structure.sections]
+    if kinds != expected_kinds:
+        problems.append(f"kinds {kinds}")
+    for section in structure.sections:
+        if text[section.start:section.end] != section.content:
+            problems.append(f"{section.kind} offsets")
+        for entry in section.entries:
+            if text[entry.start:entry.end] != entry.content:
+                problems.append(f"{section.kind} entry offsets")
+    experience = structure.find("experience")
+    if experience is None or len(experience.entries) != 4:
+        problems.append(f"experience entries {len(experience.entries) if experience else 0}")
+    if find_section(structure, "skills") is None:
+        problems.append("find_section(skills)")
+    focused = focused_resume_text(structure, "Can you rewrite my education section?")
+    if not focused or "Georgia Institute of Technology" not in focused or "Dentsu" in focused:
+        problems.append("focused text")
+
+    start = time.perf_counter()
+    for _ in range(200):
+        sectionize(text)
+    per_call = (time.perf_counter() - start) / 200 * 1000
+
+    verdict = "FAIL" if problems else "PASS"
+    print(f"{verdict}  {name:<22} sections={len(structure.sections)} {per_call:6.3f}ms  {'; '.join(problems)}")
+    return not problems
+
+
+def main() -> int:
+    with open(SAMPLE) as f:
+        sample = f.read()
+    results = [check(name, text, kinds) for name, text, kinds in variants(sample)]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
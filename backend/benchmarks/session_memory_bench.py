@@ -0,0 +1,114 @@
+"""
+Session memory benchmark.
+
+Builds N long conversations twice: as a list of Message models (the previous
+SessionState.conversation_history) and as a ConversationHistory with the
+folded part compressed, as ConversationContext leaves it. Reports traced bytes
+per session for each, and the time to build one chat turn's messages: the old
+per-turn rebuild (fresh preamble plus a dict per message) against the cached
+preamble plus incremental render.
+
+Usage (from backend/):
+    python -m benchmarks.session_memory_bench --sessions 500 --turns 30
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from benchmarks.sectionizer_check import SAMPLE
+from app.core.config import CONTEXT_RECENT_MESSAGES, HISTORY_COMPRESS_MIN_CHARS
+from app.models.schemas import ConversationHistory, Message, MessageRole
+from app.services.resume_agent import resume_agent
+
+WORDS = (
+    "led built designed shipped reduced latency pipeline model revenue team stakeholders metrics "
+    "python spark sql experiment cohort retention forecast dashboard quarterly impact customers "
+    "improved scaled migrated architecture reliability analysis insights the a of to and for with by"
+).split()
+
+
+def conversation(rng: random.Random, turns: int):
+    """(role, content) pairs: short user messages, long assistant replies."""
+    for _ in range(turns):
+        yield MessageRole.USER, " ".join(rng.choices(WORDS, k=rng.randint(15, 60)))
+        yield MessageRole.ASSISTANT, " ".join(rng.choices(WORDS, k=rng.randint(150, 400)))
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--renders", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(SAMPLE) as f:
+        resume = f.read()
+    folded = max(0, 2 * args.turns - CONTEXT_RECENT_MESSAGES)
+
+    def legacy():
+        rng = random.Random(1)
+        return [
+            [Message(role=role, content=content) for role, content in conversation(rng, args.turns)]
+            for _ in range(args.sessions)
+        ]
+
+    def compact():
+        rng = random.Random(1)
+        sessions = []
+        for _ in range(args.sessions):
+            history = ConversationHistory()
+            for role, content in conversation(rng, args.turns):
+                history.append(Message(role=role, content=content))
+            history.compress_before(folded, HISTORY_COMPRESS_MIN_CHARS)
+            sessions.append(history)
+        return sessions
+
+    def contents_only():
+        rng = random.Random(1)
+        return [[content for _, content in conversation(rng, args.turns)] for _ in range(args.sessions)]
+
+    text_bytes = measure(contents_only)
+    legacy_bytes = measure(legacy)
+    compact_bytes = measure(compact)
+    print(f"{args.sessions} sessions x {2 * args.turns} messages ({folded} folded into the summary)")
+    print(f"  message text alone      {text_bytes / args.sessions / 1024:8.1f} kB/session")
+    print(f"  List[Message]           {legacy_bytes / args.sessions / 1024:8.1f} kB/session")
+    print(f"  ConversationHistory     {compact_bytes / args.sessions / 1024:8.1f} kB/session "
+          f"({(1 - compact_bytes / legacy_bytes) * 100:.0f}% less)")
+
+    # Per-turn message building over the live window
+    rng = random.Random(2)
+    messages = [Message(role=role, content=content) for role, content in conversation(rng, args.turns)]
+    history = ConversationHistory(messages)
+    history.compress_before(folded, HISTORY_COMPRESS_MIN_CHARS)
+    window = messages[folded:]
+
+    start = time.perf_counter()
+    for _ in range(args.renders):
+        resume_agent._preambles.clear()
+        resume_agent._chat_messages("next question", window, resume, None, "summary so far")
+    rebuild_us = (time.perf_counter() - start) / args.renders * 1e6
+
+    start = time.perf_counter()
+    for _ in range(args.renders):
+        resume_agent._chat_messages("next question", history.render(folded), resume, None, "summary so far")
+    cached_us = (time.perf_counter() - start) / args.renders * 1e6
+    print(f"chat turn messages: rebuild {rebuild_us:6.1f}us  cached prefix {cached_us:6.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Speculative follow-up benchmark.
+
+Simulated users read each reply for --think seconds, then either click the
+first suggestion returned in ChatResponse.suggestions (with probability
+--click) or type something else. Runs once with speculation off and once with
+SPECULATION_TOP pre-runs, against the fake Messages API, and reports turn
+latency for clicked and typed turns, LLM calls made, and the speculation
+counters (/api/speculation/stats); "skipped" counts pre-runs refused by the
+speculation budget or concurrency cap.
+
+Usage (from backend/):
+    python -m benchmarks.speculation_bench --sessions 10 --turns 4 --click 0.7 --think 1.5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from benchmarks.sectionizer_check import SAMPLE
+
+FAKE_PORT = 8999
+
+TYPED = [
+    "Should I include my GPA?",
+    "How long should my resume be?",
+    "Is it fine to list Tableau under skills?",
+    "What does ATS stand for?",
+]
+
+
+async def run_mode(client, state, name: str, args) -> None:
+    from app.models.schemas import SessionState
+    from app.services.session_store import session_store
+    from app.services.speculation import speculative_chat
+    from app.services.structured_analysis import build_analysis
+    from app.services.sectionizer import sectionize
+    from benchmarks.fake_anthropic import DEFAULT_TOOL_INPUT
+
+    with open(SAMPLE) as f:
+        resume = f.read()
+    structure = sectionize(resume)
+    for i in range(args.sessions):
+        await session_store.save(SessionState(
+            session_id=f"{name}-{i}", resume_text=resume, resume_structure=structure,
+            resume_analysis=build_analysis(DEFAULT_TOOL_INPUT, 70, structure)
+        ))
+
+    latencies = defaultdict(list)
+    counts_before = dict(speculative_chat.counts)
+    requests_before = state.requests
+    rng = random.Random(args.seed)
+
+    async def converse(i: int):
+        message, clicked = TYPED[i % len(TYPED)], False
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json={"session_id": f"{name}-{i}", "message": message})
+            response.raise_for_status()
+            latencies["clicked" if clicked else "typed"].append(time.perf_counter() - start)
+            suggestions = response.json()["suggestions"] or []
+            await asyncio.sleep(args.think)
+            clicked = bool(suggestions) and rng.random() < args.click
+            message = suggestions[0] if clicked else TYPED[(i + turn + 1) % len(TYPED)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(converse(i) for i in range(args.sessions)))
+    wall = time.perf_counter() - start
+
+    counts = {k: v - counts_before.get(k, 0) for k, v in speculative_chat.counts.items()}
+    resolved = counts["hit"] + counts["wasted"]
+    print(f"{name:<12} wall={wall:6.2f}s  llm_calls={state.requests - requests_before}")
+    for kind in ("typed", "clicked"):
+        if latencies[kind]:
+            print(f"  {kind:<8} turns={len(latencies[kind]):<4} p50={statistics.median(latencies[kind]) * 1000:7.1f}ms")
+    if resolved:
+        print(f"  speculation {counts}  hit_rate={counts['hit'] / resolved:.2f}")
+
+
+async def main(args) -> None:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.core.config import LLM_MODEL, LLM_LIGHT_MODEL
+    from app.main import app
+    from app.services.llm_service import init_clients
+    from app.services.speculation import speculative_chat
+
+    logging.disable(logging.WARNING)
+    # ASGITransport does not run the lifespan; build the clients up front as it would
+    init_clients()
+    fake = create_fake_app(latency=args.latency, model_latency={LLM_MODEL: args.latency, LLM_LIGHT_MODEL: args.light_latency})
+    server = await serve(fake, FAKE_PORT)
+
+    top = speculative_chat.top
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=None) as client:
+        speculative_chat.top = 0
+        await run_mode(client, fake.state, "no-spec", args)
+        speculative_chat.top = top or 1
+        if args.budget is not None:
+            speculative_chat.token_rate, speculative_chat.token_capacity = args.budget / 60.0, args.budget
+        await run_mode(client, fake.state, "speculative", args)
+        print(f"/api/speculation/stats: {(await client.get('/api/speculation/stats')).json()}")
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--click", type=float, default=0.7, help="Probability of clicking the first suggestion")
+    parser.add_argument("--think", type=float, default=1.5, help="Reading time between turns (s)")
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake response time of LLM_MODEL (s)")
+    parser.add_argument("--light-latency", type=float, default=0.3, help="Fake response time of LLM_LIGHT_MODEL (s)")
+    parser.add_argument("--budget", type=float, default=None, help="Speculation tokens per minute (default: SPECULATION_TOKENS_PER_MINUTE)")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
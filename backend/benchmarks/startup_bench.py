@@ -0,0 +1,110 @@
+"""
+Cold-start benchmark.
+
+Starts the API in a fresh uvicorn process (against the fake Messages API in
+another process) and measures, from process launch: when it first answers
+HTTP, when /health reports ready, and the latency of the first PDF upload made
+right after readiness. Runs once with STARTUP_WARMUP=true and once with
+STARTUP_WARMUP=false.
+
+Usage (from backend/):
+    python -m benchmarks.startup_bench --runs 3
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import make_pdf
+
+FAKE_PORT = 8999
+APP_PORT = 8997
+
+
+def wait_for(url: str, deadline: float, ready_status: int = 200) -> float:
+    """Poll `url` until it returns `ready_status`; returns the time it did."""
+    import httpx
+
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == ready_status:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def cold_start(warmup: bool, pdf: bytes) -> dict:
+    import httpx
+
+    env = dict(
+        os.environ,
+        ANTHROPIC_API_KEY="fake-key",
+        ANTHROPIC_BASE_URL=f"http://127.0.0.1:{FAKE_PORT}",
+        STARTUP_WARMUP=str(warmup).lower(),
+        ANALYSIS_CACHE_MAX_ENTRIES="0",
+        ANALYSIS_CACHE_PATH="",
+        IP_REQUESTS_PER_MINUTE="0",
+    )
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(APP_PORT), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        deadline = start + 60
+        # Any answer (including 503 while warming up) means the port is open
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{APP_PORT}/health", timeout=1)
+                listening = time.perf_counter()
+                break
+            except httpx.TransportError:
+                if time.perf_counter() > deadline:
+                    raise
+                time.sleep(0.01)
+        ready = wait_for(f"http://127.0.0.1:{APP_PORT}/health", deadline)
+
+        upload_start = time.perf_counter()
+        response = httpx.post(
+            f"http://127.0.0.1:{APP_PORT}/api/upload", files={"file": ("resume.pdf", pdf)}, timeout=60
+        )
+        response.raise_for_status()
+        first_upload = time.perf_counter() - upload_start
+    finally:
+        server.terminate()
+        server.wait()
+    return {"listening": listening - start, "ready": ready - start, "first_upload": first_upload}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM response time (s)")
+    args = parser.parse_args()
+
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_anthropic", "--port", str(FAKE_PORT), "--latency", str(args.latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    pdf = make_pdf(pages=2)
+    try:
+        wait_for(f"http://127.0.0.1:{FAKE_PORT}/docs", time.perf_counter() + 30)
+        for warmup in (True, False):
+            runs = [cold_start(warmup, pdf) for _ in range(args.runs)]
+            row = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+            print(
+                f"STARTUP_WARMUP={str(warmup).lower():<5}  listening={row['listening']:7.0f}ms  "
+                f"ready={row['ready']:7.0f}ms  first_upload={row['first_upload']:7.0f}ms  (median of {args.runs})"
+            )
+    finally:
+        fake.terminate()
+        fake.wait()
+
+
+if __name__ == "__main__":
+    main()
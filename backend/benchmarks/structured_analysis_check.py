@@ -0,0 +1,111 @@
+"""
+Structured analysis check.
+
+Uploads a resume against the fake Messages API with STRUCTURED_ANALYSIS on and
+checks that the analysis comes back as a ResumeAnalysis (response, session and
+/session/{id}/analysis), that the markdown is rendered from it, that a
+re-upload is served from the analysis cache without an LLM call, and that a
+tool response that does not fit the schema (including malformed section
+items) falls back to the free-form review, and that a re-upload whose delta
+review does not fit falls back to a full analysis.
+Then reports what is kept for the analysis: the cached JSON and the tokens a
+follow-up chat turn replays for it, against the rendered review.
+
+Usage (from backend/):
+    python -m benchmarks.structured_analysis_check
+"""
+
+import os
+import sys
+import asyncio
+import logging
+
+from benchmarks.sectionizer_check import SAMPLE
+
+FAKE_PORT = 8999
+
+
+def check(name: str, passed: bool) -> bool:
+    print(f"{'PASS' if passed else 'FAIL'}  {name}")
+    return passed
+
+
+async def run() -> bool:
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    os.environ["STRUCTURED_ANALYSIS"] = "true"
+    os.environ["ANALYSIS_CACHE_PATH"] = ""
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve, DEFAULT_REPLY, DEFAULT_TOOL_INPUT
+    from app.main import app
+    from app.models.schemas import ResumeAnalysis
+    from app.services.llm_service import estimate_tokens
+    from app.services.session_store import session_store
+    from app.services.analysis_cache import analysis_cache
+    from app.services.structured_analysis import format_analysis, cacheable_analysis
+
+    logging.disable(logging.WARNING)
+    fake = create_fake_app(latency=0.05)
+    server = await serve(fake, FAKE_PORT)
+    state = fake.state
+    with open(SAMPLE, "rb") as f:
+        resume = f.read()
+
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", timeout=None) as client:
+        response = await client.post("/api/upload", files={"file": ("resume.txt", resume)})
+        body = response.json()
+        analysis = ResumeAnalysis.model_validate(body["analysis"])
+        session = await session_store.get(body["session_id"])
+        results.append(check("upload returns a validated ResumeAnalysis", analysis.overall_score == 7 and len(analysis.strengths) == 3))
+        results.append(check("analysis stored on the session", session.resume_analysis == analysis))
+        contents = {s.name: s.content for s in analysis.sections}
+        results.append(check("section contents filled from the resume", contents["Experience"] and not contents["Summary"]))
+        results.append(check("markdown rendered locally", body["initial_analysis"] == format_analysis(analysis)))
+        stored = await client.get(f"/api/session/{body['session_id']}/analysis")
+        results.append(check("GET /session/{id}/analysis", stored.status_code == 200 and stored.json() == body["analysis"]))
+
+        before = state.requests
+        again = (await client.post("/api/upload", files={"file": ("resume.txt", resume)})).json()
+        results.append(check("re-upload served from the cache", state.requests == before and again["analysis"] == body["analysis"]))
+
+        state.tool_input = {"overall_score": "not a number"}
+        changed = resume + b"\nAdditional: open source contributor"
+        fallback = (await client.post("/api/upload", files={"file": ("resume.txt", changed)})).json()
+        results.append(check("invalid tool output falls back to free-form", fallback["analysis"] is None and fallback["initial_analysis"] == DEFAULT_REPLY))
+
+        state.tool_input = {**DEFAULT_TOOL_INPUT, "sections": ["Experience", 7]}
+        changed += b"\nVolunteer: code club mentor"
+        response = await client.post("/api/upload", files={"file": ("resume.txt", changed)})
+        results.append(check(
+            "malformed section items fall back to free-form",
+            response.status_code == 200 and response.json()["analysis"] is None
+        ))
+
+        # Delta review of a small edit whose tool output does not fit: full re-analysis, not a 500
+        state.tool_input = {"sections": ["Experience"]}
+        edited = resume.replace(b"Kubernetes", b"Kubernetes and Helm", 1)
+        response = await client.post(f"/api/session/{body['session_id']}/reupload", files={"file": ("resume.txt", edited)})
+        results.append(check("malformed delta review falls back to a full analysis", response.status_code == 200 and response.json()["mode"] == "full"))
+
+    server.should_exit = True
+
+    # What is kept and replayed for the analysis
+    context_tokens = estimate_tokens(session.conversation_history[0].content)
+    review_tokens = estimate_tokens(body["initial_analysis"])
+    results.append(check("follow-ups replay the compact form", context_tokens < review_tokens))
+    print(f"cached entry: {len(cacheable_analysis(analysis))} bytes of JSON")
+    print(f"follow-up context: {context_tokens} tokens (rendered review: {review_tokens} tokens)")
+    analysis_cache.close()
+    return all(results)
+
+
+def main() -> int:
+    return 0 if asyncio.run(run()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Time-to-first-token benchmark: buffered vs SSE endpoints.
+
+The fake Messages API spreads `--latency` seconds over the reply's tokens, so the
+buffered endpoints only answer after the whole generation while the /stream
+variants deliver the first token almost immediately.
+
+Usage (from backend/):
+    python -m benchmarks.ttft --requests 20 --latency 2.0
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+FAKE_PORT = 8999
+APP_PORT = 8998
+SAMPLE_RESUME = os.path.join(os.path.dirname(__file__), "..", "..", "test_data", "sample_resume.txt")
+
+
+async def time_buffered(client, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def time_stream(client, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    async with client.stream(method, url, **kwargs) as response:
+        response.raise_for_status()
+        ttft = None
+        async for line in response.aiter_lines():
+            if ttft is None and line == "event: token":
+                ttft = time.perf_counter() - start
+    return ttft
+
+
+def summarize(name: str, samples) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<22} p50={statistics.median(samples) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms")
+
+
+async def main(requests: int, latency: float):
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{FAKE_PORT}"
+    # Measure the LLM path, not analysis cache hits
+    os.environ["ANALYSIS_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["ANALYSIS_CACHE_PATH"] = ""
+    # Measure the service, not the admission limits (every simulated user shares one IP)
+    for name in ("IP_REQUESTS_PER_MINUTE", "SESSION_REQUESTS_PER_MINUTE", "ADMISSION_TOKENS_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+
+    import httpx
+    from benchmarks.fake_anthropic import create_fake_app, serve
+    from app.main import app
+
+    for name in ("httpx", "httpx2"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    fake_server = await serve(create_fake_app(latency=latency), FAKE_PORT)
+    # Served over real HTTP: the in-process ASGI transport buffers whole responses
+    app_server = await serve(app, APP_PORT)
+    with open(SAMPLE_RESUME, "rb") as f:
+        resume = f.read()
+
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=None, limits=limits) as client:
+        upload = await client.post("/api/upload", files={"file": ("resume.txt", resume)})
+        session_id = upload.json()["session_id"]
+        chat = {"json": {"session_id": session_id, "message": "Rewrite my summary"}}
+        improve = {"params": {"session_id": session_id, "target_role": "ML Engineer"}}
+        files = {"files": {"file": ("resume.txt", resume)}}
+
+        cases = [
+            ("upload", "/api/upload", "/api/upload/stream", files),
+            ("chat", "/api/chat", "/api/chat/stream", chat),
+            ("improve", "/api/improve", "/api/improve/stream", improve),
+        ]
+        for name, buffered_url, stream_url, kwargs in cases:
+            buffered = await asyncio.gather(
+                *(time_buffered(client, "POST", buffered_url, **kwargs) for _ in range(requests))
+            )
+            streamed = await asyncio.gather(
+                *(time_stream(client, "POST", stream_url, **kwargs) for _ in range(requests))
+            )
+            summarize(f"{name} (buffered)", buffered)
+            summarize(f"{name} (stream TTFT)", streamed)
+
+    app_server.should_exit = True
+    fake_server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency))